@@ -0,0 +1 @@
+"""Benchmarks do decoder, do pipeline de recepção e da API HTTP."""
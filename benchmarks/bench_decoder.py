@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List
+
+from src.infrastructure.adapters.serial.piano_decoder import (
+    SNAPSHOT_MARKER,
+    SNAPSHOT_SIZE,
+    PianoStreamDecoder,
+    apply_event_to_state,
+    consume_stream,
+    decode_event_byte,
+    decode_snapshot_bytes,
+    make_empty_state,
+    mask_changes,
+    snapshot_to_mask,
+)
+
+from .common import synthetic_stream, timed
+
+
+def _bench_decode_event_byte(stream: bytes) -> None:
+    decode = decode_event_byte
+    for val in stream:
+        decode(val)
+
+
+def _snapshots(count: int) -> List[bytes]:
+    return [(i * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFF).to_bytes(6, "little") for i in range(count)]
+
+
+def _bench_decode_snapshot_bytes(snaps: List[bytes]) -> None:
+    for snap in snaps:
+        decode_snapshot_bytes(snap)
+
+
+def _bench_snapshot_mask(snaps: List[bytes]) -> None:
+    mask = 0
+    for snap in snaps:
+        new_mask = snapshot_to_mask(snap)
+        mask_changes(mask, new_mask)
+        mask = new_mask
+
+
+def _legacy_on_byte_pipeline(stream: bytes) -> None:
+    """Laço original do receptor: deque + callback por byte + lista de 48 teclas."""
+
+    state = make_empty_state()
+    queue = deque()
+
+    def on_byte(b: int) -> None:
+        queue.append(b)
+        while queue:
+            val = queue.popleft()
+            if val == SNAPSHOT_MARKER:
+                if len(queue) < 6:
+                    queue.appendleft(val)
+                    return
+                snap = bytes(queue.popleft() for _ in range(6))
+                flat = decode_snapshot_bytes(snap)
+                for key_id in range(48):
+                    if state[key_id] != flat[key_id]:
+                        state[key_id] = flat[key_id]
+                continue
+            evt = decode_event_byte(val)
+            if evt is None:
+                continue
+            apply_event_to_state(state, evt[0], evt[1])
+
+    for b in stream:
+        on_byte(b)
+
+
+def _chunked_pipeline(stream: bytes, chunk_size: int) -> None:
+    """Caminho atual do receptor: blocos + consume_stream + máscara de bits."""
+
+    pending = bytearray()
+    mask = 0
+
+    def on_event(key_id: int, pressed: int) -> None:
+        nonlocal mask
+        bit = 1 << key_id
+        if bool(mask & bit) != bool(pressed):
+            mask ^= bit
+
+    def on_snapshot(snap: bytes) -> None:
+        nonlocal mask
+        new_mask = snapshot_to_mask(snap)
+        if new_mask != mask:
+            mask_changes(mask, new_mask)
+            mask = new_mask
+
+    view = memoryview(stream)
+    for offset in range(0, len(stream), chunk_size):
+        pending.extend(view[offset:offset + chunk_size])
+        consume_stream(pending, on_event, on_snapshot)
+
+
+def _stream_decoder_pipeline(stream: bytes, chunk_size: int) -> None:
+    """PianoStreamDecoder: tabelas de 256 entradas + XOR dos snapshots."""
+
+    decoder = PianoStreamDecoder()
+    feed = decoder.feed
+    view = memoryview(stream)
+    for offset in range(0, len(stream), chunk_size):
+        feed(view[offset:offset + chunk_size])
+
+
+def run(num_bytes: int = 2_000_000, repeat: int = 3) -> Dict[str, Any]:
+    stream = synthetic_stream(num_bytes)
+    snaps = _snapshots(max(1, num_bytes // (1 + SNAPSHOT_SIZE)))
+    results: Dict[str, Any] = {"bytes": num_bytes, "snapshots": len(snaps)}
+
+    seconds = timed(_bench_decode_event_byte, stream, repeat=repeat)
+    results["decode_event_byte"] = {"seconds": seconds, "bytes_per_sec": num_bytes / seconds}
+
+    seconds = timed(_bench_decode_snapshot_bytes, snaps, repeat=repeat)
+    results["decode_snapshot_bytes"] = {"seconds": seconds, "snapshots_per_sec": len(snaps) / seconds}
+
+    seconds = timed(_bench_snapshot_mask, snaps, repeat=repeat)
+    results["snapshot_to_mask+mask_changes"] = {"seconds": seconds, "snapshots_per_sec": len(snaps) / seconds}
+
+    seconds = timed(_legacy_on_byte_pipeline, stream, repeat=repeat)
+    results["pipeline_legacy_on_byte"] = {"seconds": seconds, "bytes_per_sec": num_bytes / seconds}
+
+    for chunk_size in (64, 4096):
+        seconds = timed(_chunked_pipeline, stream, chunk_size, repeat=repeat)
+        results[f"pipeline_chunked_{chunk_size}"] = {"seconds": seconds, "bytes_per_sec": num_bytes / seconds}
+        seconds = timed(_stream_decoder_pipeline, stream, chunk_size, repeat=repeat)
+        results[f"pipeline_stream_decoder_{chunk_size}"] = {"seconds": seconds, "bytes_per_sec": num_bytes / seconds}
+
+    return results
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import http.client
+import io
+import multiprocessing
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+from .common import summarize_latencies
+
+DEFAULT_ENDPOINTS = (
+    "/api/keys",
+    "/api/keys?format=mask",
+    "/api/midi",
+    "/api/players?page=1&per_page=50",
+)
+
+
+def _varlen(value: int) -> bytes:
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _midi_file(num_notes: int, seed: int) -> bytes:
+    """SMF tipo 0 com notas em sequência (120 bpm, 480 ticks/semínima)."""
+
+    track = bytearray(_varlen(0) + b"\xff\x51\x03" + (500_000).to_bytes(3, "big"))
+    for i in range(num_notes):
+        note = 36 + (i * 7 + seed) % 48
+        track += _varlen(0 if i == 0 else 120) + bytes([0x90, note, 100])
+        track += _varlen(120) + bytes([0x80, note, 0])
+    track += _varlen(0) + b"\xff\x2f\x00"
+    return (b"MThd" + struct.pack(">IHHH", 6, 0, 1, 480)
+            + b"MTrk" + struct.pack(">I", len(track)) + bytes(track))
+
+
+def _seed(app, songs: int, players: int) -> None:
+    client = app.test_client()
+    for i in range(songs):
+        client.post(
+            "/api/midi",
+            data={"name": f"Música {i}", "file": (io.BytesIO(_midi_file(400, i)), f"song{i}.mid")},
+            content_type="multipart/form-data",
+        )
+    for i in range(players):
+        client.post(
+            "/api/players",
+            json={"name": f"Jogador {i}", "songs": [{"title": f"Música {i % max(1, songs)}", "score": i * 10}]},
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(conn, storage_dir: str, songs: int, players: int, serve_mode: str, workers: int) -> None:
+    import logging
+
+    from werkzeug.serving import make_server
+
+    from src.infrastructure.adapters.web_server.prefork_server import PreforkServer
+
+    from src.infrastructure.adapters.shared_memory.key_event_ring import KeyEventRing
+    from src.infrastructure.adapters.shared_memory.key_state_block import KeyStateBlock
+    from src.infrastructure.adapters.web_server.app import create_app
+    from src.infrastructure.metrics.receiver_metrics import ReceiverMetricsBlock
+
+    key_state = KeyStateBlock.create()
+    event_ring = KeyEventRing.create()
+    metrics = ReceiverMetricsBlock.create()
+    try:
+        app = create_app(key_state, event_ring, {}, metrics, storage_dir=storage_dir)
+        _seed(app, songs, players)
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        if serve_mode == "prefork":
+            # Encerrado pelo SIGTERM do processo pai (como no ProcessManager)
+            port = _free_port()
+            conn.send(port)
+            PreforkServer(app, host="127.0.0.1", port=port, workers=workers).serve_forever()
+            return
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        conn.send(server.port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        conn.recv()  # espera o pedido de encerramento
+        server.shutdown()
+    finally:
+        key_state.close()
+        event_ring.close()
+        metrics.close()
+
+
+def _client(port: int, endpoints: Sequence[str], deadline: float,
+            latencies: Dict[str, List[int]], errors: List[int]) -> None:
+    # Cada cliente percorre os endpoints em rodízio, reconectando quando o
+    # servidor fecha a conexão (o Werkzeug fecha a cada resposta)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    local = {path: [] for path in endpoints}
+    failed = 0
+    i = 0
+    while time.monotonic() < deadline:
+        path = endpoints[i % len(endpoints)]
+        i += 1
+        started = time.perf_counter_ns()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        local[path].append(time.perf_counter_ns() - started)
+        if response.will_close:
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.close()
+    for path, values in local.items():
+        latencies[path].extend(values)
+    errors.append(failed)
+
+
+def run(clients: int = 8, duration: float = 5.0, endpoints: Sequence[str] = DEFAULT_ENDPOINTS,
+        songs: int = 20, players: int = 500, serve_mode: str = "dev", workers: int = 4) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="magic-piano-bench-") as storage_dir:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        server = multiprocessing.Process(
+            target=_serve, args=(child_conn, storage_dir, songs, players, serve_mode, workers),
+        )
+        server.start()
+        try:
+            if not parent_conn.poll(60):
+                return {"error": "servidor não iniciou"}
+            port = parent_conn.recv()
+
+            latencies: Dict[str, List[int]] = {path: [] for path in endpoints}
+            errors: List[int] = []
+            deadline = time.monotonic() + duration
+            started = time.perf_counter()
+            threads = [
+                threading.Thread(target=_client, args=(port, endpoints, deadline, latencies, errors))
+                for _ in range(clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            if serve_mode == "prefork":
+                server.terminate()
+            else:
+                parent_conn.send("stop")
+            server.join(timeout=10)
+            if server.is_alive():
+                server.terminate()
+
+    total = sum(len(values) for values in latencies.values())
+    per_endpoint = {}
+    for path, values in latencies.items():
+        summary = summarize_latencies(values)
+        summary["requests_per_sec"] = len(values) / elapsed if elapsed else 0.0
+        per_endpoint[path] = summary
+    return {
+        "serve_mode": serve_mode,
+        "workers": workers if serve_mode == "prefork" else 1,
+        "clients": clients,
+        "duration": elapsed,
+        "requests": total,
+        "errors": sum(errors),
+        "requests_per_sec": total / elapsed if elapsed else 0.0,
+        "overall": summarize_latencies(v for values in latencies.values() for v in values),
+        "endpoints": per_endpoint,
+    }
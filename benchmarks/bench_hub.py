@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+from src.application.usecases.data_receiver_multiprocess import hub_receiver_process
+from src.infrastructure.adapters.shared_memory.key_event_ring import KeyEventRing
+from src.infrastructure.adapters.shared_memory.key_state_block import KeyStateBlock
+from src.infrastructure.constants.controls_constants import CONTROL_STOP
+from src.infrastructure.metrics.receiver_metrics import EVENTS_DECODED, ReceiverMetricsBlock
+
+from .bench_receiver import _open_pty, _wait_for
+
+
+def _proc_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _proc_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        # O nome do processo pode ter espaços: os campos vêm depois do ')'
+        fields = f.read().rsplit(")", 1)[1].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / os.sysconf("SC_CLK_TCK")
+
+
+def _cpu_percent(pid: int, seconds: float) -> float:
+    before = _proc_cpu_seconds(pid)
+    time.sleep(seconds)
+    return 100.0 * (_proc_cpu_seconds(pid) - before) / seconds
+
+
+def _feed(masters: Sequence[int], rate: float, duration: float) -> int:
+    """Cada piano recebe `rate` eventos/s (aperta/solta alternados)."""
+
+    interval = 1.0 / rate
+    sent = 0
+    pressed = 0
+    deadline = time.monotonic() + duration
+    next_at = time.monotonic()
+    while time.monotonic() < deadline:
+        pressed ^= 1
+        byte = bytes([(pressed << 7) | (sent % 48)])
+        for master in masters:
+            os.write(master, byte)
+        sent += 1
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return sent
+
+
+def _run_hub(count: int, rate: float, duration: float, idle: float) -> Dict[str, Any]:
+    ptys = [_open_pty() for _ in range(count)]
+    blocks = [
+        (KeyStateBlock.create(), KeyEventRing.create(), ReceiverMetricsBlock.create())
+        for _ in range(count)
+    ]
+    instruments = [
+        (f"p{i}", [(port, 0)], 1_000_000, key_state, event_ring, metrics, None)
+        for i, ((_, _, port), (key_state, event_ring, metrics)) in enumerate(zip(ptys, blocks))
+    ]
+    control_reader, control_writer = multiprocessing.Pipe(duplex=False)
+    receiver = multiprocessing.Process(
+        target=hub_receiver_process, args=(instruments, control_reader), daemon=True,
+    )
+    try:
+        receiver.start()
+        # Mesmo cuidado do bench_receiver: reenvia até cada piano publicar
+        pending = list(range(count))
+        for _ in range(200):
+            for i in pending:
+                os.write(ptys[i][0], bytes([0x80]))
+            time.sleep(0.02)
+            pending = [i for i in pending if blocks[i][1].head() == 0]
+            if not pending:
+                break
+        if pending:
+            return {"error": f"{len(pending)} pianos não abriram"}
+
+        idle_cpu = _cpu_percent(receiver.pid, idle)
+        rss_kb = _proc_rss_kb(receiver.pid)
+
+        base = [metrics.values[EVENTS_DECODED] for _, _, metrics in blocks]
+        cpu_before = _proc_cpu_seconds(receiver.pid)
+        started = time.perf_counter()
+        sent = _feed([master for master, _, _ in ptys], rate, duration)
+        expected = [b + sent for b in base]
+        _wait_for(
+            lambda: all(m.values[EVENTS_DECODED] >= e for (_, _, m), e in zip(blocks, expected)),
+            timeout=5.0,
+        )
+        elapsed = time.perf_counter() - started
+        load_cpu = 100.0 * (_proc_cpu_seconds(receiver.pid) - cpu_before) / elapsed
+        received = sum(m.values[EVENTS_DECODED] - b for (_, _, m), b in zip(blocks, base))
+
+        shared_bytes = sum(
+            key_state.size + event_ring._shm.size + metrics._shm.size
+            for key_state, event_ring, metrics in blocks
+        )
+        return {
+            "pianos": count,
+            "receiver_rss_kb": rss_kb,
+            "shared_memory_kb": shared_bytes / 1024,
+            "idle_cpu_percent": idle_cpu,
+            "load_cpu_percent": load_cpu,
+            "events_sent": sent * count,
+            "events_received": received,
+        }
+    finally:
+        control_writer.send({"command": CONTROL_STOP})
+        receiver.join(timeout=2)
+        if receiver.is_alive():
+            receiver.terminate()
+        for master, slave, _ in ptys:
+            os.close(master)
+            os.close(slave)
+        for key_state, event_ring, metrics in blocks:
+            key_state.close()
+            event_ring.close()
+            metrics.close()
+
+
+def run(counts: Sequence[int] = (1, 4, 8, 16), rate: float = 50.0,
+        duration: float = 3.0, idle: float = 1.0) -> Dict[str, Any]:
+    """
+    Custo do modo hub por instrumento: RSS e CPU do processo receptor com N
+    pianos (ptys) ociosos e recebendo `rate` eventos/s cada. O custo por
+    piano adicionado é a inclinação entre o menor e o maior N.
+    """
+    if not os.path.exists("/proc/self/stat"):
+        return {"skipped": "requer /proc (Linux)"}
+
+    rows: List[Dict[str, Any]] = [_run_hub(count, rate, duration, idle) for count in counts]
+    valid = [row for row in rows if "error" not in row]
+    per_piano: Dict[str, float] = {}
+    if len(valid) >= 2:
+        first, last = valid[0], valid[-1]
+        added = last["pianos"] - first["pianos"]
+        for key in ("receiver_rss_kb", "shared_memory_kb", "idle_cpu_percent", "load_cpu_percent"):
+            per_piano[key] = (last[key] - first[key]) / added
+    return {"rate_per_piano": rate, "runs": rows, "per_added_piano": per_piano}
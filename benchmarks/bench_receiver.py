@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from src.application.usecases.data_receiver_multiprocess import data_receiver_process
+from src.infrastructure.adapters.shared_memory.key_event_ring import KeyEventRing
+from src.infrastructure.adapters.shared_memory.key_state_block import KeyStateBlock
+from src.infrastructure.constants.controls_constants import (
+    CONTROL_STOP,
+    RECEIVER_BAUD,
+    RECEIVER_COM,
+    RECEIVER_REALTIME,
+)
+from src.infrastructure.metrics.receiver_metrics import BYTES_READ, ReceiverMetricsBlock
+from src.infrastructure.services.realtime import default_realtime_cpu
+
+from .common import summarize_latencies, synthetic_stream
+
+
+def _open_pty():
+    """Par mestre/escravo em modo raw; o receptor abre o escravo como se fosse a serial."""
+
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+def _wait_for(predicate, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.0005)
+    return False
+
+
+def _measure_throughput(master: int, metrics, num_bytes: int) -> Dict[str, Any]:
+    stream = synthetic_stream(num_bytes)
+    base = metrics.values[BYTES_READ]
+
+    def writer():
+        view = memoryview(stream)
+        offset = 0
+        while offset < len(view):
+            offset += os.write(master, view[offset:offset + 4096])
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    completed = _wait_for(lambda: metrics.values[BYTES_READ] - base >= num_bytes, timeout=120)
+    elapsed = time.perf_counter() - started
+    thread.join(timeout=1)
+    received = metrics.values[BYTES_READ] - base
+    return {
+        "bytes": num_bytes,
+        "received": received,
+        "completed": completed,
+        "seconds": elapsed,
+        "bytes_per_sec": received / elapsed if elapsed else 0.0,
+    }
+
+
+def _measure_latency(master: int, event_ring, samples: int, interval: float) -> Dict[str, Any]:
+    """Tempo entre o write() no mestre e o evento aparecer no anel compartilhado."""
+
+    latencies = []
+    pressed = 0
+    for i in range(samples):
+        head = event_ring.head()
+        pressed ^= 1
+        written_ns = time.monotonic_ns()
+        os.write(master, bytes([(pressed << 7) | 7]))
+        while event_ring.head() == head:
+            if time.monotonic_ns() - written_ns > 1_000_000_000:
+                break
+        else:
+            latencies.append(time.monotonic_ns() - written_ns)
+        time.sleep(interval)
+    return summarize_latencies(latencies)
+
+
+def run(num_bytes: int = 2_000_000, latency_samples: int = 2000,
+        interval: float = 0.001, baud: int = 1_000_000, realtime: bool = False) -> Dict[str, Any]:
+    """
+    Com `realtime`, repete a medição com o receptor em modo tempo real
+    (ver RealtimeMode) para comparar as latências em "realtime".
+    """
+    if os.name != "posix":
+        return {"skipped": "requer pseudo-terminal (POSIX)"}
+
+    result = _run_receiver(num_bytes, latency_samples, interval, baud, None)
+    if realtime and "error" not in result:
+        options = {"cpu": default_realtime_cpu(), "fifo_priority": 0}
+        result["realtime"] = _run_receiver(num_bytes, latency_samples, interval, baud, options)
+    return result
+
+
+def _run_receiver(num_bytes: int, latency_samples: int, interval: float, baud: int,
+                  realtime_options) -> Dict[str, Any]:
+    master, slave, port = _open_pty()
+    key_state = KeyStateBlock.create()
+    event_ring = KeyEventRing.create()
+    metrics = ReceiverMetricsBlock.create()
+    controls = {RECEIVER_COM: port, RECEIVER_BAUD: baud, RECEIVER_REALTIME: realtime_options}
+    control_reader, control_writer = multiprocessing.Pipe(duplex=False)
+    receiver = multiprocessing.Process(
+        target=data_receiver_process,
+        args=(controls, key_state, event_ring, metrics, control_reader),
+        daemon=True,
+    )
+    try:
+        receiver.start()
+        # Espera o receptor abrir a porta: o pyserial descarta o que chegou
+        # antes da abertura, então o evento é reenviado até aparecer no anel.
+        opened = False
+        for _ in range(200):
+            os.write(master, bytes([0x80]))
+            if _wait_for(lambda: event_ring.head() > 0, timeout=0.05):
+                opened = True
+                break
+        if not opened:
+            return {"error": f"receptor não abriu {port}"}
+        return {
+            "port": port,
+            "throughput": _measure_throughput(master, metrics, num_bytes),
+            "latency": _measure_latency(master, event_ring, latency_samples, interval),
+        }
+    finally:
+        control_writer.send({"command": CONTROL_STOP})
+        receiver.join(timeout=2)
+        if receiver.is_alive():
+            receiver.terminate()
+        os.close(master)
+        os.close(slave)
+        key_state.close()
+        event_ring.close()
+        metrics.close()
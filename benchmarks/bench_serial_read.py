@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+import select
+import threading
+import time
+from typing import Any, Dict, Sequence
+
+from src.infrastructure.adapters.serial.piano_decoder import PianoStreamDecoder
+
+from .bench_receiver import _open_pty
+from .common import synthetic_stream
+
+
+def _read_over_pty(stream: bytes, chunk_size: int) -> float:
+    """
+    Lê `stream` de um pty como o receive_loop faz com o PySerial: um select
+    seguido de um read por chamada. chunk_size=1 é o modo legado (read(1) por
+    byte); maior que 1, o modo em blocos (drena até chunk_size por read). O
+    decode é o mesmo nos dois casos, então a diferença é só o caminho de
+    leitura (chamadas de sistema por byte).
+    """
+
+    master, slave, _ = _open_pty()
+    decoder = PianoStreamDecoder()
+    total = len(stream)
+
+    def writer():
+        view = memoryview(stream)
+        offset = 0
+        while offset < total:
+            offset += os.write(master, view[offset:offset + 4096])
+
+    thread = threading.Thread(target=writer, daemon=True)
+    received = 0
+    started = time.perf_counter()
+    thread.start()
+    try:
+        while received < total:
+            ready, _, _ = select.select([slave], [], [], 1.0)
+            if not ready:
+                break
+            data = os.read(slave, chunk_size)
+            received += len(data)
+            decoder.feed(data)
+        elapsed = time.perf_counter() - started
+    finally:
+        thread.join(timeout=1)
+        os.close(master)
+        os.close(slave)
+    return elapsed
+
+
+def run(num_bytes: int = 2_000_000, chunk_sizes: Sequence[int] = (1, 64, 4096)) -> Dict[str, Any]:
+    """Vazão da leitura byte a byte vs. em blocos num pty (POSIX)."""
+
+    if os.name != "posix":
+        return {"skipped": "requer pty (POSIX)"}
+    stream = synthetic_stream(num_bytes)
+    results: Dict[str, Any] = {"bytes": num_bytes}
+    for chunk_size in chunk_sizes:
+        seconds = _read_over_pty(stream, chunk_size)
+        name = "read_byte_at_a_time" if chunk_size == 1 else f"read_chunked_{chunk_size}"
+        results[name] = {"seconds": seconds, "bytes_per_sec": num_bytes / seconds}
+    baseline = results.get("read_byte_at_a_time")
+    if baseline:
+        for name, value in results.items():
+            if isinstance(value, dict):
+                value["speedup"] = baseline["seconds"] / value["seconds"]
+    return results
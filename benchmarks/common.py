@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SNAPSHOT_MARKER = 0x7F
+
+
+def synthetic_stream(num_bytes: int, snapshot_every: int = 64, seed: int = 1) -> bytes:
+    """
+    Fluxo no formato do firmware: eventos de 1 byte (tecla 0..47, bit7 =
+    pressionada) intercalados com snapshots 0x7F + 6 bytes coerentes com o
+    estado corrente, como o Mega envia a cada mudança/500 ms. As teclas 32 e
+    33 (PE0/PE1, RX0/TX0) ficam de fora, como no firmware.
+    """
+
+    rng = random.Random(seed)
+    keys = [key_id for key_id in range(48) if key_id not in (32, 33)]
+    out = bytearray()
+    mask = 0
+    events = 0
+    while len(out) < num_bytes:
+        key_id = rng.choice(keys)
+        bit = 1 << key_id
+        mask ^= bit
+        pressed = 1 if mask & bit else 0
+        out.append((pressed << 7) | key_id)
+        events += 1
+        if snapshot_every and events % snapshot_every == 0:
+            out.append(SNAPSHOT_MARKER)
+            out += mask.to_bytes(6, "little")
+    return bytes(out[:num_bytes])
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_latencies(values_ns: Iterable[int]) -> Dict[str, float]:
+    """Resumo em microssegundos."""
+
+    ordered = sorted(values_ns)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_us": sum(ordered) / len(ordered) / 1000,
+        "p50_us": percentile(ordered, 50) / 1000,
+        "p90_us": percentile(ordered, 90) / 1000,
+        "p99_us": percentile(ordered, 99) / 1000,
+        "max_us": ordered[-1] / 1000,
+    }
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    """Melhor tempo (s) de `repeat` execuções."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": _git_revision(),
+    }
+
+
+def write_results(results: Dict[str, Any], output: Optional[Path] = None) -> Path:
+    """Grava os resultados em JSON (um arquivo por execução) e devolve o caminho."""
+
+    started = datetime.now(timezone.utc)
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"bench-{started:%Y%m%dT%H%M%SZ}.json"
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "created_at": started.isoformat(),
+        "environment": environment_info(),
+        "results": results,
+    }
+    output.write_text(json.dumps(document, indent=2, ensure_ascii=False), encoding="utf-8")
+    return output
+
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    print(f"\n== {title}")
+    for row in rows:
+        items = ", ".join(
+            f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in row.items()
+        )
+        print(f"  {items}")
@@ -0,0 +1,131 @@
+"""
+Executa os benchmarks e grava os resultados em JSON.
+
+    python -m benchmarks.run                      # todas as suítes
+    python -m benchmarks.run --suite decoder --bytes 5000000
+    python -m benchmarks.run --suite serial_read
+    python -m benchmarks.run --suite http --clients 16 --duration 10
+    python -m benchmarks.run --suite hub --pianos 1 4 8 16
+    python -m benchmarks.run --suite receiver --realtime
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import bench_decoder, bench_http, bench_hub, bench_receiver, bench_serial_read
+from .common import print_table, write_results
+
+SUITES = ("decoder", "serial_read", "receiver", "http", "hub")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks do Magic Piano")
+    parser.add_argument("--suite", choices=SUITES, action="append",
+                        help="Suíte a executar (pode repetir; padrão: todas)")
+    parser.add_argument("--bytes", type=int, default=2_000_000,
+                        help="Bytes sintéticos para decoder/receptor")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetições dos microbenchmarks (vale o melhor tempo)")
+    parser.add_argument("--latency-samples", type=int, default=2000,
+                        help="Eventos isolados para medir a latência do receptor")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Na suíte receiver, mede também o receptor em modo tempo real")
+    parser.add_argument("--clients", type=int, default=8,
+                        help="Clientes HTTP concorrentes")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="Duração (s) da carga HTTP")
+    parser.add_argument("--serve-mode", choices=("dev", "prefork"), default="dev",
+                        help="Servidor usado na carga HTTP")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Workers do modo prefork")
+    parser.add_argument("--pianos", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="Quantidades de pianos medidas na suíte hub")
+    parser.add_argument("--event-rate", type=float, default=50.0,
+                        help="Eventos/s por piano na suíte hub")
+    parser.add_argument("--output", type=Path,
+                        help="Arquivo JSON de saída (padrão: benchmarks/results/)")
+    return parser.parse_args(argv)
+
+
+def _print_summary(results: Dict[str, Any]) -> None:
+    decoder = results.get("decoder")
+    if decoder:
+        rows = [
+            {"caso": name, **{k: v for k, v in value.items() if k.endswith("_per_sec")}}
+            for name, value in decoder.items() if isinstance(value, dict)
+        ]
+        print_table("decoder", rows)
+
+    serial_read = results.get("serial_read")
+    if serial_read and "skipped" not in serial_read:
+        rows = [
+            {"caso": name, "bytes_per_sec": value["bytes_per_sec"], "speedup": value["speedup"]}
+            for name, value in serial_read.items() if isinstance(value, dict)
+        ]
+        print_table("leitura serial (pty)", rows)
+
+    receiver = results.get("receiver")
+    if receiver and "throughput" in receiver:
+        rows = [
+            {"caso": "throughput", "bytes_per_sec": receiver["throughput"]["bytes_per_sec"]},
+            {"caso": "latência", **receiver["latency"]},
+        ]
+        realtime = receiver.get("realtime")
+        if realtime and "throughput" in realtime:
+            rows += [
+                {"caso": "throughput (tempo real)",
+                 "bytes_per_sec": realtime["throughput"]["bytes_per_sec"]},
+                {"caso": "latência (tempo real)", **realtime["latency"]},
+            ]
+        print_table("receptor", rows)
+
+    http = results.get("http")
+    if http and "endpoints" in http:
+        rows = [
+            {"endpoint": path, "rps": value["requests_per_sec"],
+             "p50_us": value.get("p50_us", 0.0), "p99_us": value.get("p99_us", 0.0)}
+            for path, value in http["endpoints"].items()
+        ]
+        rows.append({"endpoint": "total", "rps": http["requests_per_sec"], "erros": http["errors"]})
+        print_table(f"http {http['serve_mode']} ({http['clients']} clientes)", rows)
+
+    hub = results.get("hub")
+    if hub and "runs" in hub:
+        rows = [row for row in hub["runs"] if "error" not in row]
+        if hub["per_added_piano"]:
+            rows.append({"pianos": "+1", **hub["per_added_piano"]})
+        print_table(f"hub ({hub['rate_per_piano']:.0f} eventos/s por piano)", rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    suites = args.suite or list(SUITES)
+    results: Dict[str, Any] = {"parameters": {k: str(v) for k, v in vars(args).items()}}
+
+    if "decoder" in suites:
+        results["decoder"] = bench_decoder.run(args.bytes, repeat=args.repeat)
+    if "serial_read" in suites:
+        results["serial_read"] = bench_serial_read.run(args.bytes)
+    if "receiver" in suites:
+        results["receiver"] = bench_receiver.run(
+            args.bytes, latency_samples=args.latency_samples, realtime=args.realtime
+        )
+    if "http" in suites:
+        results["http"] = bench_http.run(
+            clients=args.clients, duration=args.duration,
+            serve_mode=args.serve_mode, workers=args.workers,
+        )
+    if "hub" in suites:
+        results["hub"] = bench_hub.run(args.pianos, rate=args.event_rate, duration=args.duration)
+
+    _print_summary(results)
+    output = write_results(results, args.output)
+    print(f"\nResultados gravados em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
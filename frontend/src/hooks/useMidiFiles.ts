@@ -1,5 +1,6 @@
 import { useQuery } from "@tanstack/react-query";
 import { BACKEND_URL } from "@/config/backend";
+import { MidiNote } from "@/types/midi";
 
 export interface MidiFile {
   name: string;
@@ -33,3 +34,25 @@ export const fetchMidiFile = async (url: string, displayName?: string): Promise<
   const name = displayName?.trim() || filename;
   return new File([blob], name, { type: "audio/midi" });
 };
+
+export interface MidiNotesWindow {
+  from?: number;
+  to?: number;
+}
+
+// Notas já processadas pelo backend (tabela gerada no upload). Aceita uma
+// janela de tempo para carregar músicas longas em partes.
+export const fetchMidiNotes = async (
+  filename: string,
+  window: MidiNotesWindow = {}
+): Promise<MidiNote[]> => {
+  const params = new URLSearchParams();
+  if (window.from !== undefined) params.set("from", String(window.from));
+  if (window.to !== undefined) params.set("to", String(window.to));
+  const query = params.toString();
+  const url = `${BACKEND_URL}/api/midi/${encodeURIComponent(filename)}/notes${query ? `?${query}` : ""}`;
+  const response = await fetch(url);
+  if (!response.ok) throw new Error("Failed to fetch MIDI notes");
+  const data = await response.json();
+  return (data.notes || []) as MidiNote[];
+};
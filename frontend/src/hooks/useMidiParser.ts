@@ -35,6 +35,13 @@ export const useMidiParser = () => {
     }
   }, []);
 
+  const loadNotes = useCallback((loadedNotes: MidiNote[], name: string) => {
+    const sorted = [...loadedNotes].sort((a, b) => a.time - b.time);
+    setNotes(sorted);
+    setFileName(name);
+    return sorted;
+  }, []);
+
   const clearMidi = useCallback(() => {
     setNotes([]);
     setFileName("");
@@ -44,6 +51,7 @@ export const useMidiParser = () => {
     notes,
     fileName,
     parseMidiFile,
+    loadNotes,
     clearMidi,
   };
 };
@@ -1,17 +1,50 @@
-import { useQuery } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
 import { KeyState } from "@/types/midi";
 import { BACKEND_URL } from "@/config/backend";
 
+interface KeyStreamMessage {
+  seq: number;
+  keys: KeyState[];
+}
+
 export const usePianoKeys = (enabled: boolean = true) => {
-  return useQuery<KeyState[]>({
-    queryKey: ["pianoKeys"],
-    queryFn: async () => {
-      const response = await fetch(`${BACKEND_URL}/api/keys`);
-      if (!response.ok) throw new Error("Failed to fetch keys");
-      const data = await response.json();
-      return data.keys;
-    },
-    refetchInterval: enabled ? 50 : false,
-    enabled,
-  });
+  const [keys, setKeys] = useState<KeyState[]>([]);
+  const [isError, setIsError] = useState(false);
+
+  useEffect(() => {
+    if (!enabled) return;
+
+    // Server-Sent Events: snapshot completo na conexão (e periodicamente),
+    // depois apenas as teclas que mudaram.
+    const source = new EventSource(`${BACKEND_URL}/api/keys/stream`);
+    let current: KeyState[] = [];
+
+    const handleSnapshot = (event: MessageEvent) => {
+      const data: KeyStreamMessage = JSON.parse(event.data);
+      current = data.keys;
+      setKeys(current);
+      setIsError(false);
+    };
+
+    const handleDelta = (event: MessageEvent) => {
+      const data: KeyStreamMessage = JSON.parse(event.data);
+      const next = current.slice();
+      data.keys.forEach((key) => {
+        next[key.id] = key;
+      });
+      current = next;
+      setKeys(current);
+    };
+
+    source.addEventListener("snapshot", handleSnapshot);
+    source.addEventListener("delta", handleDelta);
+    // O EventSource reconecta sozinho; ao reconectar recebe um novo snapshot.
+    source.onerror = () => setIsError(true);
+
+    return () => {
+      source.close();
+    };
+  }, [enabled]);
+
+  return { data: keys, isError };
 };
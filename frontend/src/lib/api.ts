@@ -3,6 +3,8 @@ import { BACKEND_URL } from "@/config/backend";
 export interface PlayerSong {
   title: string;
   score: number;
+  /** Sessão de pontuação do backend; quando presente, o servidor define o score. */
+  session?: string;
 }
 
 export interface CreatePlayerRequest {
@@ -101,3 +103,77 @@ export const listPlayers = async (
 
   return response.json();
 };
+
+export interface ScoreNoteResult {
+  index: number;
+  key: number;
+  midi: number;
+  time: number;
+  result: "hit" | "miss";
+  offset_ms: number | null;
+}
+
+export interface ScoreSessionState {
+  id: string;
+  title: string;
+  running: boolean;
+  position: number;
+  score: number;
+  combo: number;
+  max_combo: number;
+  hits: number;
+  misses: number;
+  total: number;
+  finished: boolean;
+  results: ScoreNoteResult[];
+  results_cursor: number;
+}
+
+interface ScoreSessionResponse {
+  session: ScoreSessionState;
+}
+
+const postScoreSession = async (
+  path: string,
+  body: unknown
+): Promise<ScoreSessionState> => {
+  const response = await fetch(`${BACKEND_URL}${path}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(body),
+  });
+
+  if (!response.ok) {
+    throw new ApiError("Não foi possível atualizar a sessão de pontuação.", response.status);
+  }
+
+  const data: ScoreSessionResponse = await response.json();
+  return data.session;
+};
+
+export const createScoreSession = (filename: string, title?: string) =>
+  postScoreSession("/api/score/sessions", { filename, title });
+
+export const startScoreSession = (sessionId: string, position: number) =>
+  postScoreSession(`/api/score/sessions/${sessionId}/start`, { position });
+
+export const pauseScoreSession = (sessionId: string) =>
+  postScoreSession(`/api/score/sessions/${sessionId}/pause`, {});
+
+export const getScoreSession = async (
+  sessionId: string,
+  since: number = 0
+): Promise<ScoreSessionState> => {
+  const response = await fetch(
+    `${BACKEND_URL}/api/score/sessions/${sessionId}?since=${since}`
+  );
+
+  if (!response.ok) {
+    throw new ApiError("Não foi possível carregar a sessão de pontuação.", response.status);
+  }
+
+  const data: ScoreSessionResponse = await response.json();
+  return data.session;
+};
@@ -1,4 +1,4 @@
-import { useState, useCallback, useEffect, useMemo } from "react";
+import { useState, useCallback, useEffect, useMemo, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { Piano } from "@/components/Piano/Piano";
 import { FallingNotes } from "@/components/MidiPlayer/FallingNotes";
@@ -6,7 +6,7 @@ import { GameController } from "@/components/MidiPlayer/GameController";
 import { usePianoKeys } from "@/hooks/usePianoKeys";
 import { useMidiParser } from "@/hooks/useMidiParser";
 import { useMidiAudio } from "@/hooks/useMidiAudio";
-import { fetchMidiFile } from "@/hooks/useMidiFiles";
+import { fetchMidiFile, fetchMidiNotes } from "@/hooks/useMidiFiles";
 import { GameNote } from "@/types/midi";
 import { toast } from "sonner";
 import { Alert, AlertDescription } from "@/components/ui/alert";
@@ -31,13 +31,19 @@ import {
   DialogHeader,
   DialogTitle,
 } from "@/components/ui/dialog";
-import { createPlayer } from "@/lib/api";
+import {
+  createPlayer,
+  createScoreSession,
+  getScoreSession,
+  pauseScoreSession,
+  startScoreSession,
+} from "@/lib/api";
 import { BACKEND_URL } from "@/config/backend";
 
 const Game = () => {
   const navigate = useNavigate();
   const { data: keys = [], isError } = usePianoKeys();
-  const { notes, fileName, parseMidiFile, clearMidi } = useMidiParser();
+  const { notes, fileName, parseMidiFile, loadNotes, clearMidi } = useMidiParser();
   const { loadNotes: loadAudioNotes, playFrom, pause, stop } = useMidiAudio();
   const [playerName, setPlayerName] = useState("");
   const [isLoadingMidi, setIsLoadingMidi] = useState(true);
@@ -52,6 +58,10 @@ const Game = () => {
   const [isSavingPlayer, setIsSavingPlayer] = useState(false);
   const [songTitle, setSongTitle] = useState("");
   const [gameSessionId, setGameSessionId] = useState(0);
+  const [midiFilename, setMidiFilename] = useState("");
+  // Sessão de pontuação no backend (julgamento com timestamps da serial).
+  // Se não estiver disponível, o placar local do GameController é usado.
+  const scoreSessionRef = useRef<string | null>(null);
 
   const displayedSongTitle = songTitle || fileName || "Música";
 
@@ -69,14 +79,25 @@ const Game = () => {
 
       setPlayerName(storedName);
       setSongTitle(storedMidiLabel ?? "");
+      setMidiFilename(storedMidi);
 
       try {
-        const midiUrl = `/api/midi/${storedMidi}`;
-        const file = await fetchMidiFile(midiUrl, storedMidiLabel ?? undefined);
-        if (!storedMidiLabel) {
-          setSongTitle(file.name);
+        try {
+          // Tabela de notas pré-processada no backend (sem reinterpretar o .mid)
+          const serverNotes = await fetchMidiNotes(storedMidi);
+          loadNotes(serverNotes, storedMidiLabel || storedMidi);
+          if (!storedMidiLabel) {
+            setSongTitle(storedMidi);
+          }
+        } catch (notesError) {
+          console.warn("Tabela de notas indisponível; lendo o arquivo MIDI.", notesError);
+          const midiUrl = `/api/midi/${storedMidi}`;
+          const file = await fetchMidiFile(midiUrl, storedMidiLabel ?? undefined);
+          if (!storedMidiLabel) {
+            setSongTitle(file.name);
+          }
+          await parseMidiFile(file);
         }
-        await parseMidiFile(file);
         setIsLoadingMidi(false);
       } catch (error) {
         console.error("Error loading MIDI:", error);
@@ -86,7 +107,7 @@ const Game = () => {
     };
 
     loadMidi();
-  }, [navigate, parseMidiFile]);
+  }, [navigate, parseMidiFile, loadNotes]);
 
   useEffect(() => {
     if (notes.length > 0) {
@@ -101,6 +122,52 @@ const Game = () => {
     };
   }, [stop]);
 
+  const openScoreSession = useCallback(async () => {
+    scoreSessionRef.current = null;
+    if (!midiFilename) {
+      return;
+    }
+
+    try {
+      const session = await createScoreSession(midiFilename, songTitle || undefined);
+      scoreSessionRef.current = session.id;
+    } catch (error) {
+      console.warn("Sessão de pontuação indisponível; usando placar local.", error);
+    }
+  }, [midiFilename, songTitle]);
+
+  useEffect(() => {
+    openScoreSession();
+  }, [openScoreSession, gameSessionId]);
+
+  const handlePlay = useCallback(
+    async (startTime: number) => {
+      await playFrom(startTime);
+      const sessionId = scoreSessionRef.current;
+      if (sessionId) {
+        startScoreSession(sessionId, startTime).catch((error) =>
+          console.warn("Falha ao iniciar sessão de pontuação", error)
+        );
+      }
+    },
+    [playFrom]
+  );
+
+  const handlePause = useCallback(() => {
+    pause();
+    const sessionId = scoreSessionRef.current;
+    if (sessionId) {
+      pauseScoreSession(sessionId).catch((error) =>
+        console.warn("Falha ao pausar sessão de pontuação", error)
+      );
+    }
+  }, [pause]);
+
+  const handleReset = useCallback(() => {
+    stop();
+    openScoreSession();
+  }, [openScoreSession, stop]);
+
   const totalDuration = useMemo(() => {
     if (notes.length === 0) {
       return 0;
@@ -150,6 +217,17 @@ const Game = () => {
       setIsSavingPlayer(true);
 
       const title = songTitle || fileName || "Música desconhecida";
+      const sessionId = scoreSessionRef.current;
+
+      try {
+        if (sessionId) {
+          const session = await getScoreSession(sessionId);
+          setFinalScore(session.score);
+          setFinalMaxCombo(session.max_combo);
+        }
+      } catch (error) {
+        console.warn("Falha ao consultar sessão de pontuação", error);
+      }
 
       try {
         await createPlayer({
@@ -158,6 +236,7 @@ const Game = () => {
             {
               title,
               score: finalScoreValue,
+              ...(sessionId ? { session: sessionId } : {}),
             },
           ],
         });
@@ -292,9 +371,9 @@ const Game = () => {
               pressedKeys={keys}
               onGameStateChange={handleGameStateChange}
               onScoreChange={handleScoreChange}
-              onPlay={playFrom}
-              onPause={pause}
-              onReset={stop}
+              onPlay={handlePlay}
+              onPause={handlePause}
+              onReset={handleReset}
               onSongComplete={handleSongComplete}
             />
           )}
@@ -92,6 +92,10 @@ static void handle_serial_commands() {
       }
     } else if (incoming == '?' || incoming == 'm' || incoming == 'M') {
       print_mapping_table();
+    } else if ((incoming == 's' || incoming == 'S') && !debug_text) {
+      // Snapshot sob demanda: o host pede ao reabrir a porta
+      send_snapshot(prev_state);
+      last_snapshot_ms = millis();
     }
   }
 }
@@ -1,109 +1,347 @@
-from collections import deque
+import sys
+import time
 
+from src.application.usecases.gesture_detector import GestureDetector
 from src.infrastructure.constants.controls_constants import (
+    CONTROL_SET_BAUD,
+    CONTROL_SET_PORTS,
+    CONTROL_STOP,
     RECEIVER_BAUD,
+    RECEIVER_CAPTURE,
     RECEIVER_COM,
-    RECEIVER_STOP,
+    RECEIVER_GESTURES,
+    RECEIVER_JITTER,
+    RECEIVER_PORTS,
+    RECEIVER_REALTIME,
 )
 from src.infrastructure.logging.Logger import Logger
+from src.infrastructure.metrics.jitter import JitterRecorder
+from src.infrastructure.metrics.receiver_metrics import (
+    BOUNCE_FILTERED,
+    BYTES_READ,
+    CHUNKS_READ,
+    DECODE_ERRORS,
+    EVENTS_DECODED,
+    RESYNCS,
+    SNAPSHOTS,
+)
+from src.infrastructure.adapters.serial.hotplug import HotplugRecovery
 from src.infrastructure.adapters.serial.serial_communicator import SerialCommunicator
+from src.infrastructure.adapters.serial.serial_multiplexer import SerialMultiplexer
 from src.infrastructure.adapters.serial.piano_decoder import (
-    SNAPSHOT_MARKER,
-    make_empty_state,
-    decode_event_byte,
-    apply_event_to_state,
-    decode_snapshot_bytes,
-    key_to_port_bit,
+    BOARD_MASK,
+    PianoStreamDecoder,
 )
+from src.infrastructure.services.realtime import RealtimeMode
+
+
+def _capture_path_for(capture_path, index: int, total: int):
+    # Uma captura por placa: a primeira usa o nome pedido, as demais ganham sufixo
+    if not capture_path or total == 1 or index == 0:
+        return capture_path
+    return f"{capture_path}.{index}"
+
+
+def _open_boards(boards, baud, capture_path, logger):
+    comms = []
+    for index, (port, _) in enumerate(boards):
+        comm = SerialCommunicator(
+            com_port=port,
+            baud_rate=baud,
+            open_for_receive=True,
+            logger=logger,
+            capture_path=_capture_path_for(capture_path, index, len(boards)),
+        )
+        comms.append(comm)
+
+    if not all(comm.is_open() for comm in comms):
+        logger.error("Não foi possível abrir a(s) porta(s) para recepção.")
+        for comm in comms:
+            comm.close()
+        return []
+    return comms
+
+
+class PianoReceiver:
+    """
+    Decoder de um instrumento: recebe os blocos de cada placa e publica os
+    eventos no anel e no estado compartilhados do instrumento. Vários
+    receptores podem dividir a mesma thread/multiplexador (modo hub).
+    Com `gesture_ring`, as mudanças seguem para um GestureDetector depois de
+    publicadas, fora do caminho das teclas. Com `jitter`, cada bloco registra
+    o intervalo desde o anterior e o tempo até a publicação.
+    """
+
+    def __init__(self, key_state, event_ring, metrics, logger: Logger, name: str = "",
+                 gesture_ring=None, gesture_options=None, jitter=None) -> None:
+        self.key_state = key_state
+        self.event_ring = event_ring
+        self.metrics = metrics
+        self.logger = logger
+        self.name = name
+        self.jitter = jitter
+        key_state.open_writer()
+        event_ring.open_writer()
+        self.gestures = None
+        if gesture_ring is not None:
+            gesture_ring.open_writer()
+            self.gestures = GestureDetector(gesture_ring, key_state.num_keys, **(gesture_options or {}))
+
+    def attach(self, multiplexer) -> None:
+        """Registra no multiplexador os prazos do detector de gestos."""
+        if self.gestures is not None:
+            multiplexer.add_timer(self.gestures.next_deadline, self.gestures.poll)
+
+    def board_reader(self, offset: int):
+        """
+        Decoder de uma placa. Eventos e snapshots chegam com ids 0..47 e são
+        deslocados para o espaço global; como todas as placas são lidas nesta
+        mesma thread, o anel e a sequência do estado têm uma ordem global única.
+        """
+
+        key_state = self.key_state
+        event_ring = self.event_ring
+        metrics = self.metrics
+        logger = self.logger
+        label = f"{self.name} +{offset}" if self.name else f"+{offset}"
+        # Contadores em memória compartilhada: cada atualização é um `+=` local
+        counters = metrics.values
+        gestures = self.gestures
+        record_jitter = self.jitter.record if self.jitter is not None else None
+        # Lista de mudanças reaproveitada: tudo que a consome (anel, estado,
+        # gestos) termina antes do próximo bloco.
+        changes = []
+
+        # Teclas da placa que cabem no estado configurado. O decoder parte do
+        # que já está publicado no bloco compartilhado (o processo pode ter
+        # sido reiniciado) e guarda o estado da placa como 6 bytes A..F.
+        board_mask = BOARD_MASK & ((1 << max(0, key_state.num_keys - offset)) - 1)
+        _, published = key_state.snapshot_mask()
+        decoder = PianoStreamDecoder(offset, board_mask, published >> offset)
+        # Um snapshot cortado no fim do bloco fica no decoder até o próximo
+        # bloco chegar; os contadores do decoder são acumulados e viram
+        # métricas pela diferença a cada bloco.
+        seen = [0] * 6
+
+        def on_chunk(chunk):
+            # Instante (monotonic_ns) em que o bloco foi lido da serial; todos
+            # os eventos decodificados dele recebem esse timestamp.
+            read_ns = time.monotonic_ns()
+            counters[BYTES_READ] += len(chunk)
+            counters[CHUNKS_READ] += 1
+            changes.clear()
+            decoder.feed_into(chunk, changes)
+
+            totals = (
+                decoder.events,
+                decoder.bounces,
+                decoder.snapshots,
+                decoder.invalid + decoder.out_of_range + decoder.rejected_snapshots,
+                decoder.resyncs,
+                decoder.snapshot_changes,
+            )
+            if totals != tuple(seen):
+                counters[EVENTS_DECODED] += totals[0] - seen[0]
+                counters[BOUNCE_FILTERED] += totals[1] - seen[1]
+                counters[SNAPSHOTS] += totals[2] - seen[2]
+                counters[DECODE_ERRORS] += totals[3] - seen[3]
+                counters[RESYNCS] += totals[4] - seen[4]
+                if totals[5] != seen[5]:
+                    # Log apenas de snapshots com diferenças, para não poluir
+                    hex_str = " ".join(f"{b:02X}" for b in decoder.last_snapshot)
+                    logger.info(
+                        f"SNAPSHOT {label} A..F = {hex_str} | changes={totals[5] - seen[5]}",
+                        kind="snapshot",
+                    )
+                seen[:] = totals
+
+            if changes:
+                # Primeiro o anel, depois o estado: quem vê a sequência N no
+                # estado já encontra os eventos até N no anel.
+                event_ring.extend(changes, read_ns)
+                key_state.update(changes)
+                metrics.observe_publish_latency(time.monotonic_ns() - read_ns)
+                if gestures is not None:
+                    gestures.on_changes(changes, read_ns)
+            if record_jitter is not None:
+                record_jitter(read_ns, time.monotonic_ns())
 
+        return on_chunk
 
-def data_receiver_process(shared_controls, frames_dict):
+    def track(self, recovery: HotplugRecovery, comm, offset: int) -> None:
+        """Reconexão da placa: ao voltar, recebe um decoder novo."""
+        recovery.track(comm, lambda: self.board_reader(offset), self.metrics)
+
+
+def _enter_realtime(options, comms, logger):
+    """Ativa o RealtimeMode (opções de RECEIVER_REALTIME) e os buffers de leitura."""
+    if options is None:
+        return None
+    mode = RealtimeMode(options.get("cpu"), options.get("fifo_priority", 0), logger=logger)
+    for comm in comms:
+        comm.use_read_buffer()
+    applied = mode.enter()
+    logger.info(
+        f"Modo tempo real: CPU {applied['cpu'] if applied['cpu'] is not None else 'livre'}, "
+        f"{applied['policy']}, nice {applied['nice']}, GC {applied['gc']}"
+    )
+    return mode
+
+
+def _log_jitter(receiver, logger) -> None:
+    if receiver.jitter is None:
+        return
+    prefix = f"[{receiver.name}] " if receiver.name else ""
+    for line in receiver.jitter.format_report():
+        logger.info(f"{prefix}Jitter {line}")
+
+
+def data_receiver_process(shared_controls, key_state, event_ring, metrics, control=None,
+                          gesture_ring=None):
+    """
+    Processo receptor. Com `control` (ponta de leitura do canal criado pelo
+    ProcessManager) os comandos stop/set_ports/set_baud chegam pelo mesmo
+    select que espera a serial; sem ele, só um sinal encerra a recepção.
+    shared_controls é a configuração inicial (uma cópia, só lida). Com
+    `gesture_ring`, acordes/holds/repetições/solturas são publicados nele
+    (janelas em RECEIVER_GESTURES). RECEIVER_REALTIME (opções do
+    RealtimeMode) liga o modo tempo real; RECEIVER_JITTER, o relatório de
+    jitter na saída. Uma placa desconectada é reaberta pelo HotplugRecovery
+    assim que o dispositivo reaparece, sem encerrar o processo.
+    """
     logger = Logger("SerialReceiver", verbose=True)
-    current_com = shared_controls.get(RECEIVER_COM)
     baud = shared_controls.get(RECEIVER_BAUD, 115_200)
+    # Lista de (porta, deslocamento); sem ela, uma única placa em RECEIVER_COM
+    boards = shared_controls.get(RECEIVER_PORTS) or [(shared_controls.get(RECEIVER_COM), 0)]
+    capture_path = shared_controls.get(RECEIVER_CAPTURE)
 
-    comm = SerialCommunicator(
-        com_port=current_com,
-        baud_rate=baud,
-        open_for_receive=True,
-        logger=logger
+    comms = _open_boards(boards, baud, capture_path, logger)
+    if not comms:
+        # Sem porta aberta não há o que receber nem o que o hotplug
+        # acompanhar: sai com erro para o processo principal encerrar.
+        sys.exit(1)
+
+    receiver = PianoReceiver(
+        key_state, event_ring, metrics, logger,
+        gesture_ring=gesture_ring, gesture_options=shared_controls.get(RECEIVER_GESTURES),
+        jitter=JitterRecorder() if shared_controls.get(RECEIVER_JITTER) else None,
     )
+    realtime_options = shared_controls.get(RECEIVER_REALTIME)
+    realtime = None
 
-    if not comm.is_open():
-        logger.error("Não foi possível abrir a porta para recepção.")
-        return
+    stopping = False
+    recovery = None
 
-    # Estado das 48 teclas
-    state = make_empty_state()
-
-    # Inicializa o estado compartilhado, garantindo que todas as teclas existam
-    for key_id in range(len(state)):
-        frames_dict[key_id] = bool(frames_dict.get(key_id, False))
-
-    # Buffer para suportar leitura do snapshot (pegando próximos 6 bytes)
-    # Estratégia: quando receber 0x7F, vamos ler os 6 bytes seguintes diretamente.
-    # Para isso, guardamos os bytes que chegam em uma fila.
-
-    queue = deque()
-
-    def on_byte(b: int):
-        # Enfileira para permitir leitura sequencial (snapshot)
-        queue.append(b)
-
-        # Consumidor: processa enquanto houver bytes
-        while queue:
-            val = queue.popleft()
-
-            # Snapshot marker?
-            if val == SNAPSHOT_MARKER:
-                # Precisamos de +6 bytes; se não houver todos ainda, devolve e espera
-                if len(queue) < 6:
-                    # devolve o marcador e espera os próximos bytes chegarem
-                    queue.appendleft(val)
-                    return
-                snap = bytes(queue.popleft() for _ in range(6))
-                try:
-                    flat = decode_snapshot_bytes(snap)
-                except ValueError as e:
-                    logger.warning(f"Snapshot inválido: {e}")
-                    continue
-
-                # Atualiza estado e log (apenas diferenças para não poluir)
-                changes = []
-                for key_id in range(48):
-                    if state[key_id] != flat[key_id]:
-                        state[key_id] = flat[key_id]
-                        changes.append((key_id, flat[key_id]))
-                if changes:
-                    hex_str = " ".join(f"{b:02X}" for b in snap)
-                    logger.info(f"SNAPSHOT A..F = {hex_str} | changes={len(changes)}")
-                    for key_id, pressed in changes:
-                        frames_dict[key_id] = bool(pressed)
-                continue
+    def on_command(message):
+        nonlocal boards, baud, stopping
+        command = message.get("command")
+        if command == CONTROL_STOP:
+            stopping = True
+        elif command == CONTROL_SET_PORTS:
+            boards = [tuple(board) for board in message["ports"]]
+            logger.info(f"Trocando portas para {', '.join(f'{p}@{o}' for p, o in boards)}")
+        elif command == CONTROL_SET_BAUD:
+            baud = int(message["baud"])
+            logger.info(f"Trocando baud rate para {baud}")
+        else:
+            logger.warning(f"Comando desconhecido: {message!r}")
+            return
+        # Sai do select; as portas são reabertas com a nova configuração
+        multiplexer.stop()
 
-            # Evento 1 byte
-            evt = decode_event_byte(val)
-            if evt is None:
-                # inválido / reservado — ignore
-                continue
+    try:
+        while True:
+            multiplexer = SerialMultiplexer(logger=logger)
+            recovery = HotplugRecovery(multiplexer, logger=logger)
+            for comm, (_, offset) in zip(comms, boards):
+                comm.start_capture()
+                multiplexer.register(comm, receiver.board_reader(offset))
+                receiver.track(recovery, comm, offset)
+            receiver.attach(multiplexer)
+            if realtime is None:
+                realtime = _enter_realtime(realtime_options, comms, logger)
+            elif realtime_options is not None:
+                for comm in comms:
+                    comm.use_read_buffer()
+            if control is not None:
+                multiplexer.set_control(control, on_command)
+            multiplexer.run()
+            recovery.close()
+            recovery = None
 
-            key_id, pressed = evt
-            changed = apply_event_to_state(state, key_id, pressed)
-            if not changed:
-                # Provável bounce repetido; ignorar para não poluir
-                continue
+            for comm in comms:
+                comm.close()
+            comms = []
+            if stopping or control is None or multiplexer.control_closed:
+                break
+            comms = _open_boards(boards, baud, capture_path, logger)
+    except KeyboardInterrupt:
+        logger.info("Recepção interrompida pelo usuário (Ctrl+C).")
+    finally:
+        if recovery is not None:
+            recovery.close()
+        for comm in comms:
+            comm.close()
+        if realtime is not None:
+            realtime.exit()
+        _log_jitter(receiver, logger)
 
-            port_name, bit = key_to_port_bit(key_id)
-            #logger.info(f"{'DOWN' if pressed else 'UP  '} "
-                       # f"key={key_id:02d} (P{port_name}{bit})")
 
-            frames_dict[key_id] = bool(pressed)
+def hub_receiver_process(instruments, control=None, gesture_options=None,
+                         realtime_options=None, jitter_report=False):
+    """
+    Receptor do modo hub: um único processo e um único multiplexador para
+    todos os instrumentos. `instruments` é uma lista de
+    (id, placas, baud, key_state, event_ring, metrics, gesture_ring); cada
+    instrumento tem os próprios blocos compartilhados e um PianoReceiver
+    leve (gesture_ring pode ser None). Uma placa que não abre é registrada
+    no log sem derrubar as demais; uma que cai é reaberta como no
+    data_receiver_process. `realtime_options` e `jitter_report` como
+    RECEIVER_REALTIME/RECEIVER_JITTER do data_receiver_process.
+    """
+    logger = Logger("HubReceiver", verbose=True)
+    multiplexer = SerialMultiplexer(logger=logger)
+    recovery = HotplugRecovery(multiplexer, logger=logger)
+    comms = []
+    receivers = []
+    for piano_id, boards, baud, key_state, event_ring, metrics, gesture_ring in instruments:
+        receiver = PianoReceiver(
+            key_state, event_ring, metrics, logger, name=piano_id,
+            gesture_ring=gesture_ring, gesture_options=gesture_options,
+            jitter=JitterRecorder() if jitter_report else None,
+        )
+        receivers.append(receiver)
+        receiver.attach(multiplexer)
+        for port, offset in boards:
+            comm = SerialCommunicator(com_port=port, baud_rate=baud, open_for_receive=True, logger=logger)
+            if not comm.is_open():
+                logger.error(f"[{piano_id}] Porta {port} não abriu; instrumento sem essa placa.")
+                continue
+            comms.append(comm)
+            multiplexer.register(comm, receiver.board_reader(offset))
+            receiver.track(recovery, comm, offset)
 
-    def should_stop():
-        # permite que o processo seja sinalizado externamente
-        return bool(shared_controls.get(RECEIVER_STOP, False))
+    def on_command(message):
+        if message.get("command") == CONTROL_STOP:
+            multiplexer.stop()
+        else:
+            logger.warning(f"Comando não suportado no modo hub: {message!r}")
 
+    if not comms:
+        logger.error("Nenhuma porta abriu; encerrando o hub.")
+        sys.exit(1)
+    if control is not None:
+        multiplexer.set_control(control, on_command)
+    realtime = _enter_realtime(realtime_options, comms, logger)
     try:
-        comm.receive_loop(on_byte=on_byte, should_stop=should_stop)
+        multiplexer.run()
+    except KeyboardInterrupt:
+        logger.info("Recepção interrompida pelo usuário (Ctrl+C).")
     finally:
-        comm.close()
+        recovery.close()
+        for comm in comms:
+            comm.close()
+        if realtime is not None:
+            realtime.exit()
+        for receiver in receivers:
+            _log_jitter(receiver, logger)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+from src.infrastructure.adapters.shared_memory.gesture_ring import (
+    GESTURE_CHORD,
+    GESTURE_HOLD,
+    GESTURE_KEYS_BYTES,
+    GESTURE_MAX_KEYS,
+    GESTURE_RELEASE,
+    GESTURE_REPEAT,
+)
+
+_NO_KEYS = bytes(GESTURE_KEYS_BYTES)
+_MAX_COUNT = 255
+
+
+class GestureDetector:
+    """
+    Estágio de gestos depois do decoder, no próprio receptor. Recebe as
+    mudanças (key_id, pressed) com o timestamp da leitura serial e publica em
+    `sink.append(kind, t_ns, duration_ns, key_id, count, keys)`:
+
+      - chord: teclas pressionadas dentro de `chord_window_ms` a partir da
+        primeira (mínimo `min_chord`); sai quando a janela fecha.
+      - hold: tecla ainda pressionada `hold_ms` depois de descer (uma vez).
+      - repeat: a mesma tecla pressionada de novo em até `repeat_window_ms`;
+        count é o tamanho da sequência de repetições.
+      - release: soltura com a duração em que a tecla ficou pressionada.
+
+    Tudo é O(1) por evento: estado por tecla em listas de tamanho fixo, o
+    acorde em aberto num bitmap pré-alocado e as notas seguradas numa fila
+    em ordem de tempo (entradas de teclas já soltas são descartadas quando
+    chegam à frente). Janelas que vencem sem novos eventos são fechadas por
+    poll(), chamado pelo multiplexador no instante de next_deadline().
+    """
+
+    def __init__(
+        self,
+        sink,
+        num_keys: int,
+        chord_window_ms: float = 30.0,
+        hold_ms: float = 500.0,
+        repeat_window_ms: float = 300.0,
+        min_chord: int = 2,
+    ) -> None:
+        self._emit = sink.append
+        self._num_keys = min(num_keys, GESTURE_MAX_KEYS)
+        self.chord_window_ns = int(chord_window_ms * 1_000_000)
+        self.hold_ns = int(hold_ms * 1_000_000)
+        self.repeat_window_ns = int(repeat_window_ms * 1_000_000)
+        self.min_chord = max(2, min_chord)
+
+        # Por tecla: instante em que desceu (0 = solta ou desconhecido), a
+        # descida anterior, o tamanho da sequência de repetições e se o hold
+        # já foi emitido para a descida atual.
+        self._press_ns = [0] * self._num_keys
+        self._last_press_ns = [0] * self._num_keys
+        self._repeats = [0] * self._num_keys
+        self._held = bytearray(self._num_keys)
+        self._hold_keys: deque = deque()
+        self._hold_times: deque = deque()
+
+        self._chord_bits = bytearray(GESTURE_KEYS_BYTES)
+        self._chord_start = 0
+        self._chord_last = 0
+        self._chord_count = 0
+        self._chord_low = 0
+
+    # ----------------------------------------------------------------- eventos
+    def on_changes(self, changes: Iterable[Tuple[int, int]], t_ns: int) -> None:
+        self.poll(t_ns)
+        num_keys = self._num_keys
+        for key_id, pressed in changes:
+            if key_id >= num_keys:
+                continue
+            if pressed:
+                self._on_press(key_id, t_ns)
+            else:
+                self._on_release(key_id, t_ns)
+
+    def _on_press(self, key_id: int, t_ns: int) -> None:
+        last = self._last_press_ns[key_id]
+        if last and t_ns - last <= self.repeat_window_ns:
+            repeats = self._repeats[key_id] + 1
+            self._repeats[key_id] = repeats
+            self._emit(GESTURE_REPEAT, t_ns, t_ns - last, key_id, min(repeats + 1, _MAX_COUNT), _NO_KEYS)
+        else:
+            self._repeats[key_id] = 0
+        self._last_press_ns[key_id] = t_ns
+        self._press_ns[key_id] = t_ns
+        self._held[key_id] = 0
+        self._hold_keys.append(key_id)
+        self._hold_times.append(t_ns)
+
+        if self._chord_count and t_ns - self._chord_start > self.chord_window_ns:
+            self._close_chord()
+        if not self._chord_count:
+            self._chord_start = t_ns
+            self._chord_low = key_id
+        elif key_id < self._chord_low:
+            self._chord_low = key_id
+        byte, bit = divmod(key_id, 8)
+        if not self._chord_bits[byte] & (1 << bit):
+            self._chord_bits[byte] |= 1 << bit
+            self._chord_count += 1
+        self._chord_last = t_ns
+
+    def _on_release(self, key_id: int, t_ns: int) -> None:
+        pressed_at = self._press_ns[key_id]
+        self._press_ns[key_id] = 0
+        duration = t_ns - pressed_at if pressed_at else -1
+        self._emit(GESTURE_RELEASE, t_ns, duration, key_id, 1, _NO_KEYS)
+
+    def _close_chord(self) -> None:
+        count = self._chord_count
+        if count >= self.min_chord:
+            self._emit(
+                GESTURE_CHORD,
+                self._chord_start,
+                self._chord_last - self._chord_start,
+                self._chord_low,
+                min(count, _MAX_COUNT),
+                bytes(self._chord_bits),
+            )
+        self._chord_bits[:] = _NO_KEYS
+        self._chord_count = 0
+
+    # ----------------------------------------------------------------- prazos
+    def poll(self, now_ns: int) -> None:
+        """Fecha o acorde cuja janela venceu e emite os holds atingidos."""
+
+        if self._chord_count and now_ns - self._chord_start > self.chord_window_ns:
+            self._close_chord()
+
+        hold_keys = self._hold_keys
+        hold_times = self._hold_times
+        hold_ns = self.hold_ns
+        while hold_times and now_ns - hold_times[0] >= hold_ns:
+            key_id = hold_keys.popleft()
+            pressed_at = hold_times.popleft()
+            if self._press_ns[key_id] == pressed_at and not self._held[key_id]:
+                self._held[key_id] = 1
+                self._emit(GESTURE_HOLD, pressed_at, now_ns - pressed_at, key_id, 1, _NO_KEYS)
+
+    def next_deadline(self) -> Optional[int]:
+        """Próximo instante (monotonic_ns) em que poll() tem algo a fazer."""
+
+        deadline = None
+        if self._chord_count:
+            deadline = self._chord_start + self.chord_window_ns + 1
+        if self._hold_times:
+            hold_at = self._hold_times[0] + self.hold_ns
+            if deadline is None or hold_at < deadline:
+                deadline = hold_at
+        return deadline
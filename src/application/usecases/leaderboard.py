@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import insort
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.infrastructure.adapters.storage.repositories import (
+    GLOBAL_BOARD,
+    LEADERBOARD_SIZE,
+    leaderboard_scores,
+)
+
+# (-score, seq, id, nome): a ordem natural da tupla já é a do ranking
+_Entry = Tuple[float, int, str, str]
+
+# Intervalo (s) entre as conferências do seq no banco nas leituras: é o
+# atraso máximo para ver jogadores cadastrados por outros workers.
+LEADERBOARD_CHECK_INTERVAL = 1.0
+
+
+class Leaderboards:
+    """
+    Cópia em memória dos quadros do LeaderboardRepository, servida sem
+    consultar o banco. Cada quadro é uma lista ordenada de no máximo `size`
+    entradas; inserir é uma bisseção e, com o quadro cheio, a pior sai.
+
+    O banco continua sendo a fonte: a cópia é carregada uma vez e guarda o
+    seq do último jogador aplicado, e aplica só os jogadores novos. As
+    leituras conferem o seq no banco no máximo a cada `check_interval`
+    segundos (os cadastros de outros workers do servidor pre-fork aparecem
+    nesse prazo); um cadastro neste processo chama invalidate() e a próxima
+    leitura já o inclui.
+    """
+
+    def __init__(self, store, size: int = LEADERBOARD_SIZE,
+                 check_interval: float = LEADERBOARD_CHECK_INTERVAL) -> None:
+        self._store = store
+        self.size = size
+        self.check_interval = check_interval
+        self._boards: Dict[str, List[_Entry]] = {}
+        self._seq: Optional[int] = None
+        # Próxima conferência do seq (time.monotonic); 0 = na próxima leitura
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _offer(self, board: str, entry: _Entry) -> None:
+        entries = self._boards.get(board)
+        if entries is None:
+            entries = self._boards[board] = []
+        elif len(entries) >= self.size and entry >= entries[-1]:
+            return
+        insort(entries, entry)
+        if len(entries) > self.size:
+            entries.pop()
+
+    def invalidate(self) -> None:
+        """Há jogador novo no banco: a próxima leitura confere o seq."""
+        self._next_check = 0.0
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        last_seq = self._store.last_seq()
+        if last_seq == self._seq:
+            return
+        with self._lock:
+            if self._seq is None:
+                seq, rows = self._store.snapshot()
+                boards: Dict[str, List[_Entry]] = {}
+                for board, player_seq, score, player_id, name in rows:
+                    boards.setdefault(board, []).append((-score, player_seq, player_id, name))
+                for entries in boards.values():
+                    entries.sort()
+                self._boards = boards
+                self._seq = seq
+            for seq, player_id, name, songs in self._store.players_since(self._seq):
+                for board, score in leaderboard_scores(songs).items():
+                    self._offer(board, (-score, seq, player_id, name))
+                self._seq = seq
+
+    def top(self, board: str = GLOBAL_BOARD, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        self.refresh()
+        entries = self._boards.get(board, ())
+        if limit is not None:
+            entries = entries[:limit]
+        return [
+            {"rank": rank, "id": player_id, "name": name, "score": -negative_score}
+            for rank, (negative_score, _, player_id, name) in enumerate(entries, start=1)
+        ]
+
+    def songs(self) -> List[str]:
+        self.refresh()
+        return sorted(board for board in self._boards if board != GLOBAL_BOARD)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from src.infrastructure.adapters.midi.midi_writer import (
+    NS_PER_TICK,
+    finish_smf,
+    note_event,
+    smf_header,
+)
+from src.infrastructure.logging.Logger import Logger
+
+# Tecla 0 = C3 (nota 48): como base é múltipla de 48, a gravação volta para
+# as mesmas teclas quando tocada como música (o jogo usa nota % 48).
+DEFAULT_BASE_NOTE = 48
+PART_SUFFIX = ".part"
+# Falhas seguidas da thread de escrita antes de encerrar a gravação
+PUMP_MAX_FAILURES = 10
+
+
+class RecordingError(ValueError):
+    pass
+
+
+class PerformanceRecorder:
+    """
+    Grava o que é tocado como Standard MIDI File (formato 0, 1 tick = 1 ms).
+
+    Os eventos vêm do anel compartilhado, lidos no processo web: o receptor
+    não faz nada a mais. Enquanto a gravação está ativa, uma thread anexa os
+    eventos novos ao arquivo `<nome>.mid.part` a cada `pump_interval`; ao
+    parar, as notas abertas são fechadas, o tamanho da trilha é gravado no
+    cabeçalho e o arquivo é renomeado para `.mid` no diretório de músicas,
+    onde o catálogo passa a listá-lo.
+
+    O estado (cursor, último tick, notas abertas) fica no RecordingRepository:
+    no servidor pre-fork qualquer worker consulta ou encerra a gravação, e a
+    escrita acontece dentro da transação do banco.
+
+    Um erro na thread de escrita é registrado no log e a tentativa se repete
+    no próximo intervalo; depois de PUMP_MAX_FAILURES falhas seguidas a
+    gravação é encerrada com o que já foi gravado (ou marcada com erro).
+    Consultar uma gravação ativa recria a thread se ela tiver morrido.
+    """
+
+    def __init__(
+        self,
+        event_ring,
+        store,
+        midi_dir: Path,
+        on_finished: Optional[Callable[[str, str], None]] = None,
+        pump_interval: float = 0.1,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        self._ring = event_ring
+        self._store = store
+        self._midi_dir = Path(midi_dir)
+        self._on_finished = on_finished
+        self._pump_interval = pump_interval
+        self._logger = logger or Logger("Recorder", verbose=True)
+        self._lock = threading.Lock()
+        self._pump: Optional[threading.Thread] = None
+        self._pump_pid = 0
+        # Gravações interrompidas por um encerramento: o .part tem os eventos
+        # até ali, então vira uma gravação normal.
+        for recording_id, _ in store.stale():
+            data = self._store.modify(recording_id, lambda data: self._finish(data, live=False))
+            if data and "error" not in data and on_finished is not None:
+                on_finished(data["filename"], data["name"])
+
+    # ------------------------------------------------------------------ API
+    def start(self, name: Optional[str] = None, base_note: int = DEFAULT_BASE_NOTE) -> Dict[str, Any]:
+        if not 0 <= base_note <= 127:
+            raise RecordingError("'base_note' deve estar entre 0 e 127.")
+        started = datetime.now()
+        name = (name or "").strip()
+        filename = self._unique_filename(name, started.strftime("gravacao-%Y%m%d-%H%M%S"))
+        name = name or started.strftime("Gravação %Y-%m-%d %H:%M:%S")
+        part = filename + PART_SUFFIX
+        now_ns = time.monotonic_ns()
+        data = {
+            "name": name,
+            "filename": filename,
+            "part": part,
+            "base_note": base_note,
+            "start_ns": now_ns,
+            "stop_ns": None,
+            "cursor": self._ring.head(),
+            "tick": 0,
+            "open_notes": [],
+            "events": 0,
+            "lost": 0,
+            "active": True,
+        }
+        recording_id = str(uuid4())
+        (self._midi_dir / part).write_bytes(smf_header(name))
+        if not self._store.insert(recording_id, data):
+            os.unlink(self._midi_dir / part)
+            raise RecordingError("Já existe uma gravação em andamento.")
+        self._ensure_pump()
+        return self._state(recording_id, data)
+
+    def get(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        data = self._store.get(recording_id)
+        if data is None:
+            return None
+        if data["active"]:
+            self._ensure_pump()
+        return self._state(recording_id, data)
+
+    def active(self) -> Optional[Dict[str, Any]]:
+        recording_id = self._store.active_id()
+        return None if recording_id is None else self.get(recording_id)
+
+    def stop(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        data = self._store.get(recording_id)
+        if data is None:
+            return None
+        if data["active"]:
+            updated = self._store.modify(recording_id, self._finish)
+            data = updated or self._store.get(recording_id)
+            if data and "error" not in data and self._on_finished is not None:
+                self._on_finished(data["filename"], data["name"])
+        return self._state(recording_id, data)
+
+    # -------------------------------------------------------------- escrita
+    def _unique_filename(self, name: str, fallback: str = "gravacao") -> str:
+        # Só ASCII: o nome precisa sobreviver ao secure_filename de /api/midi/<arquivo>
+        stem = "".join(
+            c if (c.isascii() and c.isalnum()) or c in "-_" else "_" for c in name
+        ).strip("_-")
+        stem = stem[:80] if stem.replace("_", "") else fallback
+        candidate = f"{stem}.mid"
+        counter = 1
+        while (self._midi_dir / candidate).exists() or (self._midi_dir / (candidate + PART_SUFFIX)).exists():
+            counter += 1
+            candidate = f"{stem}-{counter}.mid"
+        return candidate
+
+    def _catch_up(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Anexa ao .part os eventos do anel após o cursor."""
+
+        base = data["base_note"]
+        start_ns = data["start_ns"]
+        tick = data["tick"]
+        open_notes = set(data["open_notes"])
+        cursor = data["cursor"]
+        events = data["events"]
+        lost = data["lost"]
+        out = bytearray()
+        while True:
+            batch = self._ring.read_since(cursor)
+            lost += batch["lost"]
+            for _, t_ns, key_id, pressed in batch["events"]:
+                note = base + key_id
+                if note > 127:
+                    continue
+                if pressed:
+                    if note in open_notes:
+                        continue
+                    open_notes.add(note)
+                elif note in open_notes:
+                    open_notes.discard(note)
+                else:
+                    continue  # tecla já estava pressionada quando a gravação começou
+                event_tick = max(tick, (t_ns - start_ns) // NS_PER_TICK)
+                out += note_event(event_tick - tick, note, pressed)
+                tick = event_tick
+                events += 1
+            cursor = batch["cursor"]
+            if cursor >= batch["head"]:
+                break
+        if out:
+            with open(self._midi_dir / data["part"], "ab") as f:
+                f.write(out)
+        return {
+            **data,
+            "cursor": cursor,
+            "tick": tick,
+            "open_notes": sorted(open_notes),
+            "events": events,
+            "lost": lost,
+        }
+
+    def _finish(self, data: Dict[str, Any], live: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Fecha a gravação. `live=False` é para gravações de uma execução
+        anterior: o cursor não vale para o anel atual, então o arquivo
+        termina no último evento gravado.
+        """
+        if not data["active"]:
+            return None
+        part_path = self._midi_dir / data["part"]
+        if not part_path.exists():
+            return {**data, "active": False, "error": "Arquivo parcial não encontrado."}
+        stop_ns = time.monotonic_ns()
+        if live:
+            data = self._catch_up(data)
+        tick = data["tick"]
+        stop_tick = max(tick, (stop_ns - data["start_ns"]) // NS_PER_TICK) if live else tick
+        closing = bytearray()
+        for note in data["open_notes"]:
+            closing += note_event(stop_tick - tick, note, 0)
+            tick = stop_tick
+        if closing:
+            with open(part_path, "ab") as f:
+                f.write(closing)
+        finish_smf(part_path, stop_tick - tick)
+
+        filename = data["filename"]
+        if (self._midi_dir / filename).exists():
+            filename = self._unique_filename(Path(filename).stem)
+        os.replace(part_path, self._midi_dir / filename)
+        return {
+            **data,
+            "filename": filename,
+            "tick": stop_tick,
+            "open_notes": [],
+            "stop_ns": stop_ns,
+            "active": False,
+        }
+
+    # ---------------------------------------------------------------- thread
+    def _ensure_pump(self) -> None:
+        with self._lock:
+            # Threads não atravessam fork: cada worker inicia a sua
+            if self._pump is not None and self._pump.is_alive() and self._pump_pid == os.getpid():
+                return
+            self._pump = threading.Thread(target=self._run_pump, name="recorder", daemon=True)
+            self._pump_pid = os.getpid()
+            self._pump.start()
+
+    def _run_pump(self) -> None:
+        failures = 0
+        while True:
+            time.sleep(self._pump_interval)
+            recording_id = None
+            try:
+                recording_id = self._store.active_id()
+                if recording_id is None:
+                    return
+                self._store.modify(
+                    recording_id, lambda data: self._catch_up(data) if data["active"] else None
+                )
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self._logger.error(
+                    f"Gravação: falha ao anexar eventos ({failures}/{PUMP_MAX_FAILURES}): {e!r}",
+                    kind="recorder",
+                )
+                if failures >= PUMP_MAX_FAILURES:
+                    self._abort(recording_id, e)
+                    return
+
+    def _abort(self, recording_id: Optional[str], error: Exception) -> None:
+        """Encerra a gravação após falhas seguidas, salvando o .part se possível."""
+
+        if recording_id is None:
+            return
+
+        def close(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if not data["active"]:
+                return None
+            try:
+                finished = self._finish(data, live=False)
+            except Exception:
+                finished = None
+            return finished or {**data, "active": False, "error": f"Gravação interrompida: {error}"}
+
+        try:
+            data = self._store.modify(recording_id, close)
+        except Exception as e:
+            self._logger.error(f"Gravação {recording_id}: não foi possível encerrar: {e!r}")
+            return
+        if data is None:
+            return
+        if "error" in data:
+            self._logger.error(f"Gravação {recording_id} encerrada com erro: {data['error']}")
+            return
+        self._logger.warning(f"Gravação {recording_id} encerrada após falhas; arquivo {data['filename']}.")
+        if self._on_finished is not None:
+            self._on_finished(data["filename"], data["name"])
+
+    def _state(self, recording_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        active = data["active"]
+        if active:
+            duration = (time.monotonic_ns() - data["start_ns"]) / 1e9
+        else:
+            duration = data["tick"] * NS_PER_TICK / 1e9
+        state = {
+            "id": recording_id,
+            "name": data["name"],
+            "active": active,
+            "filename": data["filename"],
+            "base_note": data["base_note"],
+            "events": data["events"],
+            "lost_events": data["lost"],
+            "duration": duration,
+        }
+        if not active and "error" not in data:
+            state["url"] = f"/api/midi/{data['filename']}"
+        if "error" in data:
+            state["error"] = data["error"]
+        return state
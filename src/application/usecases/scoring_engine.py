@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from src.infrastructure.adapters.midi.midi_parser import MidiNote
+
+HIT_WINDOW = 0.15  # mesma janela usada no frontend (GameController.tsx)
+# Eventos chegam ao anel alguns ms depois do timestamp de leitura; só
+# expiramos notas com essa folga para não marcar "miss" antes da hora.
+SYNC_MARGIN = 0.05
+
+RESULT_PENDING = 0
+RESULT_HIT = 1
+RESULT_MISS = 2
+_RESULT_NAMES = {RESULT_HIT: "hit", RESULT_MISS: "miss"}
+
+
+class ScoringEngine:
+    """
+    Julga acertos/erros a partir dos eventos com timestamp do receptor.
+    As notas ficam em arrays ordenados por tempo, um por tecla (nota MIDI % 48,
+    como no jogo). Cada pressionar procura por bisseção a nota pendente mais
+    próxima dentro da janela; notas que saem da janela viram "miss" na ordem
+    em que expiram, o que mantém o combo igual ao cálculo do frontend.
+    """
+
+    def __init__(self, notes: Sequence[MidiNote], num_keys: int = 48,
+                 hit_window: float = HIT_WINDOW) -> None:
+        self.hit_window = hit_window
+        self.num_keys = num_keys
+        ordered = sorted(range(len(notes)), key=lambda i: notes[i].time)
+        self._notes = [notes[i] for i in ordered]
+        self._note_times = array("d", (note.time for note in self._notes))
+        self._note_keys = array("H", (note.midi % num_keys for note in self._notes))
+
+        # Por tecla: tempos ordenados e índice global da nota correspondente
+        self._key_times: List[array] = [array("d") for _ in range(num_keys)]
+        self._key_notes: List[array] = [array("I") for _ in range(num_keys)]
+        for index, note in enumerate(self._notes):
+            key_id = self._note_keys[index]
+            self._key_times[key_id].append(note.time)
+            self._key_notes[key_id].append(index)
+        self._key_cursor = [0] * num_keys  # primeira nota possivelmente pendente
+
+        self._result = bytearray(len(self._notes))
+        self._expire_cursor = 0
+        self.results: List[Dict[str, Any]] = []
+        self.score = 0
+        self.combo = 0
+        self.max_combo = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total(self) -> int:
+        return len(self._notes)
+
+    @property
+    def finished(self) -> bool:
+        return self.hits + self.misses >= len(self._notes)
+
+    def _judge(self, index: int, result: int, at: float) -> None:
+        self._result[index] = result
+        note_time = self._note_times[index]
+        if result == RESULT_HIT:
+            self.score += int(100 * (1 + self.combo * 0.1))
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+            self.hits += 1
+        else:
+            self.combo = 0
+            self.misses += 1
+        self.results.append(
+            {
+                "index": index,
+                "key": self._note_keys[index],
+                "midi": self._notes[index].midi,
+                "time": note_time,
+                "result": _RESULT_NAMES[result],
+                "offset_ms": round((at - note_time) * 1000, 2) if result == RESULT_HIT else None,
+            }
+        )
+
+    def advance(self, song_time: float) -> None:
+        """Marca como "miss" toda nota pendente cuja janela terminou antes de song_time."""
+
+        times = self._note_times
+        limit = song_time - self.hit_window
+        i = self._expire_cursor
+        while i < len(times) and times[i] < limit:
+            if self._result[i] == RESULT_PENDING:
+                self._judge(i, RESULT_MISS, song_time)
+            i += 1
+        self._expire_cursor = i
+
+    def press(self, key_id: int, song_time: float) -> Optional[int]:
+        """Registra um pressionar; retorna o índice da nota acertada, se houver."""
+
+        if not 0 <= key_id < self.num_keys:
+            return None
+        self.advance(song_time)
+
+        times = self._key_times[key_id]
+        indexes = self._key_notes[key_id]
+        result = self._result
+        cursor = self._key_cursor[key_id]
+        while cursor < len(times) and result[indexes[cursor]] != RESULT_PENDING:
+            cursor += 1
+        self._key_cursor[key_id] = cursor
+
+        window = self.hit_window
+        pos = bisect_left(times, song_time, cursor)
+        best = -1
+        best_distance = window
+        before = pos - 1
+        while before >= cursor and song_time - times[before] <= window:
+            if result[indexes[before]] == RESULT_PENDING:
+                best, best_distance = before, song_time - times[before]
+                break
+            before -= 1
+        after = pos
+        while after < len(times):
+            distance = times[after] - song_time
+            if distance > best_distance or (best >= 0 and distance == best_distance):
+                break
+            if result[indexes[after]] == RESULT_PENDING:
+                best = after
+                break
+            after += 1
+        if best < 0:
+            return None
+        note_index = indexes[best]
+        self._judge(note_index, RESULT_HIT, song_time)
+        return note_index
+
+    def summary(self, results_since: int = 0) -> Dict[str, Any]:
+        return {
+            "score": self.score,
+            "combo": self.combo,
+            "max_combo": self.max_combo,
+            "hits": self.hits,
+            "misses": self.misses,
+            "total": self.total,
+            "finished": self.finished,
+            "results": self.results[results_since:],
+            "results_cursor": len(self.results),
+        }
+
+
+class ScoreSession:
+    """
+    Sessão de jogo no servidor. O relógio da música é ancorado em
+    time.monotonic_ns() do host — o mesmo relógio dos timestamps do anel de
+    eventos —, então o julgamento não depende do polling nem do navegador.
+
+    Cada trecho em que a música correu fica registrado em `segments` como
+    [origem_ns, cursor inicial, fim_ns, cursor final] (fim -1 = em
+    andamento). Como os eventos vêm do anel compartilhado, qualquer processo
+    reconstrói o mesmo placar a partir desse registro (ver restore).
+    """
+
+    def __init__(self, title: str, notes: Sequence[MidiNote], event_ring,
+                 hit_window: float = HIT_WINDOW, session_id: Optional[str] = None,
+                 filename: Optional[str] = None) -> None:
+        self.id = session_id or str(uuid4())
+        self.title = title
+        self.filename = filename
+        self.hit_window = hit_window
+        self.engine = ScoringEngine(notes, hit_window=hit_window)
+        self._ring = event_ring
+        self._cursor = event_ring.head()
+        self._origin_ns: Optional[int] = None
+        self._position = 0.0
+        self.lost_events = 0
+        self.segments: List[List[int]] = []
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._origin_ns is not None
+
+    def _song_time(self, t_ns: int) -> float:
+        return (t_ns - self._origin_ns) / 1e9
+
+    def start(self, position: float = 0.0, at_ns: Optional[int] = None) -> None:
+        """Inicia/retoma a música em `position` segundos no instante at_ns."""
+
+        with self._lock:
+            self._sync()
+            if self._origin_ns is not None:
+                self._close_segment(time.monotonic_ns())
+            now_ns = at_ns if at_ns is not None else time.monotonic_ns()
+            self._origin_ns = now_ns - int(position * 1e9)
+            # Eventos anteriores ao início não contam
+            self._cursor = self._ring.head()
+            self.segments.append([self._origin_ns, self._cursor, -1, -1])
+            self.version += 1
+
+    def pause(self) -> None:
+        with self._lock:
+            self._sync()
+            if self._origin_ns is not None:
+                now_ns = time.monotonic_ns()
+                self._position = self._song_time(now_ns)
+                self.engine.advance(self._position)
+                self._close_segment(now_ns)
+                self.version += 1
+            self._origin_ns = None
+
+    def _close_segment(self, end_ns: int) -> None:
+        if self.segments and self.segments[-1][2] < 0:
+            self.segments[-1][2:] = [end_ns, self._cursor]
+
+    def _consume(self, until: Optional[int] = None) -> None:
+        """Julga os pressionamentos do anel a partir do cursor (até `until`, inclusive)."""
+
+        while True:
+            batch = self._ring.read_since(self._cursor)
+            self.lost_events += batch["lost"]
+            for seq, t_ns, key_id, pressed in batch["events"]:
+                if until is not None and seq > until:
+                    self._cursor = until
+                    return
+                if pressed and t_ns >= self._origin_ns:
+                    self.engine.press(key_id, self._song_time(t_ns))
+            self._cursor = batch["cursor"]
+            if self._cursor >= batch["head"] or (until is not None and self._cursor >= until):
+                break
+
+    def _sync(self) -> None:
+        if self._origin_ns is None:
+            self._cursor = self._ring.head()
+            return
+        self._consume()
+        self.engine.advance(self._song_time(time.monotonic_ns()) - SYNC_MARGIN)
+
+    def to_record(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "title": self.title,
+                "filename": self.filename,
+                "hit_window": self.hit_window,
+                "segments": [list(segment) for segment in self.segments],
+                "position": self._position,
+            }
+
+    @classmethod
+    def restore(cls, session_id: str, version: int, record: Dict[str, Any],
+                notes: Sequence[MidiNote], event_ring) -> "ScoreSession":
+        """Refaz o placar de uma sessão criada/alterada por outro processo."""
+
+        session = cls(record["title"], notes, event_ring, record["hit_window"],
+                      session_id=session_id, filename=record.get("filename"))
+        for origin_ns, cursor, end_ns, end_cursor in record["segments"]:
+            session._origin_ns = origin_ns
+            session._cursor = cursor
+            if end_ns < 0:
+                break  # trecho em andamento: o próximo _sync continua daqui
+            session._consume(until=end_cursor)
+            session.engine.advance(session._song_time(end_ns))
+            session._origin_ns = None
+        if session._origin_ns is None:
+            session._cursor = event_ring.head()
+        session.segments = [list(segment) for segment in record["segments"]]
+        session._position = record["position"]
+        session.version = version
+        return session
+
+    def state(self, results_since: int = 0) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            summary = self.engine.summary(results_since)
+            position = (
+                self._song_time(time.monotonic_ns()) if self._origin_ns is not None
+                else self._position
+            )
+        return {
+            "id": self.id,
+            "title": self.title,
+            "running": self.running,
+            "position": position,
+            "lost_events": self.lost_events,
+            **summary,
+        }
+
+
+class ScoreSessionRegistry:
+    """
+    Guarda as sessões ativas do processo web (as mais antigas são descartadas).
+    Com um `store` (ScoreSessionRepository), a definição de cada sessão fica no
+    banco e cada processo mantém apenas um cache: no servidor pre-fork, a
+    requisição que chega a outro worker reconstrói a sessão a partir do anel.
+    """
+
+    def __init__(self, event_ring, max_sessions: int = 64, store=None,
+                 load_notes: Optional[Callable[[str], Sequence[MidiNote]]] = None) -> None:
+        self._ring = event_ring
+        self._max_sessions = max_sessions
+        self._store = store
+        self._load_notes = load_notes
+        self._sessions: Dict[str, ScoreSession] = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, session: ScoreSession) -> None:
+        with self._lock:
+            self._sessions[session.id] = session
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.pop(next(iter(self._sessions)))
+
+    def create(self, title: str, notes: Sequence[MidiNote], hit_window: float = HIT_WINDOW,
+               filename: Optional[str] = None) -> ScoreSession:
+        session = ScoreSession(title, notes, self._ring, hit_window=hit_window, filename=filename)
+        if self._store is not None:
+            self._store.insert(session.id, session.version, session.to_record(), self._max_sessions)
+        self._remember(session)
+        return session
+
+    def _current(self, session_id: str, version: int, record: Dict[str, Any]) -> Optional[ScoreSession]:
+        cached = self._sessions.get(session_id)
+        if cached is not None and cached.version == version:
+            return cached
+        try:
+            notes = self._load_notes(record["filename"])
+        except (OSError, ValueError):
+            return None
+        session = ScoreSession.restore(session_id, version, record, notes, self._ring)
+        self._remember(session)
+        return session
+
+    def get(self, session_id: str) -> Optional[ScoreSession]:
+        if self._store is None:
+            return self._sessions.get(session_id)
+        row = self._store.get(session_id)
+        if row is None:
+            return None
+        return self._current(session_id, *row)
+
+    def _modify(self, session_id: str, action: Callable[[ScoreSession], None]) -> Optional[ScoreSession]:
+        if self._store is None:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                action(session)
+            return session
+
+        result: Dict[str, ScoreSession] = {}
+
+        def apply(version: int, record: Dict[str, Any]):
+            session = self._current(session_id, version, record)
+            if session is None:
+                return None
+            action(session)
+            result["session"] = session
+            return session.version, session.to_record()
+
+        # A alteração acontece dentro da transação do banco, então dois
+        # workers não pausam/iniciam a mesma sessão ao mesmo tempo.
+        self._store.modify(session_id, apply)
+        return result.get("session")
+
+    def start(self, session_id: str, position: float = 0.0) -> Optional[ScoreSession]:
+        return self._modify(session_id, lambda session: session.start(position))
+
+    def pause(self, session_id: str) -> Optional[ScoreSession]:
+        return self._modify(session_id, ScoreSession.pause)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MIDI_SUFFIXES = (".mid", ".midi")
+
+
+class MidiCatalog:
+    """
+    Lista de músicas em cache, reconstruída só quando o diretório muda.
+    A validade é conferida com um único stat do diretório (mtime + inode):
+    criar/remover/renomear arquivos altera o mtime. Mudanças que não mexem na
+    listagem (ex.: novo nome de exibição) passam por invalidate(), que também
+    toca o diretório para que outros processos percebam.
+    """
+
+    def __init__(self, midi_dir: Path, load_metadata: Callable[[], Dict[str, Dict[str, str]]]) -> None:
+        self._dir = midi_dir
+        self._load_metadata = load_metadata
+        self._lock = threading.Lock()
+        # (assinatura, arquivos, etag, last_modified) publicados numa única
+        # atribuição: o caminho rápido nunca mistura duas gerações.
+        self._state: Tuple[Optional[Tuple[int, int]], List[Dict[str, Any]], str, float] = (None, [], "", 0.0)
+
+    def _stat_signature(self) -> Tuple[Tuple[int, int], float]:
+        stat = os.stat(self._dir)
+        return (stat.st_mtime_ns, stat.st_ino), stat.st_mtime
+
+    def _build(self) -> List[Dict[str, Any]]:
+        metadata = self._load_metadata()
+        files: List[Dict[str, Any]] = []
+        with os.scandir(self._dir) as entries:
+            names = [
+                entry.name for entry in entries
+                if entry.name.lower().endswith(MIDI_SUFFIXES) and entry.is_file()
+            ]
+        names.sort(key=str.lower)
+        for filename in names:
+            entry = metadata.get(filename)
+            label = entry.get("name") if entry else None
+            if not label:
+                label = Path(filename).stem
+            files.append(
+                {
+                    "name": label,
+                    "filename": filename,
+                    "url": f"/api/midi/{filename}",
+                }
+            )
+        return files
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], str, float]:
+        """Retorna (arquivos, etag, last_modified em epoch)."""
+
+        signature, mtime = self._stat_signature()
+        state = self._state
+        if signature == state[0]:
+            return state[1:]
+
+        with self._lock:
+            state = self._state
+            if signature != state[0]:
+                files = self._build()
+                payload = json.dumps(files, sort_keys=True).encode("utf-8")
+                state = (signature, files, hashlib.sha1(payload).hexdigest(), mtime)
+                self._state = state
+        return state[1:]
+
+    def files(self) -> List[Dict[str, Any]]:
+        return self.snapshot()[0]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._state = (None,) + self._state[1:]
+        try:
+            os.utime(self._dir)
+        except OSError:
+            pass
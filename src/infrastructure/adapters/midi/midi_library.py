@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+from uuid import uuid4
+
+from .midi_catalog import MIDI_SUFFIXES
+from .note_table import NoteTable, note_table_path
+
+OBJECTS_DIR = ".objects"
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class StoredMidi(NamedTuple):
+    filename: str
+    content_hash: str
+    # O conteúdo já existia: nada foi gravado nem reprocessado
+    duplicate: bool
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MidiLibrary:
+    """
+    Armazenamento dos .mid endereçado por conteúdo. Cada conteúdo distinto
+    existe uma vez em `.objects/<sha256>.mid`, com a tabela de notas ao lado;
+    o arquivo listado no catálogo é um hard link para o objeto (ou uma cópia,
+    se o sistema de arquivos não suportar links) e o midi_metadata associa
+    nome de exibição e arquivo ao hash. Enviar a mesma música com outro nome
+    só cria outro link: nada de espaço extra nem novo processamento.
+
+    O upload é copiado em blocos para um temporário no próprio diretório
+    enquanto é hasheado, e só aparece para os leitores por os.replace.
+    """
+
+    def __init__(self, midi_dir: Path, metadata, max_bytes: int = MAX_UPLOAD_BYTES) -> None:
+        self._dir = Path(midi_dir)
+        self._objects = self._dir / OBJECTS_DIR
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._metadata = metadata
+        self.max_bytes = max_bytes
+
+    def object_path(self, content_hash: str) -> Path:
+        return self._objects / f"{content_hash}.mid"
+
+    def source_path(self, filename: str) -> Path:
+        """
+        Arquivo a usar para dados derivados de `filename`: o objeto, quando o
+        hash é conhecido, para que nomes com o mesmo conteúdo compartilhem a
+        tabela de notas.
+        """
+        content_hash = self._metadata.hash_of(filename)
+        if content_hash:
+            path = self.object_path(content_hash)
+            if path.exists():
+                return path
+        return self._dir / filename
+
+    # -------------------------------------------------------------- entrada
+    def store(self, stream: BinaryIO, filename: str, name: str) -> StoredMidi:
+        """
+        Grava o upload. Levanta UploadTooLarge acima de `max_bytes` e
+        MidiParseError/OSError se o conteúdo novo não for um MIDI válido; em
+        ambos os casos nada fica no diretório.
+        """
+        fd, tmp_name = tempfile.mkstemp(prefix=".upload-", suffix=".tmp", dir=self._dir)
+        tmp_path = Path(tmp_name)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(
+                            f"Arquivo maior que o limite de {self.max_bytes} bytes."
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+            content_hash = digest.hexdigest()
+            object_path = self.object_path(content_hash)
+            duplicate = object_path.exists()
+            if not duplicate:
+                # Valida e pré-processa antes de publicar o objeto; a tabela é
+                # gravada primeiro para não ficar mais velha que o .mid.
+                NoteTable.from_midi_file(tmp_path).save(note_table_path(object_path))
+                os.replace(tmp_path, object_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        filename = self._claim_filename(object_path, filename, content_hash)
+        self._metadata.set(filename, name, content_hash)
+        return StoredMidi(filename, content_hash, duplicate)
+
+    def adopt(self, filename: str, name: Optional[str] = None) -> str:
+        """
+        Passa para o armazenamento por conteúdo um arquivo já presente no
+        diretório (gravações, arquivos de versões anteriores). Retorna o hash.
+        """
+        path = self._dir / filename
+        content_hash = _hash_file(path)
+        object_path = self.object_path(content_hash)
+        if object_path.exists():
+            # Cópia de um conteúdo conhecido: vira link e a tabela dela sobra
+            self._link(object_path, path)
+            note_table_path(path).unlink(missing_ok=True)
+        else:
+            self._link(path, object_path)
+            legacy_table = note_table_path(path)
+            if legacy_table.exists():
+                os.replace(legacy_table, note_table_path(object_path))
+        if name is None:
+            name = (self._metadata.get(filename) or {}).get("name") or Path(filename).stem
+        self._metadata.set(filename, name, content_hash)
+        return content_hash
+
+    def adopt_existing(self) -> int:
+        """Adota os .mid sem hash no banco; na prática só roda uma vez."""
+
+        known = self._metadata.all()
+        with os.scandir(self._dir) as entries:
+            pending = [
+                entry.name for entry in entries
+                if entry.name.lower().endswith(MIDI_SUFFIXES)
+                and entry.is_file()
+                and not (known.get(entry.name) or {}).get("hash")
+            ]
+        for filename in pending:
+            self.adopt(filename)
+        return len(pending)
+
+    # ------------------------------------------------------------- arquivos
+    def _claim_filename(self, object_path: Path, filename: str, content_hash: str) -> str:
+        """
+        Liga o objeto ao nome pedido, ou a `<nome>-N` se já houver outro
+        conteúdo com ele: reenviar o mesmo arquivo reaproveita o nome, nunca
+        sobrescreve outro. O nome é tomado pela própria criação do link, que
+        falha se ele já existir, então dois uploads simultâneos (mesmo em
+        workers diferentes) não escolhem o mesmo nome.
+        """
+        stem, suffix = os.path.splitext(filename)
+        candidate = filename
+        counter = 1
+        while True:
+            target = self._dir / candidate
+            try:
+                self._link_new(object_path, target)
+                return candidate
+            except FileExistsError:
+                try:
+                    same = (
+                        self._metadata.hash_of(candidate) == content_hash
+                        or os.path.samefile(object_path, target)
+                    )
+                except FileNotFoundError:
+                    continue  # o nome foi liberado nesse meio tempo
+                if same:
+                    self._link(object_path, target)
+                    return candidate
+            counter += 1
+            candidate = f"{stem}-{counter}{suffix}"
+
+    @classmethod
+    def _link_new(cls, source: Path, destination: Path) -> None:
+        """Como _link, mas levanta FileExistsError se `destination` existir."""
+        try:
+            os.link(source, destination)
+        except FileExistsError:
+            raise
+        except OSError:
+            # Sem hard links: reserva o nome com O_EXCL e publica a cópia por cima
+            with open(destination, "xb"):
+                pass
+            cls._link(source, destination)
+
+    @staticmethod
+    def _link(source: Path, destination: Path) -> None:
+        if destination.exists() and os.path.samefile(source, destination):
+            return
+        tmp_path = destination.with_name(f".link-{uuid4().hex}.tmp")
+        try:
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, destination)
+        finally:
+            tmp_path.unlink(missing_ok=True)
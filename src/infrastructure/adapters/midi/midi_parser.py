@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+DEFAULT_TEMPO = 500_000  # microssegundos por semínima (120 BPM)
+
+
+class MidiNote(NamedTuple):
+    time: float       # início em segundos (mapa de tempo aplicado)
+    duration: float   # segundos
+    midi: int         # 0..127
+    velocity: int     # 1..127
+
+
+class MidiParseError(ValueError):
+    pass
+
+
+def _read_varlen(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    for _ in range(4):
+        if pos >= len(data):
+            raise MidiParseError("Quantidade variável truncada.")
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+    raise MidiParseError("Quantidade variável inválida.")
+
+
+def _iter_chunks(data: bytes):
+    pos = 0
+    while pos + 8 <= len(data):
+        kind, length = struct.unpack_from(">4sI", data, pos)
+        pos += 8
+        yield kind, data[pos:pos + length]
+        pos += length
+
+
+def _parse_track(track: bytes, track_index: int, tempos: List[Tuple[int, int]], raw: List[Tuple[int, int, int, int, int, int]]) -> None:
+    """Extrai (tick, ordem, canal, nota, velocidade) e mudanças de tempo de uma trilha."""
+
+    pos = 0
+    tick = 0
+    status = 0
+    order = 0
+    size = len(track)
+    while pos < size:
+        delta, pos = _read_varlen(track, pos)
+        tick += delta
+        if pos >= size:
+            break
+        byte = track[pos]
+        if byte & 0x80:
+            status = byte
+            pos += 1
+        elif not status:
+            raise MidiParseError("Running status sem status anterior.")
+
+        if status == 0xFF:
+            meta_type = track[pos]
+            length, pos = _read_varlen(track, pos + 1)
+            if meta_type == 0x51 and length == 3:
+                tempos.append((tick, int.from_bytes(track[pos:pos + 3], "big")))
+            elif meta_type == 0x2F:
+                break
+            pos += length
+            status = 0
+            continue
+        if status in (0xF0, 0xF7):
+            length, pos = _read_varlen(track, pos)
+            pos += length
+            status = 0
+            continue
+
+        kind = status & 0xF0
+        channel = status & 0x0F
+        if kind in (0xC0, 0xD0):
+            pos += 1
+            continue
+        if pos + 2 > size:
+            raise MidiParseError("Evento de canal truncado.")
+        note, velocity = track[pos], track[pos + 1]
+        pos += 2
+        if kind == 0x90 and velocity:
+            raw.append((tick, track_index, order, channel, note, velocity))
+        elif kind == 0x80 or kind == 0x90:
+            raw.append((tick, track_index, order, channel, note, 0))
+        order += 1
+
+
+def parse_midi_bytes(data: bytes) -> List[MidiNote]:
+    """
+    Converte um Standard MIDI File (formato 0 ou 1) em notas ordenadas por tempo.
+    Note-on com velocidade 0 conta como note-off; notas sem note-off terminam
+    no último evento do arquivo.
+    """
+
+    chunks = list(_iter_chunks(data))
+    if not chunks or chunks[0][0] != b"MThd" or len(chunks[0][1]) < 6:
+        raise MidiParseError("Cabeçalho MThd ausente.")
+    _, _, division = struct.unpack_from(">HHH", chunks[0][1], 0)
+    if division & 0x8000:
+        # SMPTE: -fps (byte alto, complemento de 2) x ticks por frame
+        fps = 256 - (division >> 8)
+        seconds_per_tick_fixed = 1.0 / (fps * (division & 0xFF))
+        ticks_per_beat = 0
+    else:
+        seconds_per_tick_fixed = 0.0
+        ticks_per_beat = division or 480
+
+    tempos: List[Tuple[int, int]] = []
+    raw: List[Tuple[int, int, int, int, int, int]] = []
+    track_index = 0
+    for kind, body in chunks[1:]:
+        if kind != b"MTrk":
+            continue
+        _parse_track(body, track_index, tempos, raw)
+        track_index += 1
+
+    # Mapa de tempo: (tick, segundos acumulados, segundos por tick)
+    tempos.sort(key=lambda item: item[0])
+    tempo_map: List[Tuple[int, float, float]] = []
+    if seconds_per_tick_fixed:
+        tempo_map.append((0, 0.0, seconds_per_tick_fixed))
+    else:
+        last_tick, last_seconds = 0, 0.0
+        spt = DEFAULT_TEMPO / 1_000_000 / ticks_per_beat
+        tempo_map.append((0, 0.0, spt))
+        for tick, tempo in tempos:
+            last_seconds += (tick - last_tick) * spt
+            last_tick = tick
+            spt = tempo / 1_000_000 / ticks_per_beat
+            tempo_map.append((tick, last_seconds, spt))
+
+    def to_seconds(tick: int, index: List[int]) -> float:
+        i = index[0]
+        while i + 1 < len(tempo_map) and tempo_map[i + 1][0] <= tick:
+            i += 1
+        index[0] = i
+        base_tick, base_seconds, spt = tempo_map[i]
+        return base_seconds + (tick - base_tick) * spt
+
+    raw.sort(key=lambda item: (item[0], item[1], item[2]))
+    cursor = [0]
+    open_notes: Dict[Tuple[int, int, int], List[Tuple[float, int]]] = {}
+    notes: List[MidiNote] = []
+    end_seconds = 0.0
+    for tick, track, _, channel, note, velocity in raw:
+        seconds = to_seconds(tick, cursor)
+        end_seconds = seconds
+        key = (track, channel, note)
+        if velocity:
+            open_notes.setdefault(key, []).append((seconds, velocity))
+        elif open_notes.get(key):
+            start, start_velocity = open_notes[key].pop(0)
+            notes.append(MidiNote(start, seconds - start, note, start_velocity))
+    for (_, _, note), pending in open_notes.items():
+        for start, velocity in pending:
+            notes.append(MidiNote(start, max(0.0, end_seconds - start), note, velocity))
+
+    notes.sort(key=lambda n: (n.time, n.midi))
+    return notes
+
+
+def parse_midi_file(path: Union[str, Path]) -> List[MidiNote]:
+    return parse_midi_bytes(Path(path).read_bytes())
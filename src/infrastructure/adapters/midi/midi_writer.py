@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import Union
+
+# Divisão e tempo escolhidos para que 1 tick = 1 ms: os deltas saem direto
+# dos timestamps em ns, sem acumular erro de arredondamento.
+TICKS_PER_QUARTER = 1000
+TEMPO_US_PER_QUARTER = 1_000_000
+NS_PER_TICK = TEMPO_US_PER_QUARTER * 1000 // TICKS_PER_QUARTER
+
+# Posição do campo de tamanho do MTrk (logo após MThd + 6 bytes + "MTrk")
+_TRACK_LENGTH_OFFSET = 8 + 6 + 4
+_TRACK_DATA_OFFSET = _TRACK_LENGTH_OFFSET + 4
+_END_OF_TRACK = b"\xff\x2f\x00"
+
+
+def encode_varlen(value: int) -> bytes:
+    """Quantidade de tamanho variável do SMF (7 bits por byte)."""
+
+    if value < 0:
+        raise ValueError("Delta negativo.")
+    out = bytearray((value & 0x7F,))
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.reverse()
+    return bytes(out)
+
+
+def smf_header(track_name: str = "") -> bytes:
+    """
+    Início de um SMF formato 0 com uma trilha de tamanho ainda desconhecido
+    (zerado; ver finish_smf), o tempo fixo e o nome da trilha.
+    """
+
+    header = struct.pack(">4sIHHH", b"MThd", 6, 0, 1, TICKS_PER_QUARTER)
+    track = bytearray(struct.pack(">4sI", b"MTrk", 0))
+    track += b"\x00\xff\x51\x03" + TEMPO_US_PER_QUARTER.to_bytes(3, "big")
+    if track_name:
+        name = track_name.encode("utf-8")[:127]
+        track += b"\x00\xff\x03" + encode_varlen(len(name)) + name
+    return header + bytes(track)
+
+
+def note_event(delta_ticks: int, note: int, pressed: int, velocity: int = 100, channel: int = 0) -> bytes:
+    """Note-on (pressed) ou note-off precedido do delta em ticks."""
+
+    status = (0x90 if pressed else 0x80) | (channel & 0x0F)
+    return encode_varlen(delta_ticks) + bytes((status, note & 0x7F, velocity if pressed else 64))
+
+
+def finish_smf(path: Union[str, Path], delta_ticks: int = 0) -> None:
+    """Fecha a trilha (end of track) e grava o tamanho real no cabeçalho MTrk."""
+
+    with open(path, "r+b") as f:
+        f.seek(0, 2)
+        f.write(encode_varlen(delta_ticks) + _END_OF_TRACK)
+        length = f.tell() - _TRACK_DATA_OFFSET
+        f.seek(_TRACK_LENGTH_OFFSET)
+        f.write(struct.pack(">I", length))
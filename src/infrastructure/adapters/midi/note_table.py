@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .midi_parser import MidiNote, parse_midi_file
+
+NOTE_TABLE_SUFFIX = ".notes"
+_MAGIC = b"MPNT"
+_VERSION = 1
+# magic, versão, quantidade de notas, maior duração, fim da música
+_HEADER = struct.Struct("<4sHIdd")
+
+
+class NoteTable:
+    """
+    Notas de uma música em colunas compactas (arrays), ordenadas por início.
+    Serializada como cabeçalho + start[d] + duration[d] + note[B] + velocity[B]
+    e gravada ao lado do .mid para não reprocessar o arquivo a cada jogo.
+    """
+
+    def __init__(self, start: array, duration: array, note: array, velocity: array) -> None:
+        self.start = start
+        self.duration = duration
+        self.note = note
+        self.velocity = velocity
+        self.max_duration = max(duration) if len(duration) else 0.0
+        self.end_time = max(
+            (s + d for s, d in zip(start, duration)), default=0.0
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @classmethod
+    def from_notes(cls, notes: Sequence[MidiNote]) -> "NoteTable":
+        ordered = sorted(notes, key=lambda n: (n.time, n.midi))
+        return cls(
+            array("d", (n.time for n in ordered)),
+            array("d", (n.duration for n in ordered)),
+            array("B", (n.midi for n in ordered)),
+            array("B", (n.velocity for n in ordered)),
+        )
+
+    @classmethod
+    def from_midi_file(cls, path: Union[str, Path]) -> "NoteTable":
+        return cls.from_notes(parse_midi_file(path))
+
+    def to_bytes(self) -> bytes:
+        columns = [self.start, self.duration]
+        if sys.byteorder != "little":
+            columns = [array("d", column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        header = _HEADER.pack(_MAGIC, _VERSION, len(self), self.max_duration, self.end_time)
+        return b"".join(
+            [header, columns[0].tobytes(), columns[1].tobytes(),
+             self.note.tobytes(), self.velocity.tobytes()]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "NoteTable":
+        magic, version, count, _, _ = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Tabela de notas com formato desconhecido.")
+        expected = _HEADER.size + count * 18
+        if len(data) != expected:
+            raise ValueError("Tabela de notas truncada.")
+
+        pos = _HEADER.size
+        start = array("d")
+        start.frombytes(data[pos:pos + 8 * count])
+        pos += 8 * count
+        duration = array("d")
+        duration.frombytes(data[pos:pos + 8 * count])
+        pos += 8 * count
+        if sys.byteorder != "little":
+            start.byteswap()
+            duration.byteswap()
+        note = array("B", data[pos:pos + count])
+        velocity = array("B", data[pos + count:pos + 2 * count])
+        return cls(start, duration, note, velocity)
+
+    def save(self, path: Union[str, Path]) -> None:
+        # Temporário exclusivo no mesmo diretório: construções simultâneas da
+        # mesma tabela (threads/workers) não escrevem no mesmo arquivo.
+        path = Path(path)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}-", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(self.to_bytes())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "NoteTable":
+        return cls.from_bytes(Path(path).read_bytes())
+
+    def to_notes(self) -> List[MidiNote]:
+        return [
+            MidiNote(s, d, n, v)
+            for s, d, n, v in zip(self.start, self.duration, self.note, self.velocity)
+        ]
+
+    def window_indexes(self, time_from: Optional[float], time_to: Optional[float]) -> List[int]:
+        """
+        Índices das notas que soam dentro de [time_from, time_to): início antes
+        de time_to e fim depois de time_from. Notas longas que começaram antes
+        da janela também entram; a busca recua no máximo max_duration.
+        """
+
+        start, duration = self.start, self.duration
+        last = len(self) if time_to is None else bisect_left(start, time_to)
+        if time_from is None:
+            return list(range(last))
+        first = bisect_left(start, time_from - self.max_duration, 0, last)
+        begin = bisect_left(start, time_from, first, last)
+        carried = [i for i in range(first, begin) if start[i] + duration[i] > time_from]
+        return carried + list(range(begin, last))
+
+    def to_json_notes(self, indexes: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Mesmo formato de nota do frontend (velocity normalizada em 0..1)."""
+
+        if indexes is None:
+            indexes = range(len(self))
+        start, duration, note, velocity = self.start, self.duration, self.note, self.velocity
+        return [
+            {
+                "midi": note[i],
+                "time": start[i],
+                "duration": duration[i],
+                "velocity": round(velocity[i] / 127, 4),
+            }
+            for i in indexes
+        ]
+
+
+def note_table_path(midi_path: Path) -> Path:
+    return midi_path.with_name(midi_path.name + NOTE_TABLE_SUFFIX)
+
+
+def table_etag(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class NoteTableCache:
+    """
+    Tabelas já carregadas por arquivo, invalidadas pelo mtime do .mid.
+    Se a tabela em disco não existir (arquivo enviado antes desta versão) ou
+    estiver desatualizada, é gerada na primeira consulta e gravada.
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self._max_entries = max_entries
+        self._entries: Dict[Path, Any] = {}
+
+    def build(self, midi_path: Path) -> NoteTable:
+        table = NoteTable.from_midi_file(midi_path)
+        table.save(note_table_path(midi_path))
+        self._entries.pop(midi_path, None)
+        return table
+
+    def get(self, midi_path: Path):
+        """Retorna (tabela, etag)."""
+
+        mtime = midi_path.stat().st_mtime_ns
+        cached = self._entries.get(midi_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        table_path = note_table_path(midi_path)
+        data = None
+        try:
+            if table_path.stat().st_mtime_ns >= mtime:
+                data = table_path.read_bytes()
+                table = NoteTable.from_bytes(data)
+        except (OSError, ValueError):
+            data = None
+        if data is None:
+            table = self.build(midi_path)
+            data = table.to_bytes()
+
+        etag = table_etag(data)
+        self._entries[midi_path] = (mtime, table, etag)
+        while len(self._entries) > self._max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        return table, etag
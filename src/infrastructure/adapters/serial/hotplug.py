@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.infrastructure.metrics.receiver_metrics import (
+    DISCONNECTS,
+    DOWN_SINCE_NS,
+    LAST_RECOVERY_NS,
+    MAX_RECOVERY_NS,
+    PORTS_DOWN,
+    RECONNECTS,
+)
+from src.infrastructure.services.realtime import lower_thread_priority
+
+from .serial_communicator import DeviceIdentity, SerialCommunicator
+
+# Intervalos entre tentativas de reabrir uma placa (ns); o último se repete.
+# A placa volta a enumerar em algumas centenas de ms depois de religada, então
+# o teto baixo mantém a recuperação perto do tempo de enumeração.
+RECONNECT_BACKOFF_NS = (10_000_000, 20_000_000, 50_000_000, 100_000_000, 200_000_000)
+# Com placa caída, de quanto em quanto tempo o laço de recepção confere se a
+# thread de reconexão já reabriu alguma porta (só olha um deque).
+HANDOFF_INTERVAL_NS = 10_000_000
+_REOPENED = -1
+
+
+class HotplugRecovery:
+    """
+    Reconexão rápida de placas desconectadas (cabo USB, reset da placa).
+    Liga-se ao SerialMultiplexer como handler de desconexão e como timer:
+    quando a leitura de uma porta acompanhada falha, a porta é fechada e uma
+    thread auxiliar, de prioridade baixa, procura o mesmo dispositivo
+    (número de série, senão VID:PID e porta USB física, senão o caminho) em
+    intervalos curtos e crescentes. A enumeração (list_ports) e a abertura,
+    que levam milissegundos, ficam fora do laço de recepção; só há reconexão
+    quando exatamente um dispositivo livre corresponde. Reaberta a porta e
+    pedido um snapshot ao firmware, o laço de recepção volta a registrá-la
+    com um leitor novo de make_reader() (decoder limpo, partindo do estado
+    publicado).
+
+    PORTS_DOWN no bloco de métricas de cada instrumento é sempre o número de
+    placas dele caídas nesta instância (zerado ao começar a acompanhar e em
+    close()), então um recomeço do receptor não deixa o estado marcado como
+    desatualizado. Quando a última placa volta, o tempo de recuperação
+    (primeira queda -> porta registrada de novo) é gravado.
+    """
+
+    def __init__(self, multiplexer, logger=None, backoff_ns: Tuple[int, ...] = RECONNECT_BACKOFF_NS) -> None:
+        self.multiplexer = multiplexer
+        self.logger = logger
+        self.backoff_ns = backoff_ns
+        self._tracked: Dict[SerialCommunicator, Tuple[DeviceIdentity, Callable, object]] = {}
+        # Placas caídas -> [tentativas, próximo prazo em monotonic_ns]; só a
+        # thread de reconexão altera a lista de cada uma depois de criada, e
+        # prazo _REOPENED marca a porta já reaberta, à espera do laço.
+        self._pending: Dict[SerialCommunicator, List[int]] = {}
+        self._reopened = deque()
+        self._handoff_ns = 0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        multiplexer.set_disconnect_handler(self.lost)
+        multiplexer.add_timer(self.next_deadline, self.poll)
+
+    def track(self, comm: SerialCommunicator, make_reader: Callable[[], Callable], metrics=None) -> None:
+        """Acompanha uma porta aberta; a identidade do dispositivo é lida agora."""
+        if metrics is not None and all(tracked[2] is not metrics for tracked in self._tracked.values()):
+            values = metrics.values
+            values[PORTS_DOWN] = 0
+            values[DOWN_SINCE_NS] = 0
+        self._tracked[comm] = (SerialCommunicator.device_identity(comm.com_port), make_reader, metrics)
+
+    @property
+    def pending(self) -> List[SerialCommunicator]:
+        return list(self._pending)
+
+    # --------------------------------------------------- laço de recepção
+    def lost(self, comm: SerialCommunicator, error: Exception) -> None:
+        tracked = self._tracked.get(comm)
+        comm.release_port()
+        if tracked is None or comm in self._pending:
+            return
+        now = time.monotonic_ns()
+        metrics = tracked[2]
+        if metrics is not None:
+            values = metrics.values
+            values[DISCONNECTS] += 1
+            if not self._down_count(metrics):
+                values[DOWN_SINCE_NS] = now
+        self._pending[comm] = [0, now + self.backoff_ns[0]]
+        self._publish_down(metrics)
+        if self.logger:
+            self.logger.warning(f"{comm.com_port} desconectada; procurando o dispositivo para reconectar.")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hotplug", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def next_deadline(self) -> Optional[int]:
+        if not self._pending:
+            return None
+        if not self._handoff_ns:
+            self._handoff_ns = time.monotonic_ns() + HANDOFF_INTERVAL_NS
+        return self._handoff_ns
+
+    def poll(self, now: int) -> None:
+        self._handoff_ns = 0
+        reopened = self._reopened
+        while reopened:
+            comm, attempts = reopened.popleft()
+            _, make_reader, metrics = self._tracked[comm]
+            self.multiplexer.register(comm, make_reader())
+            del self._pending[comm]
+            self._recovered(comm, metrics, attempts)
+
+    def _down_count(self, metrics) -> int:
+        return sum(1 for comm in self._pending if self._tracked[comm][2] is metrics)
+
+    def _publish_down(self, metrics) -> None:
+        if metrics is not None:
+            metrics.values[PORTS_DOWN] = self._down_count(metrics)
+
+    def _recovered(self, comm: SerialCommunicator, metrics, attempts: int) -> None:
+        done = time.monotonic_ns()
+        recovery_ns = None
+        if metrics is not None:
+            values = metrics.values
+            values[RECONNECTS] += 1
+            self._publish_down(metrics)
+            if values[PORTS_DOWN] == 0:
+                recovery_ns = done - values[DOWN_SINCE_NS]
+                values[LAST_RECOVERY_NS] = recovery_ns
+                values[MAX_RECOVERY_NS] = max(values[MAX_RECOVERY_NS], recovery_ns)
+                values[DOWN_SINCE_NS] = 0
+        if self.logger:
+            took = f" em {recovery_ns / 1e6:.0f} ms" if recovery_ns is not None else ""
+            self.logger.info(f"{comm.com_port} reconectada{took} ({attempts} tentativa(s)).")
+
+    def close(self) -> None:
+        """Para a thread e limpa a marcação de placas caídas deste receptor."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for _, _, metrics in self._tracked.values():
+            if metrics is not None:
+                metrics.values[PORTS_DOWN] = 0
+                metrics.values[DOWN_SINCE_NS] = 0
+
+    # ---------------------------------------------------- thread auxiliar
+    def _run(self) -> None:
+        lower_thread_priority()
+        while not self._stopping:
+            now = time.monotonic_ns()
+            nearest = None
+            for comm, state in list(self._pending.items()):
+                if state[1] == _REOPENED:
+                    continue
+                if state[1] <= now:
+                    if self._try_reopen(comm):
+                        state[1] = _REOPENED
+                        self._reopened.append((comm, state[0] + 1))
+                        continue
+                    state[0] += 1
+                    state[1] = time.monotonic_ns() + self.backoff_ns[min(state[0], len(self.backoff_ns) - 1)]
+                if nearest is None or state[1] < nearest:
+                    nearest = state[1]
+            timeout = None if nearest is None else max(0.0, (nearest - time.monotonic_ns()) / 1e9)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _try_reopen(self, comm: SerialCommunicator) -> bool:
+        identity = self._tracked[comm][0]
+        # Portas de outras placas ainda abertas não são candidatas
+        held = [other.com_port for other in list(self._tracked) if other is not comm and other.is_open()]
+        path = SerialCommunicator.find_device(identity, exclude=held)
+        if path is None or not comm.reopen(path):
+            return False
+        comm.request_snapshot()
+        return True
@@ -1,10 +1,15 @@
-from typing import Iterable, List, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Tuple
 
 SNAPSHOT_MARKER = 0x7F
+SNAPSHOT_SIZE = 6
+# Cada placa (firmware do Mega) envia as suas 48 teclas, portas A..F;
+# instalações maiores somam várias placas com um deslocamento por porta.
+KEYS_PER_BOARD = SNAPSHOT_SIZE * 8
+BOARD_MASK = (1 << KEYS_PER_BOARD) - 1
 
-# Estado local das 48 teclas (0=solta, 1=pressionada)
-def make_empty_state() -> List[int]:
-    return [0] * 48
+# Estado local das teclas (0=solta, 1=pressionada)
+def make_empty_state(num_keys: int = KEYS_PER_BOARD) -> List[int]:
+    return [0] * num_keys
 
 def key_to_port_bit(key_id: int) -> Tuple[str, int]:
     port = key_id // 8           # 0..5 => A..F
@@ -22,7 +27,7 @@ def decode_event_byte(val: int) -> Optional[Tuple[int, int]]:
         return None  # marcador é tratado fora (fluxo)
     pressed = (val >> 7) & 0x01
     key_id  = val & 0x3F
-    if key_id >= 48:
+    if key_id >= KEYS_PER_BOARD:
         return None
     return key_id, pressed
 
@@ -41,14 +46,34 @@ def decode_snapshot_bytes(snap: bytes) -> List[int]:
     """
     if len(snap) != 6:
         raise ValueError("Snapshot incompleto (esperados 6 bytes).")
-    flat = [0] * 48
-    for p in range(6):
+    flat = [0] * KEYS_PER_BOARD
+    for p in range(SNAPSHOT_SIZE):
         b = snap[p]
         for bit in range(8):
             key = (p * 8) + bit
             flat[key] = (b >> bit) & 1
     return flat
 
+def snapshot_to_mask(snap: bytes) -> int:
+    """
+    Converte os 6 bytes (A..F) na máscara de 48 bits: bit k = tecla k.
+    """
+    if len(snap) != SNAPSHOT_SIZE:
+        raise ValueError("Snapshot incompleto (esperados 6 bytes).")
+    return int.from_bytes(snap, "little")
+
+def mask_changes(old_mask: int, new_mask: int) -> List[Tuple[int, int]]:
+    """
+    Lista (key_id, pressed) das teclas que diferem entre duas máscaras (XOR).
+    """
+    diff = old_mask ^ new_mask
+    changes = []
+    while diff:
+        low = diff & -diff
+        changes.append((low.bit_length() - 1, 1 if new_mask & low else 0))
+        diff ^= low
+    return changes
+
 def read_snapshot_bytes(byte_iterable: Iterable[int]) -> Optional[bytes]:
     """
     Lê os 6 bytes de snapshot a partir de um iterador de bytes (após receber SNAPSHOT_MARKER).
@@ -62,3 +87,228 @@ def read_snapshot_bytes(byte_iterable: Iterable[int]) -> Optional[bytes]:
             return None
         buf.append(b)
     return bytes(buf)
+
+def consume_stream(buffer: bytearray,
+                   on_event: Callable[[int, int], None],
+                   on_snapshot: Callable[[bytes], None],
+                   on_invalid: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Decodifica de uma vez todos os registros completos presentes no buffer
+    (eventos de 1 byte e snapshots 0x7F + 6 bytes), na ordem em que chegaram.
+    Os bytes consumidos são removidos; um snapshot incompleto no final fica
+    no buffer aguardando o próximo bloco. Bytes de evento inválidos são
+    descartados (e repassados a on_invalid, se fornecido).
+    Retorna o número de bytes consumidos.
+    """
+    size = len(buffer)
+    i = 0
+    while i < size:
+        val = buffer[i]
+        if val == SNAPSHOT_MARKER:
+            end = i + 1 + SNAPSHOT_SIZE
+            if end > size:
+                break
+            on_snapshot(bytes(buffer[i + 1:end]))
+            i = end
+            continue
+        i += 1
+        evt = decode_event_byte(val)
+        if evt is not None:
+            on_event(evt[0], evt[1])
+        elif on_invalid is not None:
+            on_invalid(val)
+    if i:
+        del buffer[:i]
+    return i
+
+
+# ---------------------------------------------------------------------------
+# Decoder incremental (máquina de estados orientada a tabelas)
+# ---------------------------------------------------------------------------
+
+# Bits do byte A..F que o firmware nunca liga: PE0/PE1 são RX0/TX0 (MASK_E).
+# Um "snapshot" com esses bits ligados é ruído e o marcador é descartado.
+SNAPSHOT_RESERVED = bytes((0x00, 0x00, 0x00, 0x00, 0x03, 0x00))
+
+# BYTE_BITS[b] = posições (0..7) dos bits ligados em b
+BYTE_BITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if (value >> bit) & 1) for value in range(256)
+)
+
+_INVALID = -1
+_MARKER = -2
+
+
+def _event_code(value: int) -> int:
+    # O firmware só envia (estado << 7) | tecla com tecla 0..47, ou seja
+    # 0x00..0x2F (solta) e 0x80..0xAF (pressionada), além do marcador 0x7F;
+    # 0x30..0x7E e 0xB0..0xFF são ruído.
+    if value == SNAPSHOT_MARKER:
+        return _MARKER
+    key_id = value & 0x7F
+    if key_id >= KEYS_PER_BOARD:
+        return _INVALID
+    return (key_id << 1) | (value >> 7)
+
+
+# EVENT_TABLE[b] = (tecla << 1) | pressionada, _MARKER ou _INVALID
+EVENT_TABLE: Tuple[int, ...] = tuple(_event_code(value) for value in range(256))
+
+
+class PianoStreamDecoder:
+    """
+    Decoder incremental do fluxo de uma placa. Aceita blocos de qualquer
+    tamanho (um snapshot pode chegar cortado entre dois blocos) e devolve,
+    para cada bloco, a lista de mudanças (key_id, pressed) com ids já
+    deslocados por `offset`. Os registros são tuplas pré-alocadas: nenhum
+    objeto é criado por evento além do append na lista.
+
+    Estados: aguardando evento/marcador, ou coletando os 6 bytes de um
+    snapshot. Eventos que não mudam o estado (bounce) são filtrados; um
+    snapshot é comparado com o estado por XOR, byte a byte, e só as teclas
+    diferentes viram mudanças.
+
+    Ressincronização: bytes que o firmware não produz contam como ruído e
+    marcam o decoder como fora de sincronia; um snapshot com bits reservados
+    ligados é rejeitado e seus 6 bytes voltam a ser lidos como fluxo normal
+    (o marcador provavelmente era ruído). Conectando no meio do fluxo, o
+    primeiro snapshot válido (o firmware envia ao menos a cada 500 ms)
+    recoloca o estado em ordem.
+    """
+
+    __slots__ = (
+        "offset", "events", "bounces", "snapshots", "snapshot_changes",
+        "invalid", "out_of_range", "rejected_snapshots", "resyncs", "synced",
+        "last_snapshot", "_state", "_valid", "_payload", "_need", "_table",
+        "_records",
+    )
+
+    def __init__(self, offset: int = 0, key_mask: int = BOARD_MASK, initial_mask: int = 0) -> None:
+        self.offset = offset
+        self.events = 0
+        self.bounces = 0
+        self.snapshots = 0
+        self.snapshot_changes = 0
+        self.invalid = 0
+        self.out_of_range = 0
+        self.rejected_snapshots = 0
+        self.resyncs = 0
+        self.synced = False
+        self.last_snapshot = b""
+        key_mask &= BOARD_MASK
+        self._valid = key_mask.to_bytes(SNAPSHOT_SIZE, "little")
+        self._state = bytearray((initial_mask & key_mask).to_bytes(SNAPSHOT_SIZE, "little"))
+        self._payload = bytearray(SNAPSHOT_SIZE)
+        # Bytes que ainda faltam do snapshot em curso (0 = fora de snapshot)
+        self._need = 0
+        # _records[tecla] = ((id global, 0), (id global, 1))
+        self._records = tuple(
+            ((offset + key_id, 0), (offset + key_id, 1)) for key_id in range(KEYS_PER_BOARD)
+        )
+        # Por byte: (porta, bit, pressionada, registro) para eventos de teclas
+        # configuradas; senão o código da tabela (_MARKER, _INVALID ou a tecla
+        # fora do total configurado, >= 0).
+        table = []
+        for code in EVENT_TABLE:
+            if code < 0:
+                table.append(code)
+                continue
+            key_id, pressed = code >> 1, code & 1
+            if not (key_mask >> key_id) & 1:
+                table.append(key_id)
+                continue
+            port, bit = divmod(key_id, 8)
+            table.append((port, 1 << bit, pressed, self._records[key_id][pressed]))
+        self._table = tuple(table)
+
+    @property
+    def mask(self) -> int:
+        """Estado atual da placa (bit k = tecla k local)."""
+        return int.from_bytes(self._state, "little")
+
+    def reset(self) -> None:
+        """Descarta um snapshot pela metade (ex.: porta reaberta); mantém o estado."""
+        self._need = 0
+        self.synced = False
+
+    def feed(self, data) -> List[Tuple[int, int]]:
+        """Decodifica um bloco e devolve as mudanças na ordem em que ocorreram."""
+        changes: List[Tuple[int, int]] = []
+        self._consume(data, changes)
+        return changes
+
+    def feed_into(self, data, changes: List[Tuple[int, int]]) -> None:
+        """Como feed(), anexando a uma lista do chamador (reutilizável entre blocos)."""
+        self._consume(data, changes)
+
+    def _consume(self, data, changes: List[Tuple[int, int]]) -> None:
+        table = self._table
+        state = self._state
+        payload = self._payload
+        append = changes.append
+        need = self._need
+        events = bounces = invalid = out_of_range = 0
+        for value in data:
+            if need:
+                payload[SNAPSHOT_SIZE - need] = value
+                need -= 1
+                if not need:
+                    self._need = 0
+                    self._finish_snapshot(changes)
+                    need = self._need
+                continue
+            entry = table[value]
+            if entry.__class__ is tuple:
+                events += 1
+                port, bit, pressed, record = entry
+                current = state[port]
+                if (current & bit) == (bit if pressed else 0):
+                    bounces += 1
+                    continue
+                state[port] = current ^ bit
+                append(record)
+            elif entry == _MARKER:
+                need = SNAPSHOT_SIZE
+            elif entry == _INVALID:
+                invalid += 1
+                self.synced = False
+            else:
+                events += 1
+                out_of_range += 1
+        self._need = need
+        self.events += events
+        self.bounces += bounces
+        self.invalid += invalid
+        self.out_of_range += out_of_range
+
+    def _finish_snapshot(self, changes: List[Tuple[int, int]]) -> None:
+        payload = self._payload
+        if any(byte & reserved for byte, reserved in zip(payload, SNAPSHOT_RESERVED)):
+            # Marcador espúrio: os 6 bytes voltam ao fluxo (podem ser eventos)
+            self.rejected_snapshots += 1
+            self.synced = False
+            self._consume(bytes(payload), changes)
+            return
+
+        self.snapshots += 1
+        if not self.synced:
+            self.synced = True
+            if self.snapshots > 1:
+                self.resyncs += 1
+        state = self._state
+        valid = self._valid
+        records = self._records
+        count = 0
+        for port in range(SNAPSHOT_SIZE):
+            new = payload[port] & valid[port]
+            diff = state[port] ^ new
+            if not diff:
+                continue
+            state[port] = new
+            base = port * 8
+            for bit in BYTE_BITS[diff]:
+                changes.append(records[base + bit][(new >> bit) & 1])
+            count += len(BYTE_BITS[diff])
+        if count:
+            self.snapshot_changes += count
+            self.last_snapshot = bytes(payload)
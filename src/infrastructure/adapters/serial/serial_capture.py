@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+# Arquivo de captura: cabeçalho fixo seguido de registros
+#   t_ns (monotonic_ns da leitura) + tamanho + bytes recebidos.
+# Só cresce por append; um registro cortado no fim (processo encerrado no
+# meio da escrita) é ignorado na leitura e descartado antes de um novo append.
+CAPTURE_MAGIC = b"MPCP"
+CAPTURE_VERSION = 1
+_HEADER = struct.Struct("<4sHH")  # magic, versão, reservado
+_RECORD = struct.Struct("<QI")  # t_ns, tamanho
+
+
+class CaptureWriter:
+    """
+    Grava os blocos recebidos da serial com o timestamp da leitura. A escrita
+    é bufferizada e descarregada no máximo a cada flush_interval segundos,
+    para não colocar um write() de disco em cada bloco do loop de recepção.
+    Ao continuar uma captura existente, um registro cortado no fim é
+    removido antes, senão tudo gravado depois dele ficaria inacessível.
+    """
+
+    def __init__(self, path: Union[str, Path], flush_interval: float = 0.5) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            _check_header(self.path)
+            _truncate_partial_record(self.path)
+        self._file = open(self.path, "ab", buffering=64 * 1024)
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, 0))
+        self._flush_interval_ns = int(flush_interval * 1e9)
+        self._last_flush_ns = time.monotonic_ns()
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, data: Union[bytes, memoryview], t_ns: Optional[int] = None) -> None:
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        self._file.write(_RECORD.pack(t_ns, len(data)))
+        self._file.write(data)
+        self.records += 1
+        self.bytes += len(data)
+        if t_ns - self._last_flush_ns >= self._flush_interval_ns:
+            self._file.flush()
+            self._last_flush_ns = t_ns
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def _check_header(path: Path) -> None:
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"Captura {path} truncada.")
+    magic, version, _ = _HEADER.unpack(header)
+    if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+        raise ValueError(f"{path} não é um arquivo de captura reconhecido.")
+
+
+def _complete_length(path: Path) -> int:
+    """Tamanho até o fim do último registro completo."""
+
+    size = path.stat().st_size
+    pos = _HEADER.size
+    with open(path, "rb") as f:
+        while pos + _RECORD.size <= size:
+            f.seek(pos)
+            _, length = _RECORD.unpack(f.read(_RECORD.size))
+            if pos + _RECORD.size + length > size:
+                break
+            pos += _RECORD.size + length
+    return pos
+
+
+def _truncate_partial_record(path: Path) -> None:
+    length = _complete_length(path)
+    if length < path.stat().st_size:
+        with open(path, "r+b") as f:
+            f.truncate(length)
+
+
+class CaptureReader:
+    """
+    Leitura da captura via mmap: os registros são fatias (memoryview) do
+    arquivo mapeado, sem copiar os dados.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        _check_header(self.path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview]]:
+        view = self._view
+        end = len(view)
+        pos = _HEADER.size
+        while pos + _RECORD.size <= end:
+            t_ns, length = _RECORD.unpack_from(view, pos)
+            pos += _RECORD.size
+            if pos + length > end:
+                break
+            yield t_ns, view[pos:pos + length]
+            pos += length
+
+    def stats(self) -> Tuple[int, int, int]:
+        """Retorna (registros, bytes, duração em ns)."""
+
+        records = total = 0
+        first = last = 0
+        for t_ns, data in self:
+            if not records:
+                first = t_ns
+            last = t_ns
+            records += 1
+            total += len(data)
+        return records, total, last - first
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # Ainda há fatias em uso; o mapeamento é liberado junto com elas
+            pass
+        self._file.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
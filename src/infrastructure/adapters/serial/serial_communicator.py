@@ -1,14 +1,37 @@
 # serial_communicator.py
+import io
+import os
 import time
-from typing import List, Callable, Optional
+from typing import Callable, Collection, List, NamedTuple, Optional, Union
 from serial.tools import list_ports
 import serial
 
+from .serial_capture import CaptureWriter
+
+# Pede ao firmware um snapshot imediato (firmware antigo ignora o byte)
+SNAPSHOT_REQUEST = b"s"
+
+
+class DeviceIdentity(NamedTuple):
+    """O que identifica a placa além do caminho, que pode mudar ao reconectar."""
+
+    path: str
+    vid: Optional[int]
+    pid: Optional[int]
+    serial_number: Optional[str]
+    # Porta física USB (ex.: "1-1.2:1.0"): distingue placas iguais sem número
+    # de série quando voltam para a mesma entrada.
+    location: Optional[str] = None
+
+
 class SerialCommunicator:
     """
     Serviço de comunicação serial com foco em baixa latência para RECEBIMENTO.
     - Abre a porta com timeout pequeno (não-bloqueante).
-    - Fornece um loop de recepção que lê byte a byte e dispara callbacks.
+    - Fornece um loop de recepção que lê byte a byte (on_byte) ou em blocos
+      (on_chunk), drenando de uma vez o que já estiver no buffer do driver.
+    - Opcionalmente grava tudo que recebe (com timestamp) em um arquivo de
+      captura, que pode ser reproduzido depois por src/replay.py.
     - Não implementa a lógica do protocolo: isso fica no decoder (módulo separado).
     """
 
@@ -17,17 +40,24 @@ class SerialCommunicator:
                  baud_rate: int = 1_000_000,
                  read_timeout: float = 0.01,
                  open_for_receive: bool = True,
-                 logger=None):
+                 logger=None,
+                 chunk_size: int = 4096,
+                 capture_path: Optional[str] = None):
         self.serial_port: Optional[serial.Serial] = None
         self.com_port = com_port
         self.baud_rate = baud_rate
         self.read_timeout = read_timeout
+        self.chunk_size = max(1, int(chunk_size))
         self.logger = logger
         self._opened = False
+        self.capture_path = capture_path
+        self._capture: Optional[CaptureWriter] = None
+        self._raw: Optional[io.FileIO] = None
+        self._buffer: Optional[bytearray] = None
+        self._view: Optional[memoryview] = None
 
         if open_for_receive:
-            available_ports = self.list_available_ports()
-            if self.com_port and self.com_port in available_ports:
+            if self.com_port and self.is_port_available(self.com_port):
                 try:
                     self.start_com_port()
                 except Exception as e:
@@ -44,6 +74,72 @@ class SerialCommunicator:
     def list_available_ports() -> List[str]:
         return [p.device for p in list_ports.comports()]
 
+    @staticmethod
+    def find_usb_ports(usb_ids, serial_number: Optional[str] = None) -> List[str]:
+        """
+        Portas de dispositivos USB com (VID, PID) em `usb_ids` e, se dado, o
+        número de série; em ordem de `usb_ids`, depois pelo nome da porta.
+        """
+        rank = {usb_id: index for index, usb_id in enumerate(usb_ids)}
+        found = []
+        for info in list_ports.comports():
+            usb_id = (info.vid, info.pid)
+            if usb_id not in rank:
+                continue
+            if serial_number and info.serial_number != serial_number:
+                continue
+            found.append((rank[usb_id], info.device))
+        return [device for _, device in sorted(found)]
+
+    @staticmethod
+    def device_identity(com_port: str) -> DeviceIdentity:
+        """Identidade USB da porta; sem dados USB (pty, serial nativa) só o caminho."""
+        real = os.path.realpath(com_port)
+        for info in list_ports.comports():
+            if info.device in (com_port, real):
+                return DeviceIdentity(
+                    com_port, info.vid, info.pid, info.serial_number, getattr(info, "location", None)
+                )
+        return DeviceIdentity(com_port, None, None, None)
+
+    @staticmethod
+    def find_device(identity: DeviceIdentity, exclude: Collection[str] = ()) -> Optional[str]:
+        """
+        Caminho atual do dispositivo: pelo número de série, senão pelo VID:PID
+        (restrito à mesma porta USB física, se ela ainda bater), senão o
+        próprio caminho se existir. Caminhos em `exclude` (portas de outras
+        placas já abertas) ficam de fora; havendo mais de um candidato, não
+        há como saber qual é a placa e nada é devolvido.
+        """
+        excluded = {os.path.realpath(path) for path in exclude}
+        if identity.vid is None:
+            if os.path.exists(identity.path) and os.path.realpath(identity.path) not in excluded:
+                return identity.path
+            return None
+        matches = [
+            info for info in list_ports.comports()
+            if (info.vid, info.pid) == (identity.vid, identity.pid)
+            and (not identity.serial_number or info.serial_number == identity.serial_number)
+            and os.path.realpath(info.device) not in excluded
+        ]
+        if identity.location:
+            same_socket = [info for info in matches if getattr(info, "location", None) == identity.location]
+            matches = same_socket or matches
+        if len(matches) != 1:
+            return None
+        device = matches[0].device
+        if device == os.path.realpath(identity.path):
+            return identity.path  # mantém o link estável (/dev/serial/by-id/...)
+        return device
+
+    @classmethod
+    def is_port_available(cls, com_port: str) -> bool:
+        # Além das portas enumeradas, aceita caminhos de dispositivo que existam
+        # (pseudo-terminais, links em /dev/serial/by-id), que o list_ports não lista.
+        if com_port in cls.list_available_ports():
+            return True
+        return os.name == "posix" and os.path.exists(com_port)
+
     def start_com_port(self):
         # Timeout pequeno para leitura não bloquear o loop
         self.serial_port = serial.Serial(
@@ -51,6 +147,9 @@ class SerialCommunicator:
             self.baud_rate,
             timeout=self.read_timeout,
             write_timeout=0,
+            # Lock exclusivo (flock no POSIX): duas instâncias nunca leem o
+            # mesmo tty, inclusive após uma reconexão.
+            exclusive=True,
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
@@ -71,6 +170,7 @@ class SerialCommunicator:
             self.logger.info(f"Porta {self.com_port} aberta a {self.baud_rate} bps")
 
     def close(self):
+        self.stop_capture()
         if getattr(self, "serial_port", None):
             try:
                 self.serial_port.close()
@@ -82,31 +182,185 @@ class SerialCommunicator:
             finally:
                 self.serial_port = None
                 self._opened = False
+                self._raw = None
+
+    def release_port(self) -> None:
+        """
+        Fecha só a porta (dispositivo desconectado), mantendo captura e
+        buffer para um reopen() posterior.
+        """
+        sp = self.serial_port
+        self.serial_port = None
+        self._opened = False
+        self._raw = None
+        if sp is not None:
+            try:
+                sp.close()
+            except Exception:
+                pass
+
+    def reopen(self, com_port: Optional[str] = None) -> bool:
+        """Reabre após release_port(), possivelmente num novo caminho."""
+        if com_port:
+            self.com_port = com_port
+        try:
+            self.start_com_port()
+        except Exception:
+            self.serial_port = None
+            self._opened = False
+            return False
+        if self._buffer is not None:
+            self.use_read_buffer()
+        return True
+
+    def request_snapshot(self) -> bool:
+        """Pede ao firmware o estado completo das teclas sem esperar os 500 ms."""
+        try:
+            self.serial_port.write(SNAPSHOT_REQUEST)
+            return True
+        except Exception:
+            return False
 
     def is_open(self) -> bool:
         return bool(self.serial_port and self.serial_port.is_open and self._opened)
 
+    def fileno(self) -> Optional[int]:
+        """Descritor da porta (POSIX), para multiplexar com selectors."""
+        try:
+            return self.serial_port.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def use_read_buffer(self) -> bool:
+        """
+        Leituras direto do descritor para um buffer pré-alocado (POSIX, modo
+        tempo real): read_available(wait=True) passa a devolver um memoryview
+        desse buffer, válido até a próxima leitura, em vez de alocar um bytes
+        por bloco. Só para leitura guiada por select (SerialMultiplexer): o
+        descritor do PySerial é não bloqueante.
+        """
+        fd = getattr(self.serial_port, "fd", None)
+        if fd is None:
+            return False
+        if self._buffer is None:
+            self._buffer = bytearray(self.chunk_size)
+            self._view = memoryview(self._buffer)
+        self._raw = io.FileIO(fd, "rb", closefd=False)
+        return True
+
+    def read_available(self, wait: bool = False) -> Union[bytes, memoryview]:
+        """
+        Lê o que já está no buffer do driver (até chunk_size) sem bloquear.
+        Com wait=True e buffer vazio, espera até read_timeout pelo primeiro
+        byte e drena o restante da rajada na mesma chamada; o PySerial
+        sinaliza desconexão com exceção nesse caso (fd pronto mas sem dados).
+        """
+        raw = self._raw
+        if raw is not None and wait:
+            count = raw.readinto(self._buffer)
+            if count is None:
+                return b""
+            if not count:
+                raise serial.SerialException(
+                    "device reports readiness to read but returned no data "
+                    "(device disconnected or multiple access on port?)"
+                )
+            data = self._view[:count]
+            if self._capture is not None:
+                self._capture.write(data)
+            return data
+        sp = self.serial_port
+        chunk_size = self.chunk_size
+        waiting = sp.in_waiting
+        if waiting:
+            data = sp.read(min(waiting, chunk_size))
+        elif not wait:
+            return b""
+        else:
+            data = sp.read(1)
+            if not data:
+                return b""
+            waiting = sp.in_waiting
+            if waiting and chunk_size > 1:
+                data += sp.read(min(waiting, chunk_size - 1))
+        if data and self._capture is not None:
+            self._capture.write(data)
+        return data
+
     def receive_loop(self,
-                     on_byte: Callable[[int], None],
-                     should_stop: Optional[Callable[[], bool]] = None):
+                     on_byte: Optional[Callable[[int], None]] = None,
+                     should_stop: Optional[Callable[[], bool]] = None,
+                     on_chunk: Optional[Callable[[Union[bytes, memoryview]], None]] = None):
+        """
+        Loop de recepção. Com on_chunk, cada leitura entrega um bloco inteiro
+        (até chunk_size bytes) em uma única chamada; caso contrário mantém o
+        modo legado de um callback on_byte por byte.
+        """
         if not self.is_open():
             if self.logger:
                 self.logger.warning("receive_loop: porta não está aberta.")
             return
+        if on_chunk is None and on_byte is None:
+            raise ValueError("receive_loop precisa de on_byte ou on_chunk.")
+
+        capture = self._capture if self.start_capture() else None
 
         sp = self.serial_port
         try:
-            while True:
-                if should_stop and should_stop():
-                    break
-                b = sp.read(1)
-                if not b:
-                    continue
-                on_byte(b[0])
+            if on_chunk is not None:
+                self._receive_chunks(on_chunk, should_stop)
+            else:
+                while True:
+                    if should_stop and should_stop():
+                        break
+                    b = sp.read(1)
+                    if not b:
+                        continue
+                    if capture is not None:
+                        capture.write(b)
+                    on_byte(b[0])
         except KeyboardInterrupt:
             if self.logger:
                 self.logger.info("receive_loop interrompido pelo usuário (Ctrl+C).")
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Erro no receive_loop: {e}")
+        finally:
+            self.stop_capture()
         # Não fecha aqui; quem chamou decide quando fechar
+
+    def start_capture(self) -> bool:
+        """Abre o arquivo de captura (se configurado). Retorna True se ativo."""
+        if self._capture is not None:
+            return True
+        if not self.capture_path:
+            return False
+        try:
+            self._capture = CaptureWriter(self.capture_path)
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.error(f"Não foi possível abrir a captura {self.capture_path}: {e}")
+            return False
+        if self.logger:
+            self.logger.info(f"Gravando captura em {self.capture_path}")
+        return True
+
+    def stop_capture(self):
+        if self._capture is None:
+            return
+        self._capture.close()
+        if self.logger:
+            self.logger.info(
+                f"Captura encerrada: {self._capture.records} blocos, {self._capture.bytes} bytes."
+            )
+        self._capture = None
+
+    def _receive_chunks(self, on_chunk, should_stop):
+        while True:
+            if should_stop and should_stop():
+                break
+            # Bloqueia até read_timeout pelo primeiro byte e drena o restante
+            # da rajada na mesma iteração (a captura é gravada em read_available)
+            data = self.read_available(wait=True)
+            if data:
+                on_chunk(data)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import os
+import selectors
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .piano_decoder import KEYS_PER_BOARD
+from .serial_communicator import SerialCommunicator
+
+# (porta, deslocamento da primeira tecla da placa no espaço global)
+BoardPort = Tuple[str, int]
+
+
+def parse_board_ports(specs: Sequence[str]) -> List[BoardPort]:
+    """
+    Converte "PORTA" ou "PORTA@DESLOCAMENTO" em (porta, deslocamento).
+    Sem deslocamento explícito, cada placa ocupa as 48 teclas seguintes à
+    anterior (J1..J4 do All_4_boards em sequência).
+    """
+
+    boards: List[BoardPort] = []
+    next_offset = 0
+    for spec in specs:
+        port, sep, offset_raw = spec.rpartition("@")
+        if not sep:
+            port, offset = spec, next_offset
+        else:
+            try:
+                offset = int(offset_raw)
+            except ValueError:
+                raise ValueError(f"Deslocamento inválido em '{spec}'.") from None
+            if offset < 0:
+                raise ValueError(f"Deslocamento negativo em '{spec}'.")
+        if not port:
+            raise ValueError(f"Porta vazia em '{spec}'.")
+        boards.append((port, offset))
+        next_offset = offset + KEYS_PER_BOARD
+
+    ranges = sorted((offset, port) for port, offset in boards)
+    for (offset_a, port_a), (offset_b, port_b) in zip(ranges, ranges[1:]):
+        if offset_b < offset_a + KEYS_PER_BOARD:
+            raise ValueError(f"As teclas de {port_a} e {port_b} se sobrepõem.")
+    return boards
+
+
+def boards_key_count(boards: Sequence[BoardPort]) -> int:
+    return max((offset + KEYS_PER_BOARD for _, offset in boards), default=KEYS_PER_BOARD)
+
+
+class SerialMultiplexer:
+    """
+    Recepção de várias portas seriais em uma única thread. Em POSIX espera
+    por qualquer uma com selectors (epoll/kqueue) e entrega o bloco lido ao
+    callback da porta; onde as portas não têm descritor (Windows) cai para
+    uma varredura de in_waiting com pausas curtas.
+
+    Um canal de controle (ponta de leitura de um multiprocessing.Pipe) pode
+    ser registrado junto: o select acorda tanto por dados da serial quanto
+    por comandos, então com o teclado parado a thread fica bloqueada sem
+    timeout e sem consumir CPU.
+    """
+
+    def __init__(self, logger=None, wait_timeout: float = 0.1, poll_interval: float = 0.001) -> None:
+        self.logger = logger
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._handlers: Dict[SerialCommunicator, Callable[[bytes], None]] = {}
+        self._control = None
+        self._on_command: Optional[Callable[[dict], None]] = None
+        self._on_disconnect: Optional[Callable[[SerialCommunicator, Exception], None]] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._timers: List[Tuple[Callable[[], Optional[int]], Callable[[int], None]]] = []
+        self._running = False
+        self.control_closed = False
+
+    def register(self, comm: SerialCommunicator, on_chunk: Callable[[bytes], None]) -> None:
+        """Pode ser chamado com run() em andamento (porta reaberta)."""
+        self._handlers[comm] = on_chunk
+        if self._selector is not None:
+            self._selector.register(comm.fileno(), selectors.EVENT_READ, comm)
+
+    def set_disconnect_handler(self, on_disconnect: Callable[[SerialCommunicator, Exception], None]) -> None:
+        """
+        Chamado quando a leitura de uma porta falha (placa desconectada), já
+        fora da recepção. Com handler, run() segue mesmo sem portas: quem
+        trata a queda pode reabrir a porta e registrá-la de novo.
+        """
+        self._on_disconnect = on_disconnect
+
+    def set_control(self, connection, on_command: Callable[[dict], None]) -> None:
+        self._control = connection
+        self._on_command = on_command
+
+    def add_timer(self, next_deadline: Callable[[], Optional[int]], on_deadline: Callable[[int], None]) -> None:
+        """
+        Prazo sem dados da serial (ex.: janela de acorde): o select acorda no
+        menor next_deadline() (monotonic_ns, None = nenhum) e chama
+        on_deadline(agora) dos que venceram.
+        """
+        self._timers.append((next_deadline, on_deadline))
+
+    def _run_timers(self) -> Optional[float]:
+        """Dispara os prazos vencidos; devolve os segundos até o próximo."""
+        if not self._timers:
+            return None
+        now = time.monotonic_ns()
+        nearest = None
+        for next_deadline, on_deadline in self._timers:
+            deadline = next_deadline()
+            if deadline is not None and deadline <= now:
+                on_deadline(now)
+                deadline = next_deadline()
+            if deadline is not None and (nearest is None or deadline < nearest):
+                nearest = deadline
+        return None if nearest is None else max(0.0, (nearest - now) / 1e9)
+
+    def stop(self) -> None:
+        """Encerra run() ao fim da rodada atual (chamado de dentro dos callbacks)."""
+        self._running = False
+
+    def _drop(self, comm: SerialCommunicator, error: Exception) -> None:
+        if self.logger:
+            self.logger.error(f"Erro lendo {comm.com_port}: {error}. Porta removida da recepção.")
+        self._handlers.pop(comm, None)
+        if self._selector is not None:
+            for key in list(self._selector.get_map().values()):
+                if key.data is comm:
+                    self._selector.unregister(key.fd)
+        if self._on_disconnect is not None:
+            self._on_disconnect(comm, error)
+
+    def _read(self, comm: SerialCommunicator, ready: bool = False) -> bool:
+        try:
+            data = comm.read_available(wait=ready)
+        except Exception as e:  # desconexão (SerialException/OSError)
+            self._drop(comm, e)
+            return False
+        if data:
+            self._handlers[comm](data)
+            return True
+        return False
+
+    def _read_control(self) -> None:
+        try:
+            while self._running and self._control.poll():
+                self._on_command(self._control.recv())
+        except (EOFError, OSError):
+            # Quem controla o processo sumiu: não há mais como pedir a parada
+            if self.logger:
+                self.logger.warning("Canal de controle fechado; encerrando recepção.")
+            self._control = None
+            self.control_closed = True
+            self._running = False
+
+    def _active(self) -> bool:
+        return self._running and bool(
+            self._handlers or self._control is not None or self._on_disconnect is not None
+        )
+
+    def run(self, should_stop: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Recebe até stop(), o fechamento do canal de controle ou a perda de
+        todas as portas (sem set_disconnect_handler). should_stop é o modo legado (sem canal de controle),
+        consultado a cada wait_timeout.
+        """
+        self._running = True
+        try:
+            # No Windows nem a serial nem o Pipe são selecionáveis
+            if os.name == "posix" and all(comm.fileno() is not None for comm in self._handlers):
+                self._run_selector(should_stop)
+            else:
+                self._run_polling(should_stop)
+        finally:
+            self._running = False
+
+    def _run_selector(self, should_stop) -> None:
+        timeout = self.wait_timeout if should_stop else None
+        with selectors.DefaultSelector() as selector:
+            for comm in self._handlers:
+                selector.register(comm.fileno(), selectors.EVENT_READ, comm)
+            if self._control is not None:
+                selector.register(self._control.fileno(), selectors.EVENT_READ, None)
+            self._selector = selector
+            try:
+                self._select_loop(selector, should_stop, timeout)
+            finally:
+                self._selector = None
+
+    def _select_loop(self, selector, should_stop, timeout) -> None:
+        while self._active():
+            if should_stop and should_stop():
+                break
+            wait = self._run_timers()
+            if wait is not None and (timeout is None or wait < timeout):
+                select_timeout = wait
+            else:
+                select_timeout = timeout
+            for key, _ in selector.select(select_timeout):
+                comm = key.data
+                if comm is None:
+                    self._read_control()
+                    if self._control is None:
+                        break
+                elif comm in self._handlers:
+                    self._read(comm, ready=True)
+
+    def _run_polling(self, should_stop) -> None:
+        while self._active():
+            if should_stop and should_stop():
+                break
+            if self._control is not None:
+                self._read_control()
+            self._run_timers()
+            received = False
+            for comm in list(self._handlers):
+                received = self._read(comm) or received
+            if not received:
+                time.sleep(self.poll_interval)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import struct
+from typing import Tuple
+
+from .key_event_ring import KeyEventRing
+
+# Bitmap de um acorde: até 256 teclas (5 placas de 48 = 240 cabem).
+GESTURE_MAX_KEYS = 256
+GESTURE_KEYS_BYTES = GESTURE_MAX_KEYS // 8
+
+# Entrada: seq, timestamp do início do gesto, duração (ns, -1 = desconhecida),
+# tecla, tipo, quantidade e bitmap das teclas (só nos acordes).
+_ENTRY = struct.Struct(f"<QqqHBB{GESTURE_KEYS_BYTES}s4x")
+
+GESTURE_CHORD = 1
+GESTURE_HOLD = 2
+GESTURE_REPEAT = 3
+GESTURE_RELEASE = 4
+GESTURE_NAMES = {
+    GESTURE_CHORD: "chord",
+    GESTURE_HOLD: "hold",
+    GESTURE_REPEAT: "repeat",
+    GESTURE_RELEASE: "release",
+}
+
+# (seq, t_ns, duration_ns, key_id, kind, count, keys)
+Gesture = Tuple[int, int, int, int, int, int, bytes]
+
+
+def gesture_keys(bitmap: bytes):
+    """Ids das teclas ligadas no bitmap de um acorde, em ordem crescente."""
+
+    mask = int.from_bytes(bitmap, "little")
+    keys = []
+    while mask:
+        low = mask & -mask
+        keys.append(low.bit_length() - 1)
+        mask ^= low
+    return keys
+
+
+class GestureRing(KeyEventRing):
+    """
+    Anel de gestos (acordes, notas seguradas, repetições e solturas) em
+    memória compartilhada, com a mesma disciplina de escritor único e
+    leitura por cursor do KeyEventRing.
+    """
+
+    _entry = _ENTRY
+
+    def append(self, kind: int, t_ns: int, duration_ns: int, key_id: int,
+               count: int = 1, keys: bytes = b"") -> int:
+        return self._publish(t_ns, duration_ns, key_id, kind, count, keys)
+
+    def extend(self, changes, t_ns: int) -> int:
+        raise TypeError("GestureRing recebe gestos via append().")
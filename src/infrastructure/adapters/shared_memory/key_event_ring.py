@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+from .shared_block import attach_shared_memory, create_shared_memory
+
+# Cabeçalho: sequência do último evento publicado (0 = nenhum) e capacidade.
+_HEADER = struct.Struct("<QQ")
+_HEAD = struct.Struct("<Q")
+# Entrada: seq, timestamp (time.monotonic_ns na leitura da serial), tecla, estado.
+_ENTRY = struct.Struct("<QqHB5x")
+
+KeyEvent = Tuple[int, int, int, int]  # (seq, t_ns, key_id, pressed)
+
+
+class KeyEventRing:
+    """
+    Buffer circular de eventos de tecla em memória compartilhada.
+    O evento de sequência s ocupa o slot s % capacity. O receptor (único
+    escritor) grava a entrada e só então avança o head; leitores copiam a
+    faixa desejada e descartam entradas que possam ter sido sobrescritas
+    durante a cópia, reportando a perda em vez de devolver dados errados.
+    Subclasses trocam `_entry` (o primeiro campo é sempre a sequência).
+    """
+
+    _entry = _ENTRY
+
+    def __init__(self, shm, capacity: int, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        self.capacity = capacity
+        self._buf = shm.buf
+        self._head = 0
+
+    @classmethod
+    def create(cls, capacity: int = 4096) -> "KeyEventRing":
+        shm = create_shared_memory(_HEADER.size + capacity * cls._entry.size)
+        _HEADER.pack_into(shm.buf, 0, 0, capacity)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "KeyEventRing":
+        shm = attach_shared_memory(name)
+        _, capacity = _HEADER.unpack_from(shm.buf, 0)
+        return cls(shm, capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        return (type(self).attach, (self.name,))
+
+    # ---------------------------------------------------------------- escrita
+    def open_writer(self) -> None:
+        """Retoma a sequência publicada (o receptor pode ter reiniciado)."""
+
+        self._head = self.head()
+
+    def append(self, key_id: int, pressed: int, t_ns: int) -> int:
+        # Mesmo corpo de _publish, sem a chamada extra: é o caminho por tecla
+        seq = self._head + 1
+        entry = self._entry
+        entry.pack_into(self._buf, _HEADER.size + (seq % self.capacity) * entry.size, seq, t_ns, key_id, pressed)
+        _HEAD.pack_into(self._buf, 0, seq)
+        self._head = seq
+        return seq
+
+    def _publish(self, *fields) -> int:
+        """Grava (seq, *fields) com o `_entry` da classe e só então avança o head."""
+
+        seq = self._head + 1
+        entry = self._entry
+        entry.pack_into(self._buf, _HEADER.size + (seq % self.capacity) * entry.size, seq, *fields)
+        _HEAD.pack_into(self._buf, 0, seq)
+        self._head = seq
+        return seq
+
+    def extend(self, changes: Iterable[Tuple[int, int]], t_ns: int) -> int:
+        for key_id, pressed in changes:
+            self.append(key_id, pressed, t_ns)
+        return self._head
+
+    # ---------------------------------------------------------------- leitura
+    def head(self) -> int:
+        return _HEAD.unpack_from(self._buf, 0)[0]
+
+    def read_since(self, since: int, limit: int = 0) -> Dict[str, object]:
+        """
+        Eventos com seq > since, em ordem. Se o cursor ficou para trás da
+        janela retida pelo anel, "lost" indica quantos eventos foram perdidos
+        e a leitura recomeça no evento mais antigo ainda disponível.
+        """
+
+        capacity = self.capacity
+        entry_struct = self._entry
+        head = self.head()
+        since = max(0, min(since, head))
+        start = max(since + 1, head - capacity + 2, 1)
+        end = head if not limit else min(head, start + limit - 1)
+
+        raw: List[bytes] = []
+        for seq in range(start, end + 1):
+            offset = _HEADER.size + (seq % capacity) * entry_struct.size
+            raw.append(bytes(self._buf[offset:offset + entry_struct.size]))
+
+        # O escritor pode ter dado a volta durante a cópia: só são confiáveis
+        # entradas cujo slot ainda não pode ter sido reutilizado.
+        safe_from = self.head() - capacity + 2
+        events: List[KeyEvent] = []
+        for expected, chunk in zip(range(start, end + 1), raw):
+            entry = entry_struct.unpack(chunk)
+            if expected < safe_from or entry[0] != expected:
+                continue
+            events.append(entry)
+
+        first = events[0][0] if events else end + 1
+        return {
+            "events": events,
+            "head": head,
+            "oldest": max(1, head - capacity + 2),
+            "lost": first - since - 1,
+            "cursor": events[-1][0] if events else max(since, end),
+        }
+
+    # ------------------------------------------------------------ ciclo de vida
+    def close(self) -> None:
+        self._buf = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import struct
+import time
+from typing import Iterable, List, Tuple
+
+from .shared_block import attach_shared_memory, create_shared_memory
+
+# Layout do bloco (little-endian):
+#   [0:8]   contador do seqlock (par = estável, ímpar = escrita em andamento)
+#   [8:16]  sequência monotônica (incrementa a cada mudança de tecla)
+#   [16:]   bitmap das teclas (bit k do byte p = tecla p*8 + k, igual ao A..F)
+_HEADER = struct.Struct("<QQ")
+_LOCK = struct.Struct("<Q")
+
+# Quanto um leitor espera o contador voltar a ser par. Uma escrita leva
+# microssegundos; passado esse prazo, o escritor morreu no meio de uma
+# (terminate/SIGKILL) e a leitura devolve a última cópia em vez de girar
+# para sempre.
+SNAPSHOT_TIMEOUT_NS = 10_000_000
+_SNAPSHOT_SPINS = 100
+
+
+class KeyStateBlock:
+    """
+    Estado das teclas em memória compartilhada protegido por seqlock.
+    - Um único escritor (processo receptor) atualiza sem locks entre processos.
+    - Leitores (servidor web) copiam o bloco inteiro de uma vez e descartam a
+      cópia se o contador mudou durante a leitura (leitura "rasgada").
+    """
+
+    def __init__(self, shm, num_keys: int, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        self.num_keys = num_keys
+        self.bitmap_size = (num_keys + 7) // 8
+        self.size = _HEADER.size + self.bitmap_size
+        self._buf = shm.buf
+        # Cópia local do escritor: evita ler o bloco para montar a próxima versão
+        self._bitmap = bytearray(self.bitmap_size)
+        self._lock = 0
+        self._seq = 0
+        # Contador ímpar que já estourou o prazo: as próximas leituras não esperam
+        self._stuck_lock = None
+
+    @classmethod
+    def create(cls, num_keys: int = 48) -> "KeyStateBlock":
+        size = _HEADER.size + (num_keys + 7) // 8
+        return cls(create_shared_memory(size), num_keys, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, num_keys: int = 48) -> "KeyStateBlock":
+        return cls(attach_shared_memory(name), num_keys, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        # Processos criados por spawn recebem apenas o nome e reanexam
+        return (KeyStateBlock.attach, (self.name, self.num_keys))
+
+    # ---------------------------------------------------------------- escrita
+    def open_writer(self) -> None:
+        """
+        Carrega a cópia local do escritor a partir do bloco. Deve ser chamado
+        pelo processo receptor antes da primeira escrita (inclusive após um
+        reinício), para que a sequência nunca retroceda.
+        """
+
+        self._lock, self._seq = _HEADER.unpack_from(self._buf, 0)
+        self._lock += self._lock & 1
+        self._bitmap[:] = self._buf[_HEADER.size:self.size]
+
+    def update(self, changes: Iterable[Tuple[int, int]]) -> int:
+        """
+        Aplica (key_id, pressed) ao bitmap e publica numa única escrita.
+        A sequência avança uma unidade por mudança. Retorna a nova sequência.
+        """
+
+        bitmap = self._bitmap
+        count = 0
+        for key_id, pressed in changes:
+            byte, bit = divmod(key_id, 8)
+            if pressed:
+                bitmap[byte] |= 1 << bit
+            else:
+                bitmap[byte] &= ~(1 << bit) & 0xFF
+            count += 1
+        if count:
+            self._publish(self._seq + count)
+        return self._seq
+
+    def set_key(self, key_id: int, pressed: int) -> int:
+        return self.update(((key_id, pressed),))
+
+    def _publish(self, seq: int) -> None:
+        buf = self._buf
+        lock = self._lock + 1
+        _LOCK.pack_into(buf, 0, lock)  # ímpar: leitores vão repetir
+        _LOCK.pack_into(buf, 8, seq)
+        buf[_HEADER.size:self.size] = self._bitmap
+        self._lock = lock + 1
+        _LOCK.pack_into(buf, 0, self._lock)
+        self._seq = seq
+
+    # ---------------------------------------------------------------- leitura
+    def snapshot(self) -> Tuple[int, bytes]:
+        """Retorna (sequência, bitmap) consistentes lidos com uma única cópia."""
+
+        buf = self._buf
+        size = self.size
+        attempts = 0
+        deadline = None
+        while True:
+            raw = bytes(buf[:size])
+            lock, seq = _HEADER.unpack_from(raw, 0)
+            if not lock & 1:
+                if _LOCK.unpack_from(buf, 0)[0] == lock:
+                    return seq, raw[_HEADER.size:]
+                continue
+            if lock == self._stuck_lock:
+                return seq, raw[_HEADER.size:]
+            attempts += 1
+            if attempts < _SNAPSHOT_SPINS:
+                continue
+            # O escritor pode ter perdido a CPU no meio da escrita: cede a vez
+            now = time.monotonic_ns()
+            if deadline is None:
+                deadline = now + SNAPSHOT_TIMEOUT_NS
+            elif now >= deadline:
+                self._stuck_lock = lock
+                return seq, raw[_HEADER.size:]
+            time.sleep(0)
+
+    def snapshot_mask(self) -> Tuple[int, int]:
+        """Retorna (sequência, máscara) com bit k = tecla k pressionada."""
+
+        seq, bitmap = self.snapshot()
+        return seq, int.from_bytes(bitmap, "little")
+
+    def pressed_flags(self) -> Tuple[int, List[bool]]:
+        seq, bitmap = self.snapshot()
+        return seq, bitmap_to_flags(bitmap, self.num_keys)
+
+    # ------------------------------------------------------------ ciclo de vida
+    def close(self) -> None:
+        self._buf = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def bitmap_to_flags(bitmap: bytes, num_keys: int) -> List[bool]:
+    mask = int.from_bytes(bitmap, "little")
+    return [bool((mask >> key_id) & 1) for key_id in range(num_keys)]
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+
+def create_shared_memory(size: int) -> shared_memory.SharedMemory:
+    """Cria um bloco novo (zerado pelo SO) com nome gerado automaticamente."""
+
+    return shared_memory.SharedMemory(create=True, size=size)
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Anexa a um bloco criado pelo processo principal. Os processos filhos
+    compartilham o resource_tracker do pai, então só o criador faz unlink.
+    """
+
+    return shared_memory.SharedMemory(name=name, create=False)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_songs (
+    player_seq INTEGER NOT NULL REFERENCES players(seq),
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (player_seq, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_player_songs_title
+    ON player_songs (title, player_seq);
+CREATE TABLE IF NOT EXISTS leaderboard (
+    board TEXT NOT NULL,
+    player_seq INTEGER NOT NULL REFERENCES players(seq),
+    score REAL NOT NULL,
+    PRIMARY KEY (board, player_seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank
+    ON leaderboard (board, score, player_seq);
+CREATE TABLE IF NOT EXISTS leaderboard_sizes (
+    board TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS midi_metadata (
+    filename TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    content_hash TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS score_sessions (
+    id TEXT PRIMARY KEY,
+    ring TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recordings (
+    id TEXT PRIMARY KEY,
+    ring TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+# Colunas acrescentadas depois da criação das tabelas: bancos existentes
+# recebem ALTER TABLE; os índices que dependem delas vêm em seguida.
+_ADDED_COLUMNS = (
+    ("midi_metadata", "content_hash", "TEXT"),
+)
+_POST_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_midi_metadata_hash
+    ON midi_metadata (content_hash);
+"""
+
+
+class Database:
+    """
+    Banco SQLite embutido (modo WAL) compartilhado pelas rotas.
+    Cada thread do servidor usa a própria conexão; leitores não bloqueiam o
+    escritor e as escritas são transações curtas (BEGIN IMMEDIATE).
+    Conexões não atravessam fork: um worker do servidor pre-fork abre as suas
+    em vez de reutilizar as herdadas do processo mestre.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self.connection()
+        conn.executescript(_SCHEMA)
+        for table, column, definition in _ADDED_COLUMNS:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        conn.executescript(_POST_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from .database import Database
+
+# Melhores pontuações mantidas por quadro: um por música (título) e o geral,
+# cuja chave é "" (títulos vazios são recusados na validação).
+LEADERBOARD_SIZE = 100
+GLOBAL_BOARD = ""
+
+
+def leaderboard_scores(songs: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Pontuação de um jogador em cada quadro: a melhor por título e, no geral,
+    a soma dessas melhores.
+    """
+    best: Dict[str, float] = {}
+    for song in songs:
+        title, score = song["title"], song["score"]
+        if title not in best or score > best[title]:
+            best[title] = score
+    if best:
+        best[GLOBAL_BOARD] = sum(best.values())
+    return best
+
+
+class PlayerRepository:
+    """
+    Jogadores e suas pontuações.
+    `seq` é a ordem de cadastro (1..N, sem remoções), então a página k é a
+    faixa de chaves ((k-1)*per_page, k*per_page]: leitura O(página) pelo
+    índice primário, sem OFFSET nem carregar a lista inteira.
+    """
+
+    def __init__(self, database: Database) -> None:
+        self._db = database
+
+    def create(self, name: str, songs: List[Dict[str, Any]], player_id: Optional[str] = None) -> Dict[str, Any]:
+        player = {"id": player_id or str(uuid4()), "name": name, "songs": songs}
+        with self._db.transaction() as conn:
+            self._insert(conn, player)
+        return player
+
+    @staticmethod
+    def _insert(conn, player: Dict[str, Any]) -> None:
+        cursor = conn.execute(
+            "INSERT INTO players (id, name) VALUES (?, ?)", (player["id"], player["name"])
+        )
+        seq = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO player_songs (player_seq, position, title, score) VALUES (?, ?, ?, ?)",
+            [(seq, position, song["title"], song["score"]) for position, song in enumerate(player["songs"])],
+        )
+        for board, score in leaderboard_scores(player["songs"]).items():
+            LeaderboardRepository.offer(conn, board, seq, score)
+
+    def count(self) -> int:
+        row = self._db.connection().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'players'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def _with_songs(self, rows: List[Tuple[int, str, str]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        players = {seq: {"id": player_id, "name": name, "songs": []} for seq, player_id, name in rows}
+        placeholders = ",".join("?" * len(players))
+        song_rows = self._db.connection().execute(
+            f"SELECT player_seq, title, score FROM player_songs "
+            f"WHERE player_seq IN ({placeholders}) ORDER BY player_seq, position",
+            tuple(players),
+        )
+        for seq, title, score in song_rows:
+            players[seq]["songs"].append({"title": title, "score": score})
+        return [players[seq] for seq, _, _ in rows]
+
+    def page(self, page: int, per_page: int) -> Tuple[List[Dict[str, Any]], int]:
+        start = (page - 1) * per_page
+        rows = self._db.connection().execute(
+            "SELECT seq, id, name FROM players WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (start, start + per_page),
+        ).fetchall()
+        return self._with_songs(rows), self.count()
+
+    def page_by_song(self, title: str, page: int, per_page: int) -> Tuple[List[Dict[str, Any]], int]:
+        conn = self._db.connection()
+        total = conn.execute(
+            "SELECT COUNT(DISTINCT player_seq) FROM player_songs WHERE title = ?", (title,)
+        ).fetchone()[0]
+        rows = conn.execute(
+            "SELECT p.seq, p.id, p.name FROM players p WHERE p.seq IN ("
+            " SELECT DISTINCT player_seq FROM player_songs WHERE title = ?"
+            " ORDER BY player_seq LIMIT ? OFFSET ?) ORDER BY p.seq",
+            (title, per_page, (page - 1) * per_page),
+        ).fetchall()
+        return self._with_songs(rows), int(total)
+
+    def get(self, player_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._db.connection().execute(
+            "SELECT seq, id, name FROM players WHERE id = ?", (player_id,)
+        ).fetchall()
+        players = self._with_songs(rows)
+        return players[0] if players else None
+
+
+class LeaderboardRepository:
+    """
+    Top-K persistido de cada quadro, atualizado na mesma transação que cria
+    o jogador: com o quadro cheio, a nova pontuação só entra se superar a
+    pior, que sai. Cada passo é uma busca no índice (board, score,
+    player_seq) e o tamanho do quadro fica em leaderboard_sizes, então nada
+    percorre o quadro inteiro. Empates ficam com quem se cadastrou antes.
+    """
+
+    def __init__(self, database: Database) -> None:
+        self._db = database
+
+    @staticmethod
+    def offer(conn, board: str, player_seq: int, score: float) -> None:
+        row = conn.execute(
+            "SELECT size FROM leaderboard_sizes WHERE board = ?", (board,)
+        ).fetchone()
+        if row is not None and row[0] >= LEADERBOARD_SIZE:
+            worst_seq, worst_score = conn.execute(
+                "SELECT player_seq, score FROM leaderboard WHERE board = ? "
+                "ORDER BY score, player_seq DESC LIMIT 1",
+                (board,),
+            ).fetchone()
+            # O novo jogador tem o maior seq: em caso de empate, perde
+            if score <= worst_score:
+                return
+            conn.execute(
+                "DELETE FROM leaderboard WHERE board = ? AND player_seq = ?", (board, worst_seq)
+            )
+        else:
+            conn.execute(
+                "INSERT INTO leaderboard_sizes (board, size) VALUES (?, 1) "
+                "ON CONFLICT(board) DO UPDATE SET size = size + 1",
+                (board,),
+            )
+        conn.execute(
+            "INSERT INTO leaderboard (board, player_seq, score) VALUES (?, ?, ?)",
+            (board, player_seq, score),
+        )
+
+    def last_seq(self) -> int:
+        row = self._db.connection().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'players'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def snapshot(self) -> Tuple[int, List[Tuple[str, int, float, str, str]]]:
+        """(último seq, linhas (board, seq, score, id, nome)) de um mesmo instante."""
+
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'players'"
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT l.board, l.player_seq, l.score, p.id, p.name "
+                "FROM leaderboard l JOIN players p ON p.seq = l.player_seq"
+            ).fetchall()
+        return (int(row[0]) if row else 0), rows
+
+    def players_since(self, player_seq: int) -> List[Tuple[int, str, str, List[Dict[str, Any]]]]:
+        """Jogadores cadastrados depois de `player_seq`, em ordem: (seq, id, nome, músicas)."""
+
+        conn = self._db.connection()
+        players = {
+            seq: (seq, player_id, name, [])
+            for seq, player_id, name in conn.execute(
+                "SELECT seq, id, name FROM players WHERE seq > ? ORDER BY seq", (player_seq,)
+            )
+        }
+        if players:
+            song_rows = conn.execute(
+                "SELECT player_seq, title, score FROM player_songs "
+                "WHERE player_seq > ? AND player_seq <= ? ORDER BY player_seq, position",
+                (player_seq, max(players)),
+            )
+            for seq, title, score in song_rows:
+                players[seq][3].append({"title": title, "score": score})
+        return list(players.values())
+
+
+class MidiMetadataRepository:
+    """Nome de exibição e hash do conteúdo (ver MidiLibrary) de cada arquivo MIDI salvo."""
+
+    def __init__(self, database: Database) -> None:
+        self._db = database
+
+    def all(self) -> Dict[str, Dict[str, str]]:
+        rows = self._db.connection().execute(
+            "SELECT filename, name, content_hash FROM midi_metadata"
+        )
+        return {
+            filename: {"name": name, "hash": content_hash}
+            for filename, name, content_hash in rows
+        }
+
+    def get(self, filename: str) -> Optional[Dict[str, str]]:
+        row = self._db.connection().execute(
+            "SELECT name, content_hash FROM midi_metadata WHERE filename = ?", (filename,)
+        ).fetchone()
+        return {"name": row[0], "hash": row[1]} if row else None
+
+    def hash_of(self, filename: str) -> Optional[str]:
+        row = self._db.connection().execute(
+            "SELECT content_hash FROM midi_metadata WHERE filename = ?", (filename,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, filename: str, name: str, content_hash: Optional[str] = None) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO midi_metadata (filename, name, content_hash) VALUES (?, ?, ?) "
+                "ON CONFLICT(filename) DO UPDATE SET name = excluded.name, "
+                "content_hash = COALESCE(excluded.content_hash, content_hash)",
+                (filename, name, content_hash),
+            )
+
+
+class ScoreSessionRepository:
+    """
+    Definição das sessões de pontuação (trechos tocados, posição), para que
+    qualquer processo do servidor reconstrua o placar. Os cursores só valem
+    para o anel de eventos atual, então sessões de execuções anteriores são
+    descartadas ao iniciar.
+    """
+
+    def __init__(self, database: Database, ring_name: str) -> None:
+        self._db = database
+        self._ring_name = ring_name
+        with self._db.transaction() as conn:
+            conn.execute("DELETE FROM score_sessions WHERE ring <> ?", (ring_name,))
+
+    def insert(self, session_id: str, version: int, data: Dict[str, Any], max_sessions: int) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO score_sessions (id, ring, created_at, version, data) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(created_at), 0) + 1 FROM score_sessions), ?, ?)",
+                (session_id, self._ring_name, version, json.dumps(data)),
+            )
+            conn.execute(
+                "DELETE FROM score_sessions WHERE created_at <= "
+                "(SELECT MAX(created_at) FROM score_sessions) - ?",
+                (max_sessions,),
+            )
+
+    def get(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        row = self._db.connection().execute(
+            "SELECT version, data FROM score_sessions WHERE id = ? AND ring = ?",
+            (session_id, self._ring_name),
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def modify(self, session_id: str, apply) -> bool:
+        """
+        Lê e regrava a sessão numa única transação. `apply(version, data)`
+        retorna (nova versão, novos dados) ou None para não alterar.
+        """
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT version, data FROM score_sessions WHERE id = ? AND ring = ?",
+                (session_id, self._ring_name),
+            ).fetchone()
+            if row is None:
+                return False
+            updated = apply(row[0], json.loads(row[1]))
+            if updated is None:
+                return False
+            conn.execute(
+                "UPDATE score_sessions SET version = ?, data = ? WHERE id = ?",
+                (updated[0], json.dumps(updated[1]), session_id),
+            )
+        return True
+
+
+class RecordingRepository:
+    """
+    Gravações de execução. O estado incremental (cursor no anel, último tick,
+    notas abertas) fica no banco para que qualquer worker continue ou
+    encerre a gravação; só uma fica ativa por vez.
+    """
+
+    def __init__(self, database: Database, ring_name: str) -> None:
+        self._db = database
+        self._ring_name = ring_name
+
+    def stale(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Gravações ativas de execuções anteriores (anel diferente do atual)."""
+        rows = self._db.connection().execute(
+            "SELECT id, data FROM recordings WHERE active = 1 AND ring <> ?",
+            (self._ring_name,),
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def insert(self, recording_id: str, data: Dict[str, Any]) -> bool:
+        """Cria a gravação ativa; False se já existe outra ativa neste anel."""
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM recordings WHERE active = 1 AND ring = ?", (self._ring_name,)
+            ).fetchone()
+            if row is not None:
+                return False
+            conn.execute(
+                "INSERT INTO recordings (id, ring, created_at, active, data) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(created_at), 0) + 1 FROM recordings), 1, ?)",
+                (recording_id, self._ring_name, json.dumps(data)),
+            )
+        return True
+
+    def active_id(self) -> Optional[str]:
+        row = self._db.connection().execute(
+            "SELECT id FROM recordings WHERE active = 1 AND ring = ?", (self._ring_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db.connection().execute(
+            "SELECT data FROM recordings WHERE id = ?", (recording_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def modify(self, recording_id: str, apply) -> Optional[Dict[str, Any]]:
+        """
+        Lê e regrava a gravação numa única transação (a escrita no arquivo
+        acontece dentro dela, então dois workers nunca anexam ao mesmo
+        tempo). `apply(data)` retorna os novos dados ou None para não alterar.
+        """
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM recordings WHERE id = ?", (recording_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = apply(json.loads(row[0]))
+            if data is None:
+                return None
+            conn.execute(
+                "UPDATE recordings SET active = ?, data = ? WHERE id = ?",
+                (1 if data.get("active") else 0, json.dumps(data), recording_id),
+            )
+        return data
+
+
+def _read_json(path: Path) -> Any:
+    try:
+        with path.open("r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def migrate_json_storage(database: Database, players_path: Path, metadata_path: Path) -> Dict[str, int]:
+    """
+    Importação única de players.json e metadata.json. Cada arquivo é
+    importado numa transação e marcado em `migrations`; depois é renomeado
+    para *.migrated para deixar claro que não é mais a fonte dos dados.
+    """
+
+    imported = {"players": 0, "midi_metadata": 0}
+    conn = database.connection()
+    done = {row[0] for row in conn.execute("SELECT name FROM migrations")}
+
+    if "players.json" not in done:
+        data = _read_json(players_path) if players_path.exists() else None
+        with database.transaction() as tx:
+            for item in data if isinstance(data, list) else []:
+                if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+                    continue
+                songs = [
+                    {"title": song["title"], "score": float(song["score"])}
+                    for song in item.get("songs") or []
+                    if isinstance(song, dict)
+                    and isinstance(song.get("title"), str)
+                    and isinstance(song.get("score"), (int, float))
+                ]
+                player_id = item.get("id") if isinstance(item.get("id"), str) else str(uuid4())
+                if tx.execute("SELECT 1 FROM players WHERE id = ?", (player_id,)).fetchone():
+                    continue
+                PlayerRepository._insert(tx, {"id": player_id, "name": item["name"], "songs": songs})
+                imported["players"] += 1
+            tx.execute("INSERT INTO migrations (name) VALUES ('players.json')")
+        if players_path.exists():
+            players_path.replace(players_path.with_name(players_path.name + ".migrated"))
+
+    if "metadata.json" not in done:
+        data = _read_json(metadata_path) if metadata_path.exists() else None
+        with database.transaction() as tx:
+            for filename, value in (data.items() if isinstance(data, dict) else []):
+                name = value.get("name") if isinstance(value, dict) else None
+                if not isinstance(filename, str) or not isinstance(name, str) or not name.strip():
+                    continue
+                tx.execute(
+                    "INSERT OR IGNORE INTO midi_metadata (filename, name) VALUES (?, ?)",
+                    (filename, name.strip()),
+                )
+                imported["midi_metadata"] += 1
+            tx.execute("INSERT INTO migrations (name) VALUES ('metadata.json')")
+        if metadata_path.exists():
+            metadata_path.replace(metadata_path.with_name(metadata_path.name + ".migrated"))
+
+    return imported
+
+
+def rebuild_leaderboards(database: Database) -> None:
+    """
+    Preenche os quadros a partir dos jogadores já cadastrados, uma única vez
+    (bancos criados antes deles). Depois disso são mantidos por offer().
+    """
+
+    conn = database.connection()
+    if conn.execute("SELECT 1 FROM migrations WHERE name = 'leaderboard'").fetchone():
+        return
+    with database.transaction() as tx:
+        tx.execute("DELETE FROM leaderboard")
+        tx.execute("DELETE FROM leaderboard_sizes")
+        songs: Dict[int, List[Dict[str, Any]]] = {}
+        for seq, title, score in tx.execute(
+            "SELECT player_seq, title, score FROM player_songs ORDER BY player_seq, position"
+        ):
+            songs.setdefault(seq, []).append({"title": title, "score": score})
+        for seq in sorted(songs):
+            for board, score in leaderboard_scores(songs[seq]).items():
+                LeaderboardRepository.offer(tx, board, seq, score)
+        tx.execute("INSERT INTO migrations (name) VALUES ('leaderboard')")
@@ -1,3 +1,13 @@
 """Pacote do servidor web Flask para exposição do estado das teclas."""
 
-from .app import create_app, start_flask_server  # noqa: F401
+__all__ = ["create_app", "start_flask_server"]
+
+
+def __getattr__(name):
+    # Importar o pacote (ou web_server.piano) não carrega o Flask: o main.py
+    # sobe o receptor antes e o processo web importa app ao iniciar.
+    if name in __all__:
+        from . import app
+
+        return getattr(app, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
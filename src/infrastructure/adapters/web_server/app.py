@@ -1,40 +1,125 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
+from typing import Optional
 
 from flask import Flask
 
+from src.infrastructure.adapters.midi.midi_library import MAX_UPLOAD_BYTES
+from src.infrastructure.adapters.storage.database import Database
+from src.infrastructure.adapters.storage.repositories import (
+    migrate_json_storage,
+    rebuild_leaderboards,
+)
+from src.infrastructure.metrics.web_metrics import WebMetricsBlock
+
+from .piano_routes import register_piano_routes
+from .prefork_server import PreforkServer
 from .routes import register_routes
 
 
-def create_app(frames_dict, controls_dict) -> Flask:
-    """Cria a aplicação Flask configurada com os estados compartilhados."""
+def create_app(
+    key_state,
+    event_ring,
+    controls_dict,
+    receiver_metrics=None,
+    storage_dir: Optional[Path] = None,
+    pianos=None,
+    gesture_ring=None,
+    max_upload_bytes: int = MAX_UPLOAD_BYTES,
+    web_metrics=None,
+) -> Flask:
+    """
+    Cria a aplicação Flask configurada com os estados compartilhados. Com
+    `pianos` (modo hub) também expõe /api/pianos/<id>/...; com `gesture_ring`,
+    /api/gestures. Requisições acima de `max_upload_bytes` recebem 413.
+    `web_metrics` é o WebMetricsBlock dos workers do modo pre-fork.
+    """
 
     module_dir = Path(__file__).resolve().parent
     template_folder = module_dir / "templates"
-    storage_dir = module_dir / "storage"
+    storage_dir = Path(storage_dir) if storage_dir else module_dir / "storage"
     midi_storage_dir = storage_dir / "midi"
     players_storage_path = storage_dir / "players.json"
+    database_path = storage_dir / "magic_piano.db"
 
     storage_dir.mkdir(parents=True, exist_ok=True)
     midi_storage_dir.mkdir(parents=True, exist_ok=True)
 
+    database = Database(database_path)
+    migrate_json_storage(database, players_storage_path, midi_storage_dir / "metadata.json")
+    rebuild_leaderboards(database)
+
     app = Flask(__name__, template_folder=str(template_folder))
+    app.config["MAX_CONTENT_LENGTH"] = max_upload_bytes
 
     register_routes(
         app,
-        frames_dict,
+        key_state,
+        event_ring,
         controls_dict,
         midi_storage_dir,
-        players_storage_path,
+        database,
+        receiver_metrics,
+        pianos,
+        gesture_ring,
+        web_metrics,
     )
+    if pianos:
+        register_piano_routes(app, pianos)
     return app
 
 
-def start_flask_server(frames_dict, controls_dict) -> None:
-    """Inicializa o servidor Flask expondo os estados das teclas."""
+SERVE_MODES = ("dev", "prefork")
+
 
-    app = create_app(frames_dict, controls_dict)
+def start_flask_server(
+    key_state,
+    event_ring,
+    controls_dict,
+    receiver_metrics=None,
+    serve_mode: str = "dev",
+    workers: int = 4,
+    backlog: int = 256,
+    request_timeout: float = 15.0,
+    pianos=None,
+    gesture_ring=None,
+) -> None:
+    """
+    Inicializa o servidor Flask expondo os estados das teclas.
+    - dev: servidor de desenvolvimento do Werkzeug (um processo, uma thread
+      por conexão).
+    - prefork: vários workers (os.fork) aceitando do mesmo socket; ver
+      PreforkServer. Só em POSIX.
+    """
+
+    if serve_mode == "prefork" and os.name == "posix":
+        # Os workers não usam o proxy do Manager (uma conexão por processo
+        # não sobrevive ao fork): a página inicial mostra a configuração
+        # de quando o servidor subiu.
+        web_metrics = WebMetricsBlock.create(max(1, workers))
+        try:
+            app = create_app(
+                key_state, event_ring, dict(controls_dict), receiver_metrics,
+                pianos=pianos, gesture_ring=gesture_ring, web_metrics=web_metrics,
+            )
+            PreforkServer(
+                app,
+                port=5000,
+                workers=workers,
+                backlog=backlog,
+                request_timeout=request_timeout,
+                web_metrics=web_metrics,
+            ).serve_forever()
+        finally:
+            web_metrics.close()
+        return
+
+    app = create_app(
+        key_state, event_ring, controls_dict, receiver_metrics,
+        pianos=pianos, gesture_ring=gesture_ring,
+    )
     app.run(
         host="0.0.0.0",
         port=5000,
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class _Subscriber:
+    """Fila limitada de um cliente. Se encher, descarta e pede resync."""
+
+    __slots__ = ("queue", "needs_resync")
+
+    def __init__(self, max_queue: int) -> None:
+        self.queue: "queue.Queue[Tuple[int, List[List[int]]]]" = queue.Queue(max_queue)
+        self.needs_resync = False
+
+    def offer(self, item: Tuple[int, List[List[int]]]) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Cliente lento: não bloqueia os demais. Os deltas pendentes são
+            # descartados e o próximo envio será o estado completo.
+            self.needs_resync = True
+            try:
+                while True:
+                    self.queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class KeyStreamBroadcaster:
+    """
+    Distribui mudanças de teclas para clientes SSE.
+    Uma única thread acompanha o anel de eventos compartilhado (sem perder
+    pressionar+soltar rápidos) e repassa os novos eventos para a fila de cada
+    assinante; assim o custo por cliente é só um put_nowait, independente de
+    quantos estão conectados. O snapshot completo vem do bloco de estado.
+    `on_subscribers(n)` é chamado a cada entrada/saída de cliente.
+    """
+
+    def __init__(
+        self,
+        key_state,
+        event_ring,
+        poll_interval: float = 0.002,
+        resync_interval: float = 5.0,
+        heartbeat_interval: float = 15.0,
+        max_queue: int = 256,
+        on_subscribers: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        self._key_state = key_state
+        self._event_ring = event_ring
+        self._poll_interval = poll_interval
+        self._resync_interval = resync_interval
+        self._heartbeat_interval = heartbeat_interval
+        self._max_queue = max_queue
+        self._on_subscribers = on_subscribers
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber(self._max_queue)
+        with self._lock:
+            self._subscribers = [*self._subscribers, subscriber]
+            if self._on_subscribers is not None:
+                self._on_subscribers(len(self._subscribers))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._watch, name="key-stream", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    def _unsubscribe(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+            if self._on_subscribers is not None:
+                self._on_subscribers(len(self._subscribers))
+
+    def _watch(self) -> None:
+        cursor = self._event_ring.head()
+        while True:
+            with self._lock:
+                subscribers = self._subscribers
+                if not subscribers:
+                    self._thread = None
+                    return
+            time.sleep(self._poll_interval)
+
+            if self._event_ring.head() == cursor:
+                continue
+            batch = self._event_ring.read_since(cursor)
+            cursor = batch["cursor"]
+            changes = [
+                [key_id, pressed, seq, t_ns]
+                for seq, t_ns, key_id, pressed in batch["events"]
+            ]
+            item = (cursor, changes)
+            for subscriber in subscribers:
+                if batch["lost"]:
+                    # O anel deu a volta antes da leitura: só o estado
+                    # completo garante que o cliente fique consistente.
+                    subscriber.needs_resync = True
+                subscriber.offer(item)
+
+    def _snapshot_event(self) -> str:
+        seq, flags = self._key_state.pressed_flags()
+        keys = [{"id": key_id, "pressed": pressed} for key_id, pressed in enumerate(flags)]
+        return format_sse("snapshot", {"seq": seq, "keys": keys}, seq)
+
+    def stream(self) -> Iterator[str]:
+        """Gerador SSE: snapshot inicial, deltas, resync periódico e heartbeat."""
+
+        subscriber = self._subscribe()
+        try:
+            yield "retry: 1000\n\n"
+            yield self._snapshot_event()
+            next_resync = time.monotonic() + self._resync_interval
+            while True:
+                timeout = min(self._heartbeat_interval, max(0.0, next_resync - time.monotonic()))
+                try:
+                    seq, changes = subscriber.queue.get(timeout=timeout)
+                except queue.Empty:
+                    seq = None
+
+                now = time.monotonic()
+                if subscriber.needs_resync or now >= next_resync:
+                    subscriber.needs_resync = False
+                    next_resync = now + self._resync_interval
+                    yield self._snapshot_event()
+                    continue
+
+                if seq is None:
+                    yield ": ping\n\n"
+                    continue
+
+                if not changes:
+                    continue
+                keys = [
+                    {"id": key_id, "pressed": bool(pressed), "seq": event_seq, "t_ns": t_ns}
+                    for key_id, pressed, event_seq, t_ns in changes
+                ]
+                yield format_sse("delta", {"seq": seq, "keys": keys}, seq)
+        finally:
+            self._unsubscribe(subscriber)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+
+class Piano(NamedTuple):
+    """
+    Instrumento do modo hub com os próprios blocos compartilhados. Fica fora
+    de piano_routes para que o main.py o use sem importar o Flask.
+    """
+
+    id: str
+    name: str
+    key_state: Any
+    event_ring: Any
+    receiver_metrics: Any = None
+    gesture_ring: Any = None
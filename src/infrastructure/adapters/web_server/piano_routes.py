@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from flask import Blueprint, jsonify
+
+from .key_stream import KeyStreamBroadcaster
+from .piano import Piano
+from .routes import events_response, gestures_response, keys_response, sse_response
+
+
+def register_piano_routes(app, pianos: Sequence[Piano]) -> None:
+    """
+    Namespace por instrumento: /api/pianos/<id>/keys, /events, /stream e
+    /gestures, com os mesmos formatos das rotas /api/keys e /api/gestures.
+    Biblioteca MIDI, jogadores e sessões continuam únicos e compartilhados
+    entre os instrumentos.
+    """
+
+    bp = Blueprint("pianos", __name__, url_prefix="/api/pianos")
+    by_id = {piano.id: piano for piano in pianos}
+    # A thread de cada broadcaster só nasce com o primeiro assinante
+    streams = {
+        piano.id: KeyStreamBroadcaster(piano.key_state, piano.event_ring) for piano in pianos
+    }
+
+    def _piano_or_404(piano_id: str):
+        piano = by_id.get(piano_id)
+        if piano is None:
+            return None, (jsonify({"error": f"Instrumento '{piano_id}' não encontrado."}), 404)
+        return piano, None
+
+    @bp.route("", methods=["GET"])
+    def list_pianos():
+        return jsonify(
+            {
+                "pianos": [
+                    {
+                        "id": piano.id,
+                        "name": piano.name,
+                        "num_keys": piano.key_state.num_keys,
+                        "seq": piano.key_state.snapshot()[0],
+                        "stale": piano.receiver_metrics is not None and piano.receiver_metrics.stale(),
+                    }
+                    for piano in pianos
+                ]
+            }
+        )
+
+    @bp.route("/<piano_id>/keys")
+    def piano_keys(piano_id: str):
+        piano, error = _piano_or_404(piano_id)
+        if error:
+            return error
+        return keys_response(piano.key_state, piano.receiver_metrics)
+
+    @bp.route("/<piano_id>/events")
+    def piano_events(piano_id: str):
+        piano, error = _piano_or_404(piano_id)
+        if error:
+            return error
+        return events_response(piano.event_ring)
+
+    @bp.route("/<piano_id>/gestures")
+    def piano_gestures(piano_id: str):
+        piano, error = _piano_or_404(piano_id)
+        if error:
+            return error
+        return gestures_response(piano.gesture_ring)
+
+    @bp.route("/<piano_id>/stream")
+    def piano_stream(piano_id: str):
+        _, error = _piano_or_404(piano_id)
+        if error:
+            return error
+        return sse_response(streams[piano_id])
+
+    app.register_blueprint(bp)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from src.infrastructure.logging.Logger import Logger, flush_logs
+
+
+class WorkerRequestHandler(WSGIRequestHandler):
+    """
+    Handler do Werkzeug com limite de espera por conexão: um cliente lento
+    ou parado é desconectado após `timeout` segundos em vez de prender uma
+    thread do worker. Cada resposta fecha a conexão (padrão do Werkzeug,
+    que não drena corpos não lidos e por isso não mantém keep-alive).
+    """
+
+    timeout = 15.0
+
+    def setup(self) -> None:
+        super().setup()
+        # Cabeçalhos e corpo saem em writes separados; sem TCP_NODELAY,
+        # Nagle + ACK atrasado do cliente somariam ~40 ms a cada resposta.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class PreforkServer:
+    """
+    Servidor WSGI pre-fork: o mestre abre o socket de escuta (com backlog
+    limitado) e cria `workers` processos com os.fork; cada um aceita
+    conexões do mesmo socket com o servidor do Werkzeug (uma thread por
+    conexão). O estado das teclas fica nos blocos de memória compartilhada
+    herdados, então nenhum worker passa por proxy do Manager. Com
+    `web_metrics` (WebMetricsBlock), cada worker escreve as métricas HTTP na
+    sua linha do bloco e /metrics soma todas.
+
+    O mestre reinicia workers que morrem e, ao receber SIGTERM/SIGINT
+    (ProcessManager.stop), repassa o sinal, espera `graceful_timeout`
+    e só então força o término dos que restarem.
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        workers: int = 4,
+        backlog: int = 256,
+        request_timeout: float = 15.0,
+        graceful_timeout: float = 5.0,
+        logger: Optional[Logger] = None,
+        web_metrics=None,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.backlog = backlog
+        self.request_timeout = request_timeout
+        self.graceful_timeout = graceful_timeout
+        self.logger = logger or Logger("WebServer", verbose=True)
+        self.web_metrics = web_metrics
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}  # pid -> índice do worker
+        self._stopping = False
+
+    def _listen(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        # Vários workers esperam em accept no mesmo socket; quem perder a
+        # corrida não pode ficar bloqueado, o select do serve_forever volta.
+        sock.setblocking(False)
+        return sock
+
+    # ---------------------------------------------------------------- worker
+    def _run_worker(self, index: int) -> None:
+        if self.web_metrics is not None:
+            self.web_metrics.select_worker(index)
+        handler = type("WorkerRequestHandler", (WorkerRequestHandler,), {
+            "timeout": self.request_timeout,
+        })
+        server = make_server(
+            self.host, self.port, self.app, threaded=True,
+            request_handler=handler, fd=self._socket.fileno(),
+        )
+        server.daemon_threads = True
+
+        def shutdown(_signum, _frame):
+            # shutdown() espera o serve_forever terminar: não pode rodar na
+            # mesma thread que está dentro dele.
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # o mestre decide
+
+        master_pid = os.getppid()
+
+        def watch_master():
+            # Mestre morto sem avisar (SIGKILL): o worker não fica órfão no socket
+            while os.getppid() == master_pid:
+                time.sleep(1.0)
+            server.shutdown()
+
+        threading.Thread(target=watch_master, daemon=True).start()
+        try:
+            server.serve_forever(poll_interval=0.5)
+        finally:
+            server.server_close()
+
+    def _spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker(index)
+            except BaseException as e:  # noqa: BLE001 - o filho nunca volta ao mestre
+                self.logger.error(f"Worker {index} terminou com erro: {e}")
+                code = 1
+            finally:
+                # os._exit pula atexit/Finalize: o log assíncrono é esvaziado aqui
+                try:
+                    flush_logs()
+                finally:
+                    os._exit(code)
+        self._children[pid] = index
+        return pid
+
+    # ---------------------------------------------------------------- mestre
+    def _handle_stop(self, _signum, _frame) -> None:
+        self._stopping = True
+
+    def serve_forever(self) -> None:
+        self._socket = self._listen()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for index in range(self.workers):
+            self._spawn(index)
+        self.logger.info(
+            f"Servidor pre-fork em http://{self.host}:{self.port} com {self.workers} workers "
+            f"(backlog {self.backlog}, timeout {self.request_timeout:.0f} s)"
+        )
+        try:
+            while not self._stopping:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+                if pid and pid in self._children:
+                    index = self._children.pop(pid)
+                    if not self._stopping:
+                        self.logger.warning(
+                            f"Worker {index} (pid {pid}) saiu com status {status}; reiniciando."
+                        )
+                        self._spawn(index)
+                    continue
+                time.sleep(0.2)
+        finally:
+            self._shutdown_workers()
+            self._socket.close()
+
+    def _shutdown_workers(self) -> None:
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._children.pop(pid, None)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+
+        for pid in list(self._children):
+            self.logger.warning(f"Worker pid {pid} não encerrou a tempo; forçando.")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children.clear()
+        self.logger.info("Servidor pre-fork encerrado.")
@@ -1,121 +1,259 @@
 from __future__ import annotations
 
-import json
+import struct
+import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
-from uuid import uuid4
-
-from flask import Blueprint, jsonify, render_template, request, send_from_directory
+from typing import Any, Dict, List, Tuple
+
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    send_from_directory,
+    stream_with_context,
+)
 from werkzeug.utils import secure_filename
 
+from src.application.usecases.leaderboard import Leaderboards
+from src.application.usecases.performance_recorder import (
+    DEFAULT_BASE_NOTE,
+    PerformanceRecorder,
+    RecordingError,
+)
+from src.application.usecases.scoring_engine import HIT_WINDOW, ScoreSessionRegistry
+from src.infrastructure.adapters.midi.midi_catalog import MidiCatalog
+from src.infrastructure.adapters.midi.midi_library import (
+    MAX_UPLOAD_BYTES,
+    MidiLibrary,
+    UploadTooLarge,
+)
+from src.infrastructure.adapters.midi.midi_parser import MidiParseError
+from src.infrastructure.adapters.midi.note_table import NoteTableCache
+from src.infrastructure.adapters.shared_memory.gesture_ring import (
+    GESTURE_CHORD,
+    GESTURE_NAMES,
+    gesture_keys,
+)
+from src.infrastructure.adapters.shared_memory.key_state_block import bitmap_to_flags
+from src.infrastructure.adapters.storage.database import Database
+from src.infrastructure.adapters.storage.repositories import (
+    GLOBAL_BOARD,
+    LeaderboardRepository,
+    MidiMetadataRepository,
+    PlayerRepository,
+    RecordingRepository,
+    ScoreSessionRepository,
+)
 from src.infrastructure.constants.controls_constants import RECEIVER_BAUD, RECEIVER_COM
+from src.infrastructure.metrics.prometheus import Histogram, MetricsWriter
+from src.infrastructure.metrics.receiver_metrics import PUBLISH_LATENCY_BUCKETS_NS
+
+from .key_stream import KeyStreamBroadcaster
+
+KEYS_FORMATS = ("verbose", "compact", "binary")
+KEYS_COMPACT_MIMETYPE = "application/vnd.magicpiano.keys+json"
+KEY_SEQ_STRUCT = struct.Struct("<Q")
+
+
+def keys_format() -> str:
+    requested = request.args.get("format")
+    if requested in KEYS_FORMATS:
+        return requested
+    best = request.accept_mimetypes.best_match(
+        ["application/json", KEYS_COMPACT_MIMETYPE, "application/octet-stream"],
+        default="application/json",
+    )
+    if best == "application/octet-stream":
+        return "binary"
+    if best == KEYS_COMPACT_MIMETYPE:
+        return "compact"
+    return "verbose"
+
+
+def keys_response(key_state, receiver_metrics=None) -> Response:
+    """
+    Estado das teclas com negociação de conteúdo (?format= ou Accept):
+      - verbose (padrão/compatível): {"keys": [{"id", "pressed"}, ...], "stale": b}
+      - compact: {"mask": "<hex, bit k = tecla k>", "seq": n, "num_keys": n, "stale": b}
+      - binary (application/octet-stream): bitmap (6 bytes A..F por placa)
+        + seq uint64 LE; o total de teclas vai em X-Key-Count
+    Com uma placa desconectada o último estado continua sendo servido,
+    marcado com stale=true e X-Key-Stale: 1.
+    """
+    fmt = keys_format()
+    seq, bitmap = key_state.snapshot()
+    stale = receiver_metrics is not None and receiver_metrics.stale()
+    etag = f"{key_state.name}-{seq}-{fmt}{'-stale' if stale else ''}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif fmt == "binary":
+        response = Response(
+            bitmap + KEY_SEQ_STRUCT.pack(seq), mimetype="application/octet-stream"
+        )
+    elif fmt == "compact":
+        mask = int.from_bytes(bitmap, "little")
+        response = jsonify(
+            {
+                "mask": f"{mask:0{len(bitmap) * 2}x}",
+                "seq": seq,
+                "num_keys": key_state.num_keys,
+                "stale": stale,
+            }
+        )
+    else:
+        flags = bitmap_to_flags(bitmap, key_state.num_keys)
+        keys = [{"id": key_id, "pressed": pressed} for key_id, pressed in enumerate(flags)]
+        response = jsonify({"keys": keys, "stale": stale})
+    response.set_etag(etag)
+    response.headers["X-Key-Seq"] = str(seq)
+    response.headers["X-Key-Count"] = str(key_state.num_keys)
+    response.headers["X-Key-Stale"] = "1" if stale else "0"
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept")
+    return response
+
+
+def events_response(event_ring) -> Response:
+    """Eventos com timestamp após o cursor ?since=<seq>&limit=<n>."""
+    since = request.args.get("since", default=0, type=int) or 0
+    limit = request.args.get("limit", default=1000, type=int) or 1000
+    batch = event_ring.read_since(max(0, since), max(1, min(limit, event_ring.capacity)))
+    events = [
+        {"seq": seq, "t_ns": t_ns, "id": key_id, "pressed": bool(pressed)}
+        for seq, t_ns, key_id, pressed in batch["events"]
+    ]
+    return jsonify(
+        {
+            "events": events,
+            "cursor": batch["cursor"],
+            "head": batch["head"],
+            "oldest": batch["oldest"],
+            "lost": batch["lost"],
+            "behind": batch["lost"] > 0,
+            "server_time_ns": time.monotonic_ns(),
+        }
+    )
+
+
+def gestures_response(gesture_ring) -> Response:
+    """
+    Gestos após o cursor ?since=<seq>&limit=<n>: acordes (keys), notas
+    seguradas, repetições (count = tamanho da sequência) e solturas
+    (duration_ns = tempo pressionada, null se desconhecido).
+    """
+    if gesture_ring is None:
+        return jsonify({"error": "Detecção de gestos desativada."}), 404
+    since = request.args.get("since", default=0, type=int) or 0
+    limit = request.args.get("limit", default=1000, type=int) or 1000
+    batch = gesture_ring.read_since(max(0, since), max(1, min(limit, gesture_ring.capacity)))
+    gestures = []
+    for seq, t_ns, duration_ns, key_id, kind, count, bitmap in batch["events"]:
+        gesture = {
+            "seq": seq,
+            "type": GESTURE_NAMES.get(kind, "unknown"),
+            "t_ns": t_ns,
+            "duration_ns": duration_ns if duration_ns >= 0 else None,
+            "id": key_id,
+            "count": count,
+        }
+        if kind == GESTURE_CHORD:
+            gesture["keys"] = gesture_keys(bitmap)
+        gestures.append(gesture)
+    return jsonify(
+        {
+            "gestures": gestures,
+            "cursor": batch["cursor"],
+            "head": batch["head"],
+            "oldest": batch["oldest"],
+            "lost": batch["lost"],
+            "behind": batch["lost"] > 0,
+            "server_time_ns": time.monotonic_ns(),
+        }
+    )
+
+
+def sse_response(key_stream) -> Response:
+    return Response(
+        stream_with_context(key_stream.stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 def register_routes(
     app,
-    frames_dict,
+    key_state,
+    event_ring,
     controls_dict,
     midi_storage_dir: Path,
-    players_storage_path: Path,
+    database: Database,
+    receiver_metrics=None,
+    pianos=None,
+    gesture_ring=None,
+    web_metrics=None,
 ) -> None:
-    """Registra rotas padrão para o monitoramento das teclas."""
+    """
+    Registra rotas padrão para o monitoramento das teclas. No modo hub,
+    `pianos` são os instrumentos (ver piano_routes.Piano) e as rotas /api/keys
+    continuam servindo o primeiro deles. Com `web_metrics` (WebMetricsBlock,
+    modo pre-fork), a latência HTTP e os clientes SSE de /metrics são os
+    totais de todos os workers.
+    """
 
     web = Blueprint("web", __name__)
 
     midi_storage_dir = midi_storage_dir.resolve()
-    midi_metadata_path = midi_storage_dir / "metadata.json"
-    players_storage_path = players_storage_path.resolve()
-
-    def _sorted_key_ids() -> List[int]:
-        keys: Iterable[Any] = frames_dict.keys()
-        return sorted(int(key) for key in keys)
+    players = PlayerRepository(database)
+    leaderboards = Leaderboards(LeaderboardRepository(database))
+    midi_metadata = MidiMetadataRepository(database)
+    midi_storage_dir.mkdir(parents=True, exist_ok=True)
+    midi_catalog = MidiCatalog(midi_storage_dir, midi_metadata.all)
+    midi_library = MidiLibrary(
+        midi_storage_dir,
+        midi_metadata,
+        app.config.get("MAX_CONTENT_LENGTH") or MAX_UPLOAD_BYTES,
+    )
+    if midi_library.adopt_existing():
+        midi_catalog.invalidate()
+    key_stream = KeyStreamBroadcaster(
+        key_state, event_ring,
+        on_subscribers=web_metrics.set_subscribers if web_metrics is not None else None,
+    )
+    note_tables = NoteTableCache()
+    keys_latency = web_metrics if web_metrics is not None else Histogram()
+
+    def _load_session_notes(filename: str):
+        midi_path = _resolve_midi_path(filename)
+        if midi_path is None:
+            raise FileNotFoundError(filename)
+        return note_tables.get(midi_library.source_path(filename))[0].to_notes()
+
+    # Sessões no banco: qualquer worker do modo pre-fork atende qualquer sessão
+    score_sessions = ScoreSessionRegistry(
+        event_ring,
+        store=ScoreSessionRepository(database, event_ring.name),
+        load_notes=_load_session_notes,
+    )
+
+    def _recording_finished(filename: str, name: str) -> None:
+        midi_library.adopt(filename, name)
+        midi_catalog.invalidate()
+
+    recorder = PerformanceRecorder(
+        event_ring,
+        RecordingRepository(database, event_ring.name),
+        midi_storage_dir,
+        on_finished=_recording_finished,
+    )
 
     def _build_key_payload() -> List[Dict[str, Any]]:
-        payload: List[Dict[str, Any]] = []
-        for key_id in _sorted_key_ids():
-            payload.append({"id": key_id, "pressed": bool(frames_dict.get(key_id, False))})
-        return payload
-
-    def _load_midi_metadata() -> Dict[str, Dict[str, str]]:
-        if not midi_metadata_path.exists():
-            return {}
-
-        try:
-            with midi_metadata_path.open("r", encoding="utf-8") as file:
-                data = json.load(file)
-        except (OSError, json.JSONDecodeError):
-            return {}
-
-        if not isinstance(data, dict):
-            return {}
-
-        metadata: Dict[str, Dict[str, str]] = {}
-        for key, value in data.items():
-            if not isinstance(key, str) or not isinstance(value, dict):
-                continue
-
-            name = value.get("name")
-            if not isinstance(name, str) or not name.strip():
-                continue
-
-            metadata[key] = {"name": name.strip()}
-
-        return metadata
-
-    def _save_midi_metadata(metadata: Dict[str, Dict[str, str]]) -> None:
-        midi_metadata_path.parent.mkdir(parents=True, exist_ok=True)
-        with midi_metadata_path.open("w", encoding="utf-8") as file:
-            json.dump(metadata, file, ensure_ascii=False, indent=2)
+        _, flags = key_state.pressed_flags()
+        return [{"id": key_id, "pressed": pressed} for key_id, pressed in enumerate(flags)]
 
     def _list_midi_files() -> List[Dict[str, Any]]:
-        midi_storage_dir.mkdir(parents=True, exist_ok=True)
-        metadata = _load_midi_metadata()
-        midi_paths = [
-            *midi_storage_dir.glob("*.mid"),
-            *midi_storage_dir.glob("*.midi"),
-        ]
-        midi_paths.sort(key=lambda path: path.name.lower())
-        files: List[Dict[str, Any]] = []
-        for midi_path in midi_paths:
-            filename = midi_path.name
-            entry = metadata.get(filename)
-            label = entry.get("name") if entry else None
-            if not label:
-                label = midi_path.stem
-
-            files.append(
-                {
-                    "name": label,
-                    "filename": filename,
-                    "url": f"/api/midi/{filename}",
-                }
-            )
-
-        return files
-
-    def _load_players() -> List[Dict[str, Any]]:
-        if not players_storage_path.exists():
-            return []
-
-        try:
-            with players_storage_path.open("r", encoding="utf-8") as file:
-                data = json.load(file)
-        except (OSError, json.JSONDecodeError):
-            return []
-
-        if not isinstance(data, list):
-            return []
-
-        players: List[Dict[str, Any]] = []
-        for item in data:
-            if isinstance(item, dict):
-                players.append(item)
-        return players
-
-    def _save_players(players: List[Dict[str, Any]]) -> None:
-        players_storage_path.parent.mkdir(parents=True, exist_ok=True)
-        with players_storage_path.open("w", encoding="utf-8") as file:
-            json.dump(players, file, ensure_ascii=False, indent=2)
+        return midi_catalog.files()
 
     def _validate_player_payload(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
         errors: List[str] = []
@@ -151,6 +289,17 @@ def register_routes(
                     )
                     continue
 
+                session_id = entry.get("session")
+                if session_id is not None:
+                    # Pontuação calculada no servidor tem prioridade sobre a do cliente
+                    session = score_sessions.get(session_id) if isinstance(session_id, str) else None
+                    if session is None:
+                        errors.append(
+                            f"Entrada {index} em 'songs' referencia uma sessão inexistente."
+                        )
+                        continue
+                    score = session.state()["score"]
+
                 if not isinstance(score, (int, float)):
                     errors.append(
                         f"Entrada {index} em 'songs' precisa de 'score' numérico."
@@ -174,7 +323,112 @@ def register_routes(
 
     @web.route("/api/keys")
     def api_keys():
-        return jsonify({"keys": _build_key_payload()})
+        """Estado das teclas (ver keys_response para os formatos)."""
+        started = time.perf_counter()
+        response = keys_response(key_state, receiver_metrics)
+        keys_latency.observe(time.perf_counter() - started)
+        return response
+
+    @web.route("/metrics")
+    def metrics():
+        """Métricas no formato texto do Prometheus."""
+        writer = MetricsWriter()
+        # No modo hub cada instrumento vira um rótulo piano="<id>"; as
+        # amostras de uma métrica ficam juntas, como o formato exige.
+        if pianos:
+            sources = [({"piano": p.id}, p.key_state, p.event_ring, p.receiver_metrics) for p in pianos]
+        else:
+            sources = [(None, key_state, event_ring, receiver_metrics)]
+        readings = [
+            (labels, source_metrics.read())
+            for labels, _, _, source_metrics in sources
+            if source_metrics is not None
+        ]
+        if readings:
+            for name in readings[0][1][0]:
+                for labels, (counters, _, _, _) in readings:
+                    writer.counter(
+                        f"magic_piano_receiver_{name}_total",
+                        f"Receptor serial: {name.replace('_', ' ')}.",
+                        counters[name],
+                        labels=labels,
+                    )
+            links = [
+                (labels, source_metrics.gauges())
+                for labels, _, _, source_metrics in sources
+                if source_metrics is not None
+            ]
+            for labels, link in links:
+                writer.gauge(
+                    "magic_piano_receiver_ports_down",
+                    "Placas desconectadas aguardando reconexão (estado desatualizado).",
+                    link["ports_down"],
+                    labels=labels,
+                )
+            for labels, link in links:
+                writer.gauge(
+                    "magic_piano_receiver_last_recovery_seconds",
+                    "Tempo da última recuperação (queda da placa -> porta reaberta).",
+                    link["last_recovery_ns"] / 1e9,
+                    labels=labels,
+                )
+            for labels, link in links:
+                writer.gauge(
+                    "magic_piano_receiver_max_recovery_seconds",
+                    "Pior tempo de recuperação desde o início do receptor.",
+                    link["max_recovery_ns"] / 1e9,
+                    labels=labels,
+                )
+            for labels, (_, buckets, latency_sum, latency_count) in readings:
+                writer.histogram(
+                    "magic_piano_receiver_publish_latency_seconds",
+                    "Latência entre a leitura serial e a publicação no estado compartilhado.",
+                    [bound / 1e9 for bound in PUBLISH_LATENCY_BUCKETS_NS],
+                    buckets,
+                    latency_sum / 1e9,
+                    latency_count,
+                    labels=labels,
+                )
+
+        for labels, source_state, _, _ in sources:
+            seq, _ = source_state.snapshot()
+            writer.gauge("magic_piano_key_state_seq", "Sequência atual do estado das teclas.", seq, labels=labels)
+        for labels, _, source_ring, _ in sources:
+            writer.gauge(
+                "magic_piano_event_ring_head", "Último evento publicado no anel.", source_ring.head(), labels=labels
+            )
+        writer.gauge(
+            "magic_piano_key_stream_subscribers",
+            "Clientes SSE conectados.",
+            web_metrics.subscribers() if web_metrics is not None else key_stream.subscriber_count,
+        )
+
+        counts, total_sum, total = keys_latency.read()
+        writer.histogram(
+            "magic_piano_http_request_duration_seconds",
+            "Latência das requisições HTTP.",
+            keys_latency.buckets,
+            counts,
+            total_sum,
+            total,
+            labels={"endpoint": "/api/keys"},
+        )
+        return Response(writer.render(), mimetype="text/plain; version=0.0.4")
+
+    @web.route("/api/keys/events")
+    def api_key_events():
+        """Eventos com timestamp após o cursor ?since=<seq> (sem perdas)."""
+        return events_response(event_ring)
+
+    @web.route("/api/gestures")
+    def api_gestures():
+        """Acordes, notas seguradas, repetições e solturas detectados no receptor."""
+        return gestures_response(gesture_ring)
+
+    @web.route("/api/keys/stream")
+    def api_keys_stream():
+        """Server-Sent Events com os deltas das teclas (substitui o polling)."""
+        return sse_response(key_stream)
 
     @web.after_request
     def add_cors_headers(response):
@@ -184,7 +438,10 @@ def register_routes(
             "Access-Control-Allow-Methods", "GET,POST,OPTIONS"
         )
         response.headers.setdefault(
-            "Access-Control-Allow-Headers", "Content-Type"
+            "Access-Control-Allow-Headers", "Content-Type, Accept, If-None-Match, If-Modified-Since"
+        )
+        response.headers.setdefault(
+            "Access-Control-Expose-Headers", "ETag, Last-Modified, X-Key-Seq, X-Key-Count, X-Key-Stale"
         )
         return response
 
@@ -199,7 +456,17 @@ def register_routes(
 
     @web.route("/api/midi", methods=["GET"])
     def list_midi():
-        return jsonify({"files": _list_midi_files()})
+        files, etag, last_modified = midi_catalog.snapshot()
+        response = jsonify({"files": files})
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    @web.app_errorhandler(413)
+    def request_too_large(error):
+        # Corpo acima de MAX_CONTENT_LENGTH, recusado pelo Werkzeug antes da rota
+        return jsonify({"error": "Arquivo maior que o limite permitido."}), 413
 
     @web.route("/api/midi", methods=["POST"])
     def upload_midi():
@@ -223,12 +490,17 @@ def register_routes(
         if suffix not in {".mid", ".midi"}:
             return jsonify({"error": "Apenas arquivos .mid ou .midi são aceitos"}), 400
 
-        destination = midi_storage_dir / filename
-        upload.save(destination)
-
-        metadata = _load_midi_metadata()
-        metadata[filename] = {"name": song_name}
-        _save_midi_metadata(metadata)
+        # Pré-processa as notas uma única vez por conteúdo; os clientes
+        # consomem a tabela pronta em /api/midi/<arquivo>/notes em vez de
+        # reinterpretar o .mid.
+        try:
+            stored = midi_library.store(upload.stream, filename, song_name)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except (OSError, MidiParseError) as e:
+            return jsonify({"error": f"Arquivo MIDI inválido: {e}"}), 400
+        filename = stored.filename
+        midi_catalog.invalidate()
 
         return (
             jsonify(
@@ -238,6 +510,8 @@ def register_routes(
                         "name": song_name,
                         "filename": filename,
                         "url": f"/api/midi/{filename}",
+                        "hash": stored.content_hash,
+                        "duplicate": stored.duplicate,
                     },
                 }
             ),
@@ -261,6 +535,153 @@ def register_routes(
             as_attachment=True,
         )
 
+    def _resolve_midi_path(filename: str):
+        safe_name = secure_filename(filename) if isinstance(filename, str) else ""
+        if not safe_name or safe_name != filename:
+            return None
+        path = midi_storage_dir / safe_name
+        return path if path.exists() else None
+
+    @web.route("/api/score/sessions", methods=["OPTIONS"])
+    @web.route("/api/score/sessions/<session_id>/<action>", methods=["OPTIONS"])
+    def score_sessions_options(session_id: str = "", action: str = ""):  # pragma: no cover - header-only route
+        return ("", 204)
+
+    @web.route("/api/score/sessions", methods=["POST"])
+    def create_score_session():
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"error": "JSON inválido ou não fornecido."}), 400
+
+        filename = payload.get("filename")
+        midi_path = _resolve_midi_path(filename)
+        if midi_path is None:
+            return jsonify({"error": "Arquivo não encontrado"}), 404
+
+        hit_window = payload.get("hit_window", HIT_WINDOW)
+        if not isinstance(hit_window, (int, float)) or not 0 < hit_window <= 1:
+            return jsonify({"error": "Campo 'hit_window' deve estar entre 0 e 1 segundo."}), 400
+
+        try:
+            notes = note_tables.get(midi_library.source_path(filename))[0].to_notes()
+        except (OSError, MidiParseError) as e:
+            return jsonify({"error": f"Não foi possível ler o arquivo MIDI: {e}"}), 422
+
+        title = payload.get("title")
+        if not isinstance(title, str) or not title.strip():
+            title = (midi_metadata.get(filename) or {}).get("name") or midi_path.stem
+
+        session = score_sessions.create(
+            title.strip(), notes, hit_window=float(hit_window), filename=filename
+        )
+        return jsonify({"session": session.state()}), 201
+
+    @web.route("/api/score/sessions/<session_id>/start", methods=["POST"])
+    def start_score_session(session_id: str):
+        payload = request.get_json(silent=True) or {}
+        position = payload.get("position", 0.0) if isinstance(payload, dict) else 0.0
+        if not isinstance(position, (int, float)) or position < 0:
+            return jsonify({"error": "Campo 'position' deve ser um número >= 0."}), 400
+
+        session = score_sessions.start(session_id, float(position))
+        if session is None:
+            return jsonify({"error": "Sessão não encontrada"}), 404
+        return jsonify({"session": session.state()})
+
+    @web.route("/api/score/sessions/<session_id>/pause", methods=["POST"])
+    def pause_score_session(session_id: str):
+        session = score_sessions.pause(session_id)
+        if session is None:
+            return jsonify({"error": "Sessão não encontrada"}), 404
+        return jsonify({"session": session.state()})
+
+    @web.route("/api/score/sessions/<session_id>", methods=["GET"])
+    def get_score_session(session_id: str):
+        session = score_sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Sessão não encontrada"}), 404
+
+        since = request.args.get("since", default=0, type=int) or 0
+        return jsonify({"session": session.state(max(0, since))})
+
+    @web.route("/api/recordings", methods=["OPTIONS"])
+    @web.route("/api/recordings/<recording_id>/stop", methods=["OPTIONS"])
+    def recordings_options(recording_id: str = ""):  # pragma: no cover - header-only route
+        return ("", 204)
+
+    @web.route("/api/recordings", methods=["POST"])
+    def start_recording():
+        """Começa a gravar o que é tocado em um .mid ({"name", "base_note"})."""
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({"error": "JSON inválido."}), 400
+
+        name = payload.get("name")
+        if name is not None and not isinstance(name, str):
+            return jsonify({"error": "Campo 'name' deve ser uma string."}), 400
+        base_note = payload.get("base_note", DEFAULT_BASE_NOTE)
+        if not isinstance(base_note, int) or isinstance(base_note, bool) or not 0 <= base_note <= 127:
+            return jsonify({"error": "Campo 'base_note' deve ser um inteiro entre 0 e 127."}), 400
+
+        try:
+            recording = recorder.start(name, base_note)
+        except RecordingError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify({"recording": recording}), 201
+
+    @web.route("/api/recordings", methods=["GET"])
+    def active_recording():
+        return jsonify({"recording": recorder.active()})
+
+    @web.route("/api/recordings/<recording_id>", methods=["GET"])
+    def get_recording(recording_id: str):
+        recording = recorder.get(recording_id)
+        if recording is None:
+            return jsonify({"error": "Gravação não encontrada"}), 404
+        return jsonify({"recording": recording})
+
+    @web.route("/api/recordings/<recording_id>/stop", methods=["POST"])
+    def stop_recording(recording_id: str):
+        """Encerra a gravação; o arquivo passa a aparecer em /api/midi."""
+        recording = recorder.stop(recording_id)
+        if recording is None:
+            return jsonify({"error": "Gravação não encontrada"}), 404
+        return jsonify({"recording": recording})
+
+    @web.route("/api/midi/<path:filename>/notes", methods=["GET"])
+    def midi_notes(filename: str):
+        midi_path = _resolve_midi_path(filename)
+        if midi_path is None:
+            return jsonify({"error": "Arquivo não encontrado"}), 404
+
+        try:
+            table, table_etag = note_tables.get(midi_library.source_path(filename))
+        except (OSError, MidiParseError) as e:
+            return jsonify({"error": f"Não foi possível ler o arquivo MIDI: {e}"}), 422
+
+        time_from = request.args.get("from", type=float)
+        time_to = request.args.get("to", type=float)
+        etag = f"{table_etag}-{time_from}-{time_to}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        indexes = table.window_indexes(time_from, time_to)
+        response = jsonify(
+            {
+                "filename": filename,
+                "count": len(table),
+                "duration": table.end_time,
+                "from": time_from,
+                "to": time_to,
+                "notes": table.to_json_notes(indexes),
+            }
+        )
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
     @web.route("/api/players", methods=["POST"])
     def create_player():
         payload = request.get_json(silent=True)
@@ -271,29 +692,26 @@ def register_routes(
         if errors:
             return jsonify({"errors": errors}), 400
 
-        players = _load_players()
-        player = {
-            "id": str(uuid4()),
-            **validated,
-        }
-        players.append(player)
-        _save_players(players)
+        player = players.create(validated["name"], validated["songs"])
+        # Os quadros no banco já foram atualizados na transação; a cópia em
+        # memória aplica este jogador (e os de outros workers) na próxima leitura
+        leaderboards.invalidate()
 
         return jsonify({"player": player}), 201
 
     @web.route("/api/players", methods=["GET"])
     def list_players():
-        players = _load_players()
-
         page = request.args.get("page", default=1, type=int) or 1
         per_page = request.args.get("per_page", default=10, type=int) or 10
 
         page = max(1, page)
-        per_page = max(1, per_page)
+        per_page = min(max(1, per_page), 500)
 
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_players = players[start:end]
+        song = request.args.get("song")
+        if song:
+            paginated_players, total = players.page_by_song(song.strip(), page, per_page)
+        else:
+            paginated_players, total = players.page(page, per_page)
 
         return jsonify(
             {
@@ -301,10 +719,39 @@ def register_routes(
                 "pagination": {
                     "page": page,
                     "per_page": per_page,
-                    "total": len(players),
-                    "pages": (len(players) + per_page - 1) // per_page,
+                    "total": total,
+                    "pages": (total + per_page - 1) // per_page,
                 },
             }
         )
 
+    def _leaderboard_limit() -> int:
+        limit = request.args.get("limit", default=10, type=int) or 10
+        return min(max(1, limit), leaderboards.size)
+
+    @web.route("/api/leaderboard", methods=["GET"])
+    def global_leaderboard():
+        """Jogadores pela soma das melhores pontuações em cada música."""
+        return jsonify(
+            {
+                "song": None,
+                "entries": leaderboards.top(GLOBAL_BOARD, _leaderboard_limit()),
+                "songs": leaderboards.songs(),
+            }
+        )
+
+    @web.route("/api/leaderboard/<path:song>", methods=["GET"])
+    def song_leaderboard(song: str):
+        song = song.strip()
+        if not song:
+            return jsonify({"error": "Música não informada."}), 400
+        return jsonify({"song": song, "entries": leaderboards.top(song, _leaderboard_limit())})
+
+    @web.route("/api/players/<player_id>", methods=["GET"])
+    def get_player(player_id: str):
+        player = players.get(player_id)
+        if player is None:
+            return jsonify({"error": "Jogador não encontrado"}), 404
+        return jsonify({"player": player})
+
     app.register_blueprint(web)
@@ -1,3 +1,12 @@
 RECEIVER_COM = "RECEIVER_COM"
 RECEIVER_BAUD = "RECEIVER_BAUD"
-RECEIVER_STOP = "RECEIVER_STOP"
+RECEIVER_CAPTURE = "RECEIVER_CAPTURE"
+RECEIVER_PORTS = "RECEIVER_PORTS"
+RECEIVER_GESTURES = "RECEIVER_GESTURES"
+RECEIVER_REALTIME = "RECEIVER_REALTIME"
+RECEIVER_JITTER = "RECEIVER_JITTER"
+
+# Comandos enviados ao receptor pelo canal de controle do ProcessManager
+CONTROL_STOP = "stop"
+CONTROL_SET_PORTS = "set_ports"
+CONTROL_SET_BAUD = "set_baud"
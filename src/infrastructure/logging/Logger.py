@@ -1,5 +1,193 @@
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import util
+from typing import Optional
+
 from src.infrastructure.constants.colors_constants import YELLOW, RED, GREEN, RESET
 
+# Destinos do log, lidos por cada processo (os filhos herdam o ambiente):
+# texto puro em arquivo no lugar do stdout e/ou JSON lines.
+LOG_FILE_ENV = "MAGIC_PIANO_LOG_FILE"
+LOG_JSON_ENV = "MAGIC_PIANO_LOG_JSON"
+
+# Mensagens na fila além disso são descartadas (e contadas), nunca esperam.
+LOG_QUEUE_SIZE = 4096
+# Limite por tipo de mensagem: média por segundo e rajada permitida.
+LOG_RATE = 20.0
+LOG_BURST = 100
+
+_LEVELS = {
+    "info": ("INFO", GREEN),
+    "warning": ("WARNING", RED),
+    "error": ("ERROR", RED),
+}
+
+
+class _LogWriter:
+    """
+    Fila do processo, compartilhada pelos Loggers: append/popleft de um deque
+    são atômicos, então quem loga não pega lock nem faz E/S. Uma thread
+    daemon drena a fila para o stdout (ou arquivo) e o sink JSON lines.
+    """
+
+    def __init__(self, text_path: Optional[str], json_path: Optional[str],
+                 capacity: int = LOG_QUEUE_SIZE) -> None:
+        self.capacity = capacity
+        self.text_path = text_path
+        self.json_path = json_path
+        self._loggers = weakref.WeakSet()
+        self._reset()
+
+    def _reset(self) -> None:
+        # Também no filho de um fork, que herda a fila mas não a thread
+        self.dropped = 0
+        self._queue = deque()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, record) -> None:
+        queue = self._queue
+        if len(queue) >= self.capacity:
+            self.dropped += 1
+            return
+        queue.append(record)
+        if self._thread is None:
+            self._start()
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _start(self) -> None:
+        # Várias threads podem logar pela primeira vez ao mesmo tempo: só
+        # uma cria a thread de escrita (e registra o Finalize).
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            # Registrado a cada thread nova: roda no atexit do processo principal
+            # e no fim dos processos do multiprocessing, que não executam atexit
+            # (e limpam os finalizadores herdados ao iniciar).
+            util.Finalize(None, flush_logs, exitpriority=0)
+            thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def _run(self) -> None:
+        text = open(self.text_path, "a", encoding="utf-8") if self.text_path else None
+        structured = open(self.json_path, "a", encoding="utf-8") if self.json_path else None
+        try:
+            while True:
+                self._wake.wait()
+                self._wake.clear()
+                self._drain(text, structured)
+                if self._stopping:
+                    self._drain(text, structured)
+                    return
+        finally:
+            for stream in (text, structured):
+                if stream is not None:
+                    stream.close()
+
+    def _drain(self, text, structured) -> None:
+        queue = self._queue
+        out = text or sys.stdout
+        wrote = False
+        try:
+            while queue:
+                wrote = True
+                self._write(out, text is not None, structured, queue.popleft())
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                self._write(out, text is not None, structured, (
+                    time.time(), "Logger", "warning",
+                    f"{dropped} mensagens descartadas (fila de log cheia)", "log",
+                ))
+            if wrote:
+                out.flush()
+                if structured is not None:
+                    structured.flush()
+        except (OSError, ValueError):
+            # stdout fechado ou pipe quebrado: o log não derruba o processo
+            queue.clear()
+
+    @staticmethod
+    def _write(out, plain: bool, structured, record) -> None:
+        timestamp, process_name, level, message, kind = record
+        label, color = _LEVELS[level]
+        if plain:
+            clock = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+            out.write(f"{clock} [{process_name}][{label}] {message}\n")
+        else:
+            out.write(f"{YELLOW}[{process_name}]{color}[{label}] {message}{RESET}\n")
+        if structured is not None:
+            structured.write(json.dumps(
+                {"t": round(timestamp, 6), "proc": process_name, "level": level, "kind": kind, "msg": message},
+                ensure_ascii=False, separators=(",", ":"),
+            ))
+            structured.write("\n")
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Reporta o que ficou suprimido e espera a fila esvaziar."""
+        for logger in list(self._loggers):
+            logger.report_suppressed()
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+            self._stopping = False
+
+
+_writer: Optional[_LogWriter] = None
+
+
+def _process_writer() -> _LogWriter:
+    global _writer
+    if _writer is None:
+        _writer = _LogWriter(os.environ.get(LOG_FILE_ENV), os.environ.get(LOG_JSON_ENV))
+    return _writer
+
+
+def flush_logs() -> None:
+    if _writer is not None:
+        _writer.close()
+
+
+def _after_fork() -> None:
+    if _writer is not None:
+        _writer._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def configure_logging(text_path: Optional[str] = None, json_path: Optional[str] = None) -> None:
+    """
+    Define os destinos do log deste processo e dos que ele criar depois
+    (via ambiente); None mantém o que já estiver no ambiente.
+    """
+    global _writer
+    for name, value in ((LOG_FILE_ENV, text_path), (LOG_JSON_ENV, json_path)):
+        if value:
+            os.environ[name] = value
+    if _writer is not None:
+        old, _writer = _writer, None
+        old.close()
+        loggers = list(old._loggers)
+        new = _process_writer()
+        for logger in loggers:
+            logger._writer = new
+            new._loggers.add(logger)
+
+
 class Logger:
     """
     Classe para log colorido com controle de verbosidade:
@@ -8,23 +196,71 @@ class Logger:
       - WARNING em vermelho
       - ERROR em vermelho
       - se verbose=False, não imprime nada
+
+    As chamadas só enfileiram (microssegundos, sem E/S); a escrita é feita
+    pela thread do _LogWriter do processo. Cada tipo de mensagem (`kind`,
+    padrão: o nível) tem um limite de `rate` mensagens/s com rajada de
+    `burst`; as suprimidas são contadas e informadas na próxima que passar
+    ou no fim do processo.
     """
 
-    def __init__(self, process_name: str, verbose: bool = True):
+    def __init__(self, process_name: str, verbose: bool = True,
+                 rate: float = LOG_RATE, burst: int = LOG_BURST):
         self.process_name = process_name
         self.verbose = verbose
+        self.rate = rate
+        self.burst = burst
+        # kind -> [fichas, último instante, suprimidas]
+        self._buckets = {}
+        self._writer = _process_writer()
+        self._writer._loggers.add(self)
+
+    def __reduce__(self):
+        # A fila é do processo: quem recebe o Logger usa a sua
+        return (Logger, (self.process_name, self.verbose, self.rate, self.burst))
+
+    def _log(self, level: str, message: str, kind: Optional[str]) -> None:
+        kind = kind or level
+        now = time.monotonic()
+        bucket = self._buckets.get(kind)
+        if bucket is None:
+            bucket = self._buckets[kind] = [float(self.burst), now, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return
+        bucket[0] = tokens - 1.0
+        writer = self._writer
+        if bucket[2]:
+            suppressed, bucket[2] = bucket[2], 0
+            writer.put((time.time(), self.process_name, "warning", self._suppressed(kind, suppressed), "log"))
+        writer.put((time.time(), self.process_name, level, message, kind))
+
+    @staticmethod
+    def _suppressed(kind: str, count: int) -> str:
+        return f"{count} mensagens '{kind}' suprimidas pelo limite de taxa"
+
+    def report_suppressed(self) -> None:
+        for kind, bucket in list(self._buckets.items()):
+            if bucket[2]:
+                suppressed, bucket[2] = bucket[2], 0
+                self._writer.put(
+                    (time.time(), self.process_name, "warning", self._suppressed(kind, suppressed), "log")
+                )
 
-    def info(self, message: str):
+    def info(self, message: str, kind: Optional[str] = None):
         if not self.verbose:
             return
-        print(f"{YELLOW}[{self.process_name}]{GREEN}[INFO] {message}{RESET}")
+        self._log("info", message, kind)
 
-    def warning(self, message: str):
+    def warning(self, message: str, kind: Optional[str] = None):
         if not self.verbose:
             return
-        print(f"{YELLOW}[{self.process_name}]{RED}[WARNING] {message}{RESET}")
+        self._log("warning", message, kind)
 
-    def error(self, message: str):
+    def error(self, message: str, kind: Optional[str] = None):
         if not self.verbose:
             return
-        print(f"{YELLOW}[{self.process_name}]{RED}[ERROR] {message}{RESET}")
\ No newline at end of file
+        self._log("error", message, kind)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List
+
+JITTER_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _summary(samples: array, count: int) -> Dict[str, float]:
+    """Percentis em microssegundos das amostras guardadas."""
+
+    ordered = sorted(samples[:count])
+    if not ordered:
+        return {"count": 0}
+    last = len(ordered) - 1
+    summary: Dict[str, float] = {"count": len(ordered)}
+    for q in JITTER_PERCENTILES:
+        summary[f"p{q:g}_us"] = ordered[min(last, int(round(q / 100 * last)))] / 1000
+    summary["max_us"] = ordered[-1] / 1000
+    return summary
+
+
+class JitterRecorder:
+    """
+    Amostras do laço do receptor para o relatório de jitter (--jitter-report):
+    intervalo entre leituras consecutivas da serial e latência de
+    processamento (leitura -> publicação). Os anéis de `capacity` amostras
+    (int64, ns) são alocados uma vez; record() só escreve em posições já
+    existentes e a ordenação fica para report(), fora do laço.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        self.capacity = capacity
+        self._inter = array("q", bytes(8 * capacity))
+        self._latency = array("q", bytes(8 * capacity))
+        self._inter_count = 0
+        self._latency_count = 0
+        self._last_read_ns = 0
+
+    def record(self, read_ns: int, done_ns: int) -> None:
+        last = self._last_read_ns
+        if last:
+            self._inter[self._inter_count % self.capacity] = read_ns - last
+            self._inter_count += 1
+        self._last_read_ns = read_ns
+        self._latency[self._latency_count % self.capacity] = done_ns - read_ns
+        self._latency_count += 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "inter_arrival": _summary(self._inter, min(self._inter_count, self.capacity)),
+            "processing": _summary(self._latency, min(self._latency_count, self.capacity)),
+        }
+
+    def format_report(self) -> List[str]:
+        lines = []
+        for name, summary in self.report().items():
+            if not summary["count"]:
+                lines.append(f"{name}: sem amostras")
+                continue
+            values = " ".join(
+                f"{key[:-3]}={value:.1f}" for key, value in summary.items() if key.endswith("_us")
+            )
+            lines.append(f"{name} (us, {summary['count']} amostras): {values}")
+        return lines
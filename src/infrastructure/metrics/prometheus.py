@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+REQUEST_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+class Histogram:
+    """Histograma em processo (buckets fixos), seguro entre threads."""
+
+    def __init__(self, buckets: Sequence[float] = REQUEST_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def read(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+        return counts, total_sum, sum(counts)
+
+
+class MetricsWriter:
+    """Monta o texto de exposição do Prometheus (formato 0.0.4)."""
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+        self._declared: set = set()
+
+    def _declare(self, name: str, kind: str, help_text: str) -> None:
+        if name in self._declared:
+            return
+        self._declared.add(name)
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def counter(self, name: str, help_text: str, value: float,
+                labels: Optional[Dict[str, str]] = None) -> None:
+        self._declare(name, "counter", help_text)
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: float,
+              labels: Optional[Dict[str, str]] = None) -> None:
+        self._declare(name, "gauge", help_text)
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, help_text: str, bounds: Iterable[float],
+                  counts: Sequence[int], total_sum: float, total: int,
+                  labels: Optional[Dict[str, str]] = None) -> None:
+        """`counts` não cumulativos, com o bucket +Inf na última posição."""
+
+        self._declare(name, "histogram", help_text)
+        labels = dict(labels or {})
+        cumulative = 0
+        for bound, count in zip([*bounds, float("inf")], counts):
+            cumulative += count
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            self._lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        self._lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total_sum)}")
+        self._lines.append(f"{name}_count{_format_labels(labels)} {total}")
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
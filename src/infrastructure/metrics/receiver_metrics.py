@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from src.infrastructure.adapters.shared_memory.shared_block import (
+    attach_shared_memory,
+    create_shared_memory,
+)
+
+RECEIVER_COUNTERS = (
+    "bytes_read",
+    "chunks_read",
+    "events_decoded",
+    "bounce_filtered",
+    "snapshots",
+    "decode_errors",
+    "resyncs",
+    "disconnects",
+    "reconnects",
+)
+(
+    BYTES_READ, CHUNKS_READ, EVENTS_DECODED, BOUNCE_FILTERED, SNAPSHOTS, DECODE_ERRORS, RESYNCS,
+    DISCONNECTS, RECONNECTS,
+) = range(len(RECEIVER_COUNTERS))
+
+# Estado da conexão (valores instantâneos, não contadores): portas caídas,
+# desde quando (monotonic_ns da primeira queda, 0 = conectado) e o tempo da
+# última e da pior recuperação (queda -> porta reaberta), em ns.
+RECEIVER_GAUGES = (
+    "ports_down",
+    "down_since_ns",
+    "last_recovery_ns",
+    "max_recovery_ns",
+)
+(
+    PORTS_DOWN, DOWN_SINCE_NS, LAST_RECOVERY_NS, MAX_RECOVERY_NS,
+) = range(len(RECEIVER_COUNTERS), len(RECEIVER_COUNTERS) + len(RECEIVER_GAUGES))
+
+# Latência leitura serial -> publicação no estado compartilhado (ns).
+PUBLISH_LATENCY_BUCKETS_NS = (
+    10_000, 25_000, 50_000, 100_000, 250_000, 500_000,
+    1_000_000, 2_500_000, 5_000_000, 10_000_000,
+)
+
+
+class ReceiverMetricsBlock:
+    """
+    Contadores do processo receptor em memória compartilhada (uint64).
+    O receptor é o único escritor e só faz `+=` num memoryview; o servidor
+    web lê os valores direto do bloco, sem proxy do Manager nem IPC.
+    Layout: contadores | estado da conexão | buckets do histograma (+Inf no
+    final) | soma | total.
+    """
+
+    def __init__(self, shm, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        self._values = shm.buf.cast("Q")
+        self._bucket_base = len(RECEIVER_COUNTERS) + len(RECEIVER_GAUGES)
+        self._sum_index = self._bucket_base + len(PUBLISH_LATENCY_BUCKETS_NS) + 1
+        self._count_index = self._sum_index + 1
+
+    @staticmethod
+    def _slots() -> int:
+        return len(RECEIVER_COUNTERS) + len(RECEIVER_GAUGES) + len(PUBLISH_LATENCY_BUCKETS_NS) + 3
+
+    @classmethod
+    def create(cls) -> "ReceiverMetricsBlock":
+        return cls(create_shared_memory(cls._slots() * 8), owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ReceiverMetricsBlock":
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        return (ReceiverMetricsBlock.attach, (self.name,))
+
+    # ---------------------------------------------------------------- escrita
+    @property
+    def values(self) -> memoryview:
+        """Acesso direto para o laço quente: values[BYTES_READ] += n."""
+
+        return self._values
+
+    def observe_publish_latency(self, latency_ns: int) -> None:
+        values = self._values
+        values[self._bucket_base + bisect_left(PUBLISH_LATENCY_BUCKETS_NS, latency_ns)] += 1
+        values[self._sum_index] += latency_ns
+        values[self._count_index] += 1
+
+    # ---------------------------------------------------------------- leitura
+    def read(self) -> Tuple[Dict[str, int], List[int], int, int]:
+        """(contadores, buckets não cumulativos, soma em ns, total)."""
+
+        values = self._values.tolist()
+        counters = {name: values[index] for index, name in enumerate(RECEIVER_COUNTERS)}
+        buckets = values[self._bucket_base:self._sum_index]
+        return counters, buckets, values[self._sum_index], values[self._count_index]
+
+    def gauges(self) -> Dict[str, int]:
+        return {name: self._values[PORTS_DOWN + index] for index, name in enumerate(RECEIVER_GAUGES)}
+
+    def stale(self) -> bool:
+        """Há placa desconectada: o estado publicado pode estar desatualizado."""
+
+        return self._values[PORTS_DOWN] > 0
+
+    def close(self) -> None:
+        self._values.release()
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import List, Tuple
+
+from src.infrastructure.adapters.shared_memory.shared_block import (
+    attach_shared_memory,
+    create_shared_memory,
+)
+
+from .prometheus import REQUEST_LATENCY_BUCKETS
+
+_SUBSCRIBERS = 0
+_BUCKET_BASE = 1
+_SUM_NS = _BUCKET_BASE + len(REQUEST_LATENCY_BUCKETS) + 1
+_COUNT = _SUM_NS + 1
+_ROW_SLOTS = _COUNT + 1
+
+
+class WebMetricsBlock:
+    """
+    Métricas HTTP dos workers do servidor pre-fork em memória compartilhada
+    (uint64): uma linha por worker, escrita só por ele, e a leitura soma as
+    linhas. Assim /metrics mostra os mesmos totais qualquer que seja o worker
+    que responda. Tem a interface do Histogram (observe/read/buckets) mais o
+    número de clientes SSE.
+    Layout de cada linha: clientes SSE | buckets de latência (+Inf no final)
+    | soma (ns) | total.
+    """
+
+    buckets = REQUEST_LATENCY_BUCKETS
+
+    def __init__(self, shm, owner: bool, workers: int) -> None:
+        self._shm = shm
+        self._owner = owner
+        self.workers = workers
+        self._values = shm.buf.cast("Q")
+        self._row = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, workers: int) -> "WebMetricsBlock":
+        return cls(create_shared_memory(workers * _ROW_SLOTS * 8), owner=True, workers=workers)
+
+    @classmethod
+    def attach(cls, name: str, workers: int) -> "WebMetricsBlock":
+        return cls(attach_shared_memory(name), owner=False, workers=workers)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        return (WebMetricsBlock.attach, (self.name, self.workers))
+
+    # ---------------------------------------------------------------- escrita
+    def select_worker(self, index: int) -> None:
+        """
+        Chamado no worker depois do fork. Os contadores de um worker
+        reiniciado continuam na linha; os clientes SSE dele não existem mais.
+        """
+        self._row = index * _ROW_SLOTS
+        self._lock = threading.Lock()
+        self._values[self._row + _SUBSCRIBERS] = 0
+
+    def observe(self, value: float) -> None:
+        row = self._row
+        values = self._values
+        with self._lock:
+            values[row + _BUCKET_BASE + bisect_left(self.buckets, value)] += 1
+            values[row + _SUM_NS] += int(value * 1e9)
+            values[row + _COUNT] += 1
+
+    def set_subscribers(self, count: int) -> None:
+        self._values[self._row + _SUBSCRIBERS] = count
+
+    # ---------------------------------------------------------------- leitura
+    def read(self) -> Tuple[List[int], float, int]:
+        """(buckets não cumulativos, soma em s, total) somados entre os workers."""
+
+        values = self._values.tolist()
+        counts = [0] * (len(self.buckets) + 1)
+        total_sum = 0
+        total = 0
+        for row in range(0, self.workers * _ROW_SLOTS, _ROW_SLOTS):
+            for index in range(len(counts)):
+                counts[index] += values[row + _BUCKET_BASE + index]
+            total_sum += values[row + _SUM_NS]
+            total += values[row + _COUNT]
+        return counts, total_sum / 1e9, total
+
+    def subscribers(self) -> int:
+        values = self._values
+        return sum(values[row * _ROW_SLOTS + _SUBSCRIBERS] for row in range(self.workers))
+
+    def close(self) -> None:
+        self._values.release()
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,84 @@
+import json
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Union
+
+from src.infrastructure.adapters.serial.serial_multiplexer import (
+    BoardPort,
+    boards_key_count,
+    parse_board_ports,
+)
+
+_PIANO_ID = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+class InstrumentConfig(NamedTuple):
+    id: str
+    name: str
+    boards: List[BoardPort]
+    baud: int
+    num_keys: int
+
+
+def load_hub_config(path: Union[str, Path], default_baud: int = 115_200) -> List[InstrumentConfig]:
+    """
+    Lê a configuração do modo hub (JSON):
+
+        {"pianos": [
+            {"id": "sala1", "name": "Sala 1", "ports": ["/dev/ttyACM0", "/dev/ttyACM1@48"],
+             "baud": 115200, "keys": 96},
+            ...
+        ]}
+
+    `ports` usa a mesma notação PORTA@N do --port; `name`, `baud` e `keys`
+    são opcionais. Erros de formato levantam ValueError.
+    """
+
+    try:
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    except OSError as e:
+        raise ValueError(f"Não foi possível ler {path}: {e}") from None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path} não é um JSON válido: {e}") from None
+
+    entries = raw.get("pianos") if isinstance(raw, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: campo 'pianos' deve ser uma lista não vazia.")
+
+    instruments: List[InstrumentConfig] = []
+    seen_ids = set()
+    seen_ports = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Piano {index}: entrada deve ser um objeto.")
+        piano_id = entry.get("id")
+        if not isinstance(piano_id, str) or not _PIANO_ID.match(piano_id):
+            raise ValueError(f"Piano {index}: 'id' deve ter 1 a 32 caracteres [A-Za-z0-9_-].")
+        if piano_id in seen_ids:
+            raise ValueError(f"Piano '{piano_id}' repetido.")
+        seen_ids.add(piano_id)
+
+        ports = entry.get("ports")
+        if isinstance(ports, str):
+            ports = [ports]
+        if not isinstance(ports, list) or not ports or not all(isinstance(p, str) for p in ports):
+            raise ValueError(f"Piano '{piano_id}': 'ports' deve ser uma lista de portas.")
+        try:
+            boards = parse_board_ports(ports)
+        except ValueError as e:
+            raise ValueError(f"Piano '{piano_id}': {e}") from None
+        for port, _ in boards:
+            if port in seen_ports:
+                raise ValueError(f"Porta {port} usada por mais de um piano.")
+            seen_ports.add(port)
+
+        baud = entry.get("baud", default_baud)
+        num_keys = entry.get("keys", boards_key_count(boards))
+        if not isinstance(baud, int) or baud <= 0:
+            raise ValueError(f"Piano '{piano_id}': 'baud' inválido.")
+        if not isinstance(num_keys, int) or num_keys <= 0:
+            raise ValueError(f"Piano '{piano_id}': 'keys' inválido.")
+
+        name = entry.get("name") or piano_id
+        instruments.append(InstrumentConfig(piano_id, str(name), boards, baud, num_keys))
+    return instruments
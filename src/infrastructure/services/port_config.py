@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+PORT_ENV = "MAGIC_PIANO_PORT"
+USB_ID_ENV = "MAGIC_PIANO_USB_ID"
+SERIAL_NUMBER_ENV = "MAGIC_PIANO_SERIAL_NUMBER"
+CONFIG_ENV = "MAGIC_PIANO_CONFIG"
+
+# Placas usadas no projeto (ATmega2560): Arduino Mega original, Mega R3,
+# a variante da Arduino.org e o conversor CH340 dos clones.
+DEFAULT_USB_IDS: Tuple[Tuple[int, int], ...] = (
+    (0x2341, 0x0042),
+    (0x2341, 0x0010),
+    (0x2A03, 0x0042),
+    (0x1A86, 0x7523),
+)
+
+UsbId = Tuple[int, int]
+
+
+class PortConfig(NamedTuple):
+    ports: List[str]
+    usb_ids: Tuple[UsbId, ...]
+    serial_number: Optional[str]
+
+
+def parse_usb_id(value: str) -> UsbId:
+    """VID:PID em hexadecimal (ex.: 2341:0042)."""
+
+    vid, sep, pid = value.strip().partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return int(vid, 16), int(pid, 16)
+    except ValueError:
+        raise ValueError(f"Identificador USB inválido '{value}' (esperado VID:PID em hexadecimal).") from None
+
+
+def _usb_ids(values) -> Tuple[UsbId, ...]:
+    if isinstance(values, str):
+        values = values.split(",")
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError("'usb_id' deve ser \"VID:PID\" ou uma lista deles.")
+    return tuple(parse_usb_id(value) for value in values if value.strip())
+
+
+def load_port_config(path: Optional[Union[str, Path]] = None) -> PortConfig:
+    """
+    Seleção de porta sem interação, para quiosques e serviços. Em ordem de
+    prioridade, cada campo vem das variáveis de ambiente ou do JSON em
+    `path` (ou em $MAGIC_PIANO_CONFIG):
+
+        {"port": ["/dev/ttyACM0", "/dev/ttyACM1@48"],
+         "usb_id": ["2341:0042"], "serial_number": "8573..."}
+
+    - port / MAGIC_PIANO_PORT: mesma notação PORTA@N do --port (no ambiente,
+      separadas por vírgula);
+    - usb_id / MAGIC_PIANO_USB_ID: VID:PID aceitos na escolha automática
+      (padrão: DEFAULT_USB_IDS);
+    - serial_number / MAGIC_PIANO_SERIAL_NUMBER: restringe a um aparelho.
+
+    Erros de formato levantam ValueError.
+    """
+
+    raw = {}
+    path = path or os.environ.get(CONFIG_ENV)
+    if path:
+        try:
+            raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        except OSError as e:
+            raise ValueError(f"Não foi possível ler {path}: {e}") from None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} não é um JSON válido: {e}") from None
+        if not isinstance(raw, dict):
+            raise ValueError(f"{path}: a configuração deve ser um objeto.")
+
+    ports = os.environ.get(PORT_ENV)
+    if ports:
+        ports = [port.strip() for port in ports.split(",") if port.strip()]
+    else:
+        ports = raw.get("port") or []
+        if isinstance(ports, str):
+            ports = [ports]
+        if not isinstance(ports, list) or not all(isinstance(p, str) for p in ports):
+            raise ValueError("'port' deve ser uma porta ou uma lista de portas.")
+
+    usb_ids = os.environ.get(USB_ID_ENV) or raw.get("usb_id")
+    usb_ids = _usb_ids(usb_ids) if usb_ids else DEFAULT_USB_IDS
+
+    serial_number = os.environ.get(SERIAL_NUMBER_ENV) or raw.get("serial_number")
+    if serial_number is not None and not isinstance(serial_number, str):
+        raise ValueError("'serial_number' deve ser uma string.")
+    return PortConfig(ports, usb_ids, serial_number or None)
+
+
+def has_display() -> bool:
+    """Se há onde abrir a janela de escolha de porta."""
+
+    if os.name != "posix" or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from multiprocessing import Process
+from multiprocessing import Pipe, Process, util
+from multiprocessing.connection import Connection
 from typing import Any, Callable, Dict, Iterable, Optional
 
 from src.infrastructure.logging.Logger import Logger
@@ -12,6 +13,8 @@ class ProcessManager:
     def __init__(self, logger: Logger) -> None:
         self._logger = logger
         self._processes: Dict[str, Process] = {}
+        self._controls: Dict[str, Connection] = {}
+        self._control_readers: Dict[str, Connection] = {}
 
     def register(
         self,
@@ -34,10 +37,46 @@ class ProcessManager:
         self._processes[name] = process
         return process
 
+    def open_control_channel(self, name: str) -> Connection:
+        """
+        Cria o canal de comandos de um processo e retorna a ponta de leitura,
+        a ser passada nos args do alvo. O processo pode esperar nela com
+        select junto com os seus próprios descritores.
+
+        Cada ponta fica só com o seu lado: os filhos criados por fork fecham
+        a cópia herdada da escrita e o principal fecha a leitura depois de
+        start(). Assim o processo vê EOF quando o principal termina, e
+        send_command falha em vez de acumular se o processo já saiu.
+        """
+        if name in self._controls:
+            raise ValueError(f"Canal de controle de '{name}' já foi criado.")
+        reader, writer = Pipe(duplex=False)
+        util.register_after_fork(writer, Connection.close)
+        self._controls[name] = writer
+        self._control_readers[name] = reader
+        return reader
+
+    def send_command(self, name: str, command: str, **params: Any) -> bool:
+        connection = self._controls.get(name)
+        if connection is None:
+            return False
+        try:
+            connection.send({"command": command, **params})
+        except (BrokenPipeError, OSError):
+            self._logger.warning(f"Processo {name} não recebe mais comandos.")
+            return False
+        return True
+
+    def start(self, name: str) -> None:
+        self._logger.info(f"Iniciando processo {name}...")
+        self._processes[name].start()
+        reader = self._control_readers.pop(name, None)
+        if reader is not None:
+            reader.close()
+
     def start_all(self) -> None:
-        for name, process in self._processes.items():
-            self._logger.info(f"Iniciando processo {name}...")
-            process.start()
+        for name in self._processes:
+            self.start(name)
 
     def join(self, name: str, timeout: Optional[float] = None) -> None:
         process = self._processes[name]
@@ -53,10 +92,30 @@ class ProcessManager:
             self._logger.warning(f"Forçando término do processo {name}...")
             process.terminate()
 
+    def stop(self, name: str, timeout: float = 5.0) -> None:
+        """
+        SIGTERM e espera até `timeout` (o servidor pre-fork usa esse tempo para
+        encerrar os workers); se o processo não sair, SIGKILL.
+        """
+        process = self._processes[name]
+        if not process.is_alive():
+            return
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            self._logger.warning(f"Processo {name} não encerrou em {timeout:.0f} s; forçando.")
+            process.kill()
+            process.join()
+
     def terminate_all(self) -> None:
         for name in list(self._processes.keys()):
             self.terminate(name)
 
+    def failed(self, name: str) -> bool:
+        """O processo saiu com código de erro próprio (não por sinal)."""
+        exitcode = self._processes[name].exitcode
+        return exitcode is not None and exitcode > 0
+
     def is_alive(self, name: str) -> bool:
         return self._processes[name].is_alive()
 
@@ -0,0 +1,122 @@
+import gc
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# Prioridade nice pedida no modo tempo real quando SCHED_FIFO não é usado
+# (ou não é permitido); valores negativos exigem CAP_SYS_NICE/root.
+REALTIME_NICE = -10
+
+
+def default_realtime_cpu() -> Optional[int]:
+    """
+    Última CPU permitida ao processo: a CPU 0 costuma concentrar as
+    interrupções, então a última é a candidata mais tranquila.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    allowed = os.sched_getaffinity(0)
+    return max(allowed) if len(allowed) > 1 else None
+
+
+def reserve_cpu(cpu: Optional[int]) -> bool:
+    """
+    Tira `cpu` da afinidade do processo atual; chamado no processo principal
+    antes de criar o servidor web, que herda a restrição. Assim a CPU do
+    receptor fica dedicada a ele.
+    """
+    if cpu is None or not hasattr(os, "sched_setaffinity"):
+        return False
+    others = os.sched_getaffinity(0) - {cpu}
+    if not others:
+        return False
+    os.sched_setaffinity(0, others)
+    return True
+
+
+def lower_thread_priority() -> None:
+    """
+    Chamado no início de threads auxiliares do receptor (ex.: reconexão):
+    no Linux política e nice são por thread, e uma thread criada depois do
+    RealtimeMode herdaria SCHED_FIFO e disputaria a CPU com o laço de
+    leitura. Volta para SCHED_OTHER com nice mínimo; sem suporte, nada muda.
+    """
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+        except OSError:
+            pass
+    if hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+
+class RealtimeMode:
+    """
+    Modo de baixa variação de latência do receptor (opt-in, --realtime):
+
+      - afinidade a uma única CPU (os.sched_setaffinity);
+      - SCHED_FIFO com `fifo_priority` > 0, ou nice REALTIME_NICE, quando o
+        sistema permitir (sem permissão, só registra no log);
+      - coleta, gc.freeze() e GC cíclico desligado enquanto o laço roda:
+        os objetos de configuração vão para a geração permanente e o laço
+        quente não cria ciclos, então nada se acumula.
+
+    enter() devolve o que foi efetivamente aplicado; exit() desfaz a parte
+    do GC (afinidade e prioridade morrem com o processo).
+    """
+
+    def __init__(self, cpu: Optional[int] = None, fifo_priority: int = 0, logger=None) -> None:
+        self.cpu = cpu if cpu is not None else default_realtime_cpu()
+        self.fifo_priority = fifo_priority
+        self.logger = logger
+        self._gc_was_enabled = False
+
+    def _warn(self, message: str) -> None:
+        if self.logger:
+            self.logger.warning(message)
+
+    def enter(self) -> Dict[str, Any]:
+        applied: Dict[str, Any] = {"cpu": None, "policy": "normal", "nice": None, "gc": "enabled"}
+
+        if self.cpu is not None:
+            if hasattr(os, "sched_setaffinity"):
+                try:
+                    os.sched_setaffinity(0, {self.cpu})
+                    applied["cpu"] = self.cpu
+                except OSError as e:
+                    self._warn(f"Não foi possível fixar o receptor na CPU {self.cpu}: {e}")
+            else:
+                self._warn("Afinidade de CPU não suportada nesta plataforma.")
+
+        if self.fifo_priority > 0:
+            if hasattr(os, "sched_setscheduler"):
+                try:
+                    os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.fifo_priority))
+                    applied["policy"] = f"SCHED_FIFO {self.fifo_priority}"
+                except OSError as e:
+                    self._warn(f"SCHED_FIFO não permitido ({e}); usando prioridade nice.")
+            else:
+                self._warn("SCHED_FIFO não suportado nesta plataforma.")
+        if applied["policy"] == "normal" and hasattr(os, "nice"):
+            try:
+                current = os.nice(0)
+                if current > REALTIME_NICE:
+                    os.nice(REALTIME_NICE - current)
+                applied["nice"] = os.nice(0)
+            except OSError as e:
+                self._warn(f"Sem permissão para aumentar a prioridade ({e}).")
+
+        self._gc_was_enabled = gc.isenabled()
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        applied["gc"] = f"frozen ({gc.get_freeze_count()} objetos), disabled"
+        return applied
+
+    def exit(self) -> None:
+        gc.unfreeze()
+        if self._gc_was_enabled:
+            gc.enable()
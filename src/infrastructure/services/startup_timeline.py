@@ -0,0 +1,64 @@
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+
+class StartupTimeline:
+    """
+    Linha do tempo da inicialização (--startup-profile). Cada marco é
+    impresso assim que acontece, com o tempo desde `origin` (início do
+    main.py) e desde o marco anterior; desativada, mark() não faz nada.
+
+    Marcos de outros processos (porta aberta, servidor web no ar, primeiro
+    evento) são observados por watch(), que consulta uma condição barata —
+    um contador em memória compartilhada, um connect — numa thread daemon.
+    """
+
+    def __init__(self, enabled: bool, origin: Optional[float] = None) -> None:
+        self.enabled = enabled
+        self._origin = origin if origin is not None else time.perf_counter()
+        self._last = self._origin
+        self._lock = threading.Lock()
+
+    def mark(self, label: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.perf_counter()
+            print(
+                f"[startup] {(now - self._origin) * 1000:9.1f} ms "
+                f"(+{(now - self._last) * 1000:8.1f})  {label}",
+                flush=True,
+            )
+            self._last = now
+
+    def watch(self, label: str, probe: Callable[[], bool], timeout: float = 120.0,
+              interval: float = 0.001) -> None:
+        if not self.enabled:
+            return
+
+        def run() -> None:
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                try:
+                    if probe():
+                        self.mark(label)
+                        return
+                except Exception:
+                    pass
+                time.sleep(interval)
+            self.mark(f"{label}: não ocorreu em {timeout:.0f} s")
+
+        threading.Thread(target=run, name="startup-watch", daemon=True).start()
+
+
+def port_accepting(port: int, host: str = "127.0.0.1") -> Callable[[], bool]:
+    def probe() -> bool:
+        try:
+            with socket.create_connection((host, port), timeout=0.05):
+                return True
+        except OSError:
+            return False
+
+    return probe
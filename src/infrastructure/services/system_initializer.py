@@ -1,10 +1,22 @@
 import argparse
-import tkinter as tk
-from tkinter import messagebox, ttk
+import os
 from typing import List, Optional
 
 from src.infrastructure.adapters.serial.serial_communicator import SerialCommunicator
+from src.infrastructure.adapters.serial.serial_multiplexer import BoardPort, parse_board_ports
 from src.infrastructure.logging.Logger import Logger
+from src.infrastructure.services.port_config import has_display, load_port_config
+
+
+def positive_int(value: str) -> int:
+    """Tipo do argparse para contagens que precisam ser > 0."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' não é um inteiro.") from None
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' deve ser maior que zero.")
+    return number
 
 
 class SystemInitializer:
@@ -17,7 +29,12 @@ class SystemInitializer:
         )
         parser.add_argument(
             "--port",
-            help="Porta serial a ser utilizada (ex.: COM4, /dev/ttyACM0)",
+            action="append",
+            help=(
+                "Porta serial a ser utilizada (ex.: COM4, /dev/ttyACM0, /dev/pts/3). "
+                "Repita para várias placas; PORTA@N faz a placa começar na tecla N "
+                "(padrão: 48 teclas após a anterior)"
+            ),
         )
         parser.add_argument(
             "--baud",
@@ -25,21 +42,187 @@ class SystemInitializer:
             default=115_200,
             help="Baud rate utilizado pelo microcontrolador (default: 115200)",
         )
+        parser.add_argument(
+            "--keys",
+            type=positive_int,
+            help="Total de teclas do estado compartilhado (padrão: o necessário para as placas)",
+        )
+        parser.add_argument(
+            "--serve-mode",
+            choices=("dev", "prefork"),
+            default="dev",
+            help="Servidor web: dev (Werkzeug, um processo) ou prefork (vários workers; Linux/macOS)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=positive_int,
+            default=max(2, os.cpu_count() or 1),
+            help="Workers do modo prefork (default: número de CPUs)",
+        )
+        parser.add_argument(
+            "--backlog",
+            type=positive_int,
+            default=256,
+            help="Fila de conexões pendentes do socket no modo prefork (default: 256)",
+        )
+        parser.add_argument(
+            "--request-timeout",
+            type=float,
+            default=15.0,
+            help=(
+                "Segundos que um worker do modo prefork espera um cliente lento antes de fechar a "
+                "conexão (default: 15). Não há keep-alive: cada resposta fecha a conexão."
+            ),
+        )
+        parser.add_argument(
+            "--hub",
+            metavar="CONFIG",
+            help="Modo hub: vários pianos descritos em um JSON (ignora --port/--keys/--capture)",
+        )
+        parser.add_argument(
+            "--chord-window",
+            type=float,
+            default=30.0,
+            metavar="MS",
+            help="Teclas pressionadas dentro desta janela formam um acorde (default: 30 ms)",
+        )
+        parser.add_argument(
+            "--hold",
+            type=float,
+            default=500.0,
+            metavar="MS",
+            help="Tempo pressionada para a tecla virar nota segurada (default: 500 ms)",
+        )
+        parser.add_argument(
+            "--repeat-window",
+            type=float,
+            default=300.0,
+            metavar="MS",
+            help="Intervalo máximo entre descidas da mesma tecla para contar repetição (default: 300 ms)",
+        )
+        parser.add_argument(
+            "--realtime",
+            action="store_true",
+            help=(
+                "Receptor em modo tempo real: CPU dedicada, prioridade maior quando permitido, "
+                "GC congelado e buffers pré-alocados (Linux)"
+            ),
+        )
+        parser.add_argument(
+            "--rt-cpu",
+            type=int,
+            metavar="CPU",
+            help="CPU reservada ao receptor no modo tempo real (padrão: a última disponível)",
+        )
+        parser.add_argument(
+            "--rt-fifo",
+            type=int,
+            default=0,
+            metavar="PRIORIDADE",
+            help="Usa SCHED_FIFO com esta prioridade (1-99) no modo tempo real, se permitido",
+        )
+        parser.add_argument(
+            "--jitter-report",
+            action="store_true",
+            help="Ao encerrar, o receptor mostra percentis do intervalo entre leituras e do processamento",
+        )
         parser.add_argument(
             "--list",
             action="store_true",
             help="Apenas lista as portas disponíveis e sai",
         )
+        parser.add_argument(
+            "--capture",
+            metavar="ARQUIVO",
+            help="Grava os bytes recebidos (com timestamp) em um arquivo de captura",
+        )
+        parser.add_argument(
+            "--headless",
+            action="store_true",
+            help=(
+                "Nunca abre a janela de escolha de porta: usa --port, $MAGIC_PIANO_PORT, "
+                "--config ou a placa USB encontrada (automático sem display)"
+            ),
+        )
+        parser.add_argument(
+            "--config",
+            metavar="ARQUIVO",
+            help="JSON com port/usb_id/serial_number para a escolha sem interação (ou $MAGIC_PIANO_CONFIG)",
+        )
+        parser.add_argument(
+            "--log-file",
+            metavar="ARQUIVO",
+            help="Grava o log (texto, sem cores) neste arquivo em vez do terminal (ou $MAGIC_PIANO_LOG_FILE)",
+        )
+        parser.add_argument(
+            "--log-json",
+            metavar="ARQUIVO",
+            help="Também grava o log em JSON lines neste arquivo (ou $MAGIC_PIANO_LOG_JSON)",
+        )
+        parser.add_argument(
+            "--startup-profile",
+            action="store_true",
+            help="Imprime a linha do tempo da inicialização até o primeiro evento de tecla",
+        )
         return parser.parse_args()
 
     def list_ports(self) -> List[str]:
         return SerialCommunicator.list_available_ports()
 
+    def choose_boards(
+        self,
+        requested_ports: Optional[List[str]],
+        headless: bool = False,
+        config_path: Optional[str] = None,
+    ) -> Optional[List[BoardPort]]:
+        """
+        Placas a receber como (porta, deslocamento da primeira tecla). Sem
+        --port, vale a configuração sem interação (ver load_port_config) e,
+        sem ela, a placa USB reconhecida pelo VID:PID; a janela de escolha só
+        abre se nada disso resolver e houver display.
+        """
+
+        if not requested_ports:
+            try:
+                config = load_port_config(config_path)
+            except ValueError as e:
+                self._logger.error(str(e))
+                return None
+            requested_ports = config.ports
+        if not requested_ports:
+            found = SerialCommunicator.find_usb_ports(config.usb_ids, config.serial_number)
+            if found:
+                if len(found) > 1:
+                    self._logger.warning(
+                        f"Várias placas encontradas ({', '.join(found)}); usando {found[0]}. "
+                        "Use --port ou MAGIC_PIANO_PORT para escolher."
+                    )
+                self._logger.info(f"Porta {found[0]} escolhida pelo identificador USB.")
+                return [(found[0], 0)]
+            if headless or not has_display():
+                self._logger.error(
+                    "Nenhuma placa reconhecida e sem interação disponível: "
+                    "use --port, MAGIC_PIANO_PORT ou --config."
+                )
+                return None
+            port = self.choose_port(None)
+            return [(port, 0)] if port else None
+
+        try:
+            boards = parse_board_ports(requested_ports)
+        except ValueError as e:
+            self._logger.error(str(e))
+            return None
+        for port, _ in boards:
+            if self.choose_port(port) is None:
+                return None
+        return boards
+
     def choose_port(self, requested_port: Optional[str]) -> Optional[str]:
         available = self.list_ports()
 
         if requested_port:
-            if requested_port not in available:
+            if not SerialCommunicator.is_port_available(requested_port):
                 self._logger.error(
                     f"Porta {requested_port} não encontrada. Disponíveis: {', '.join(available) or 'nenhuma'}"
                 )
@@ -55,6 +238,10 @@ class SystemInitializer:
         return self._show_port_selection(available)
 
     def _show_port_selection(self, ports: List[str]) -> Optional[str]:
+        # tkinter só é carregado quando a janela é realmente necessária
+        import tkinter as tk
+        from tkinter import messagebox, ttk
+
         root = tk.Tk()
         root.title("Selecionar porta serial")
         root.geometry("320x120")
@@ -1,23 +1,61 @@
 import sys
-from multiprocessing import Manager
+import time
 
-from src.application.usecases.data_receiver_multiprocess import data_receiver_process
+_STARTED = time.perf_counter()
+
+# Só o necessário para receber: Flask e tkinter são importados sob demanda
+# (processo web e janela de escolha de porta), e não há servidor do Manager.
+from src.application.usecases.data_receiver_multiprocess import (
+    data_receiver_process,
+    hub_receiver_process,
+)
 from src.infrastructure.constants.controls_constants import (
+    CONTROL_STOP,
     RECEIVER_BAUD,
+    RECEIVER_CAPTURE,
     RECEIVER_COM,
-    RECEIVER_STOP,
+    RECEIVER_GESTURES,
+    RECEIVER_JITTER,
+    RECEIVER_PORTS,
+    RECEIVER_REALTIME,
 )
-from src.infrastructure.adapters.serial.piano_decoder import make_empty_state
-from src.infrastructure.adapters.web_server import start_flask_server
-from src.infrastructure.logging.Logger import Logger
+from src.infrastructure.adapters.serial.serial_multiplexer import boards_key_count
+from src.infrastructure.adapters.shared_memory.gesture_ring import GestureRing
+from src.infrastructure.adapters.shared_memory.key_event_ring import KeyEventRing
+from src.infrastructure.adapters.shared_memory.key_state_block import KeyStateBlock
+from src.infrastructure.adapters.web_server.piano import Piano
+from src.infrastructure.logging.Logger import Logger, configure_logging
+from src.infrastructure.metrics.receiver_metrics import BYTES_READ, ReceiverMetricsBlock
+from src.infrastructure.services.hub_config import load_hub_config
 from src.infrastructure.services.process_manager import ProcessManager
+from src.infrastructure.services.realtime import default_realtime_cpu, reserve_cpu
+from src.infrastructure.services.startup_timeline import StartupTimeline, port_accepting
 from src.infrastructure.services.system_initializer import SystemInitializer
 
+WEB_PORT = 5000
+
+
+def web_server_process(*args, **kwargs) -> None:
+    """Alvo do processo web: o Flask é importado já no processo filho."""
+    from src.infrastructure.adapters.web_server import start_flask_server
+
+    start_flask_server(*args, **kwargs)
+
+
+def watch_startup(timeline: StartupTimeline, event_ring, receiver_metrics) -> None:
+    timeline.watch("primeiros bytes da serial", lambda: receiver_metrics.values[BYTES_READ] > 0)
+    timeline.watch("primeiro evento de tecla", lambda: event_ring.head() > 0)
+    timeline.watch("servidor web aceitando conexões", port_accepting(WEB_PORT))
+
 
 def main() -> int:
     logger = Logger("Main", verbose=True)
     system_initializer = SystemInitializer(logger)
     args = system_initializer.parse_args()
+    if args.log_file or args.log_json:
+        configure_logging(args.log_file, args.log_json)
+    timeline = StartupTimeline(args.startup_profile, origin=_STARTED)
+    timeline.mark("imports e argumentos")
 
     if args.list:
         ports = system_initializer.list_ports()
@@ -29,47 +67,224 @@ def main() -> int:
                 print(f" - {port}")
         return 0
 
-    port = system_initializer.choose_port(args.port)
-    if port is None:
+    if args.hub:
+        return run_hub(args, logger, timeline)
+
+    boards = system_initializer.choose_boards(args.port, args.headless, args.config)
+    if boards is None:
         return 1
+    timeline.mark("porta escolhida")
+    num_keys = args.keys if args.keys is not None else boards_key_count(boards)
+    if num_keys < boards_key_count(boards):
+        logger.warning(
+            f"--keys {num_keys} não cobre todas as placas; teclas acima disso serão ignoradas."
+        )
+    port = boards[0][0]
 
-    manager = Manager()
-    shared_controls = manager.dict()
-    shared_controls[RECEIVER_COM] = port
-    shared_controls[RECEIVER_BAUD] = args.baud
-    shared_controls[RECEIVER_STOP] = False
+    # Configuração inicial copiada para cada processo; a parada e as trocas
+    # de porta vão pelo canal de controle, sem proxy do Manager.
+    shared_controls = {
+        RECEIVER_COM: port,
+        RECEIVER_PORTS: boards,
+        RECEIVER_BAUD: args.baud,
+        RECEIVER_CAPTURE: args.capture,
+        RECEIVER_GESTURES: gesture_options(args),
+        RECEIVER_REALTIME: realtime_options(args),
+        RECEIVER_JITTER: args.jitter_report,
+    }
 
-    shared_frames = manager.dict()
-    for key_id, pressed in enumerate(make_empty_state()):
-        shared_frames[key_id] = bool(pressed)
+    key_state = KeyStateBlock.create(num_keys=num_keys)
+    event_ring = KeyEventRing.create()
+    gesture_ring = GestureRing.create()
+    receiver_metrics = ReceiverMetricsBlock.create()
+    timeline.mark("memória compartilhada criada")
 
     process_manager = ProcessManager(logger)
     receiver_name = "data_receiver"
+    receiver_control = process_manager.open_control_channel(receiver_name)
     process_manager.register(
         name=receiver_name,
         target=data_receiver_process,
-        args=(shared_controls, shared_frames),
+        args=(shared_controls, key_state, event_ring, receiver_metrics, receiver_control, gesture_ring),
         daemon=True,
     )
 
     web_name = "web_server"
     process_manager.register(
         name=web_name,
-        target=start_flask_server,
-        args=(shared_frames, shared_controls),
+        target=web_server_process,
+        args=(key_state, event_ring, shared_controls, receiver_metrics),
+        kwargs={
+            "serve_mode": args.serve_mode,
+            "workers": args.workers,
+            "backlog": args.backlog,
+            "request_timeout": args.request_timeout,
+            "gesture_ring": gesture_ring,
+        },
         daemon=True,
     )
 
-    process_manager.start_all()
+    # Receptor primeiro: as teclas já são lidas enquanto o servidor web sobe
+    watch_startup(timeline, event_ring, receiver_metrics)
+    process_manager.start(receiver_name)
+    timeline.mark("receptor iniciado")
+    reserve_realtime_cpu(shared_controls[RECEIVER_REALTIME], logger)
+    process_manager.start(web_name)
+    timeline.mark("processo web iniciado")
     logger.info(
-        f"Processo de recepção iniciado na porta {port} a {args.baud} bps. Pressione Ctrl+C para encerrar."
+        f"Processo de recepção iniciado em {', '.join(f'{p}@{o}' for p, o in boards)} "
+        f"({num_keys} teclas) a {args.baud} bps. Pressione Ctrl+C para encerrar."
+    )
+
+    try:
+        process_manager.join(receiver_name)
+    except KeyboardInterrupt:
+        logger.info("Encerrando recepção...")
+        process_manager.send_command(receiver_name, CONTROL_STOP)
+        process_manager.join(receiver_name, timeout=2.0)
+    finally:
+        if process_manager.is_alive(receiver_name):
+            logger.warning("Processo não finalizou a tempo. Forçando encerramento.")
+            process_manager.terminate(receiver_name)
+            process_manager.join(receiver_name)
+
+        if process_manager.is_alive(web_name):
+            logger.info("Encerrando servidor web...")
+            process_manager.stop(web_name, timeout=10.0)
+
+        key_state.close()
+        event_ring.close()
+        gesture_ring.close()
+        receiver_metrics.close()
+
+    if process_manager.failed(receiver_name):
+        logger.error("O receptor encerrou com erro.")
+        return 1
+    logger.info("Aplicação finalizada.")
+    return 0
+
+
+def gesture_options(args) -> dict:
+    """Janelas do detector de gestos (ver GestureDetector)."""
+    return {
+        "chord_window_ms": args.chord_window,
+        "hold_ms": args.hold,
+        "repeat_window_ms": args.repeat_window,
+    }
+
+
+def realtime_options(args):
+    """Opções do RealtimeMode do receptor, ou None sem --realtime."""
+    if not args.realtime:
+        return None
+    return {
+        "cpu": args.rt_cpu if args.rt_cpu is not None else default_realtime_cpu(),
+        "fifo_priority": args.rt_fifo,
+    }
+
+
+def reserve_realtime_cpu(options, logger: Logger) -> None:
+    """
+    Depois de o receptor nascer, o processo principal (e o servidor web, que
+    herda a afinidade) deixa a CPU do receptor só para ele.
+    """
+    if options is None or options["cpu"] is None:
+        return
+    try:
+        if reserve_cpu(options["cpu"]):
+            logger.info(f"CPU {options['cpu']} reservada ao receptor.")
+    except OSError as e:
+        logger.warning(f"Não foi possível reservar a CPU {options['cpu']}: {e}")
+
+
+def run_hub(args, logger: Logger, timeline: StartupTimeline) -> int:
+    """
+    Modo hub: um backend para vários pianos. Cada instrumento tem os próprios
+    blocos compartilhados e um decoder leve; todos são lidos por um único
+    processo receptor e servidos pelo mesmo servidor web, que compartilha a
+    biblioteca MIDI e o cadastro de jogadores.
+    """
+    try:
+        instruments = load_hub_config(args.hub, default_baud=args.baud)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    pianos = [
+        Piano(
+            id=config.id,
+            name=config.name,
+            key_state=KeyStateBlock.create(num_keys=config.num_keys),
+            event_ring=KeyEventRing.create(),
+            receiver_metrics=ReceiverMetricsBlock.create(),
+            gesture_ring=GestureRing.create(),
+        )
+        for config in instruments
+    ]
+    first = pianos[0]
+    timeline.mark("memória compartilhada criada")
+    # Página inicial e /api/keys mostram o primeiro piano
+    controls = {
+        RECEIVER_COM: instruments[0].boards[0][0],
+        RECEIVER_BAUD: instruments[0].baud,
+    }
+
+    realtime = realtime_options(args)
+
+    process_manager = ProcessManager(logger)
+    receiver_name = "hub_receiver"
+    receiver_control = process_manager.open_control_channel(receiver_name)
+    process_manager.register(
+        name=receiver_name,
+        target=hub_receiver_process,
+        args=(
+            [
+                (config.id, config.boards, config.baud, piano.key_state, piano.event_ring,
+                 piano.receiver_metrics, piano.gesture_ring)
+                for config, piano in zip(instruments, pianos)
+            ],
+            receiver_control,
+            gesture_options(args),
+            realtime,
+            args.jitter_report,
+        ),
+        daemon=True,
+    )
+
+    web_name = "web_server"
+    process_manager.register(
+        name=web_name,
+        target=web_server_process,
+        args=(first.key_state, first.event_ring, controls, first.receiver_metrics),
+        kwargs={
+            "serve_mode": args.serve_mode,
+            "workers": args.workers,
+            "backlog": args.backlog,
+            "request_timeout": args.request_timeout,
+            "pianos": pianos,
+            "gesture_ring": first.gesture_ring,
+        },
+        daemon=True,
     )
 
+    watch_startup(timeline, first.event_ring, first.receiver_metrics)
+    process_manager.start(receiver_name)
+    timeline.mark("receptor iniciado")
+    reserve_realtime_cpu(realtime, logger)
+    process_manager.start(web_name)
+    timeline.mark("processo web iniciado")
+    for config in instruments:
+        logger.info(
+            f"Piano {config.id}: {', '.join(f'{p}@{o}' for p, o in config.boards)} "
+            f"({config.num_keys} teclas) a {config.baud} bps."
+        )
+    logger.info(f"Hub com {len(pianos)} pianos iniciado. Pressione Ctrl+C para encerrar.")
+
     try:
         process_manager.join(receiver_name)
     except KeyboardInterrupt:
         logger.info("Encerrando recepção...")
-        shared_controls[RECEIVER_STOP] = True
+        process_manager.send_command(receiver_name, CONTROL_STOP)
         process_manager.join(receiver_name, timeout=2.0)
     finally:
         if process_manager.is_alive(receiver_name):
@@ -79,9 +294,17 @@ def main() -> int:
 
         if process_manager.is_alive(web_name):
             logger.info("Encerrando servidor web...")
-            process_manager.terminate(web_name)
-            process_manager.join(web_name)
+            process_manager.stop(web_name, timeout=10.0)
+
+        for piano in pianos:
+            piano.key_state.close()
+            piano.event_ring.close()
+            piano.receiver_metrics.close()
+            piano.gesture_ring.close()
 
+    if process_manager.failed(receiver_name):
+        logger.error("O receptor encerrou com erro.")
+        return 1
     logger.info("Aplicação finalizada.")
     return 0
 
@@ -0,0 +1,131 @@
+"""
+Reproduz um arquivo de captura (main.py --capture) em um pseudo-terminal,
+simulando o teclado sem o hardware:
+
+    python -m src.replay sessao.cap --speed 4
+    python -m src.main --port /dev/pts/N
+
+--speed 1 mantém os intervalos originais, N acelera N vezes e 0 envia tudo
+o mais rápido possível (útil para estressar o pipeline muito além dos
+115200 bps do Mega).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from src.infrastructure.adapters.serial.serial_capture import CaptureReader
+from src.infrastructure.logging.Logger import Logger
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Magic Piano - reprodução de captura serial em um pty"
+    )
+    parser.add_argument("capture", help="Arquivo gerado por main.py --capture")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Fator de velocidade (1 = tempo real, 0 = máximo; default: 1)",
+    )
+    parser.add_argument(
+        "--loop",
+        type=int,
+        default=1,
+        help="Quantas vezes reproduzir a captura (0 = sem fim; default: 1)",
+    )
+    parser.add_argument(
+        "--start-delay",
+        type=float,
+        default=3.0,
+        help="Segundos de espera antes de começar, para o receptor abrir a porta (default: 3)",
+    )
+    return parser.parse_args()
+
+
+def open_pty():
+    import tty
+
+    master, slave = os.openpty()
+    # Modo raw nos dois lados: nenhum byte (0x7F, \n...) pode ser reinterpretado
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+def write_all(fd: int, data) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def play(reader: CaptureReader, fd: int, speed: float) -> int:
+    """Reproduz a captura uma vez; retorna quantos bytes foram enviados."""
+
+    sent = 0
+    first_ns = None
+    started_ns = time.monotonic_ns()
+    for t_ns, data in reader:
+        if speed > 0:
+            if first_ns is None:
+                first_ns = t_ns
+            due_ns = started_ns + int((t_ns - first_ns) / speed)
+            delay = (due_ns - time.monotonic_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
+        write_all(fd, data)
+        sent += len(data)
+    return sent
+
+
+def main() -> int:
+    logger = Logger("Replay", verbose=True)
+    args = parse_args()
+    if os.name != "posix":
+        logger.error("A reprodução usa pseudo-terminais e só funciona em Linux/macOS.")
+        return 1
+
+    try:
+        reader = CaptureReader(args.capture)
+    except (OSError, ValueError) as e:
+        logger.error(f"Não foi possível abrir a captura: {e}")
+        return 1
+
+    records, total, duration_ns = reader.stats()
+    master, slave, port = open_pty()
+    logger.info(
+        f"Captura com {records} blocos, {total} bytes, {duration_ns / 1e9:.1f} s. "
+        f"Porta virtual: {port}"
+    )
+    logger.info(f"Inicie o sistema com: python -m src.main --port {port}")
+
+    try:
+        time.sleep(args.start_delay)
+        iteration = 0
+        while args.loop == 0 or iteration < args.loop:
+            iteration += 1
+            started = time.perf_counter()
+            sent = play(reader, master, args.speed)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Reprodução {iteration}: {sent} bytes em {elapsed:.2f} s "
+                f"({sent / elapsed if elapsed else 0:.0f} B/s)"
+            )
+        # Mantém o pty aberto para o receptor não receber EOF/EIO no meio do jogo
+        logger.info("Reprodução concluída. Ctrl+C para fechar a porta virtual.")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Encerrando reprodução...")
+    finally:
+        reader.close()
+        os.close(master)
+        os.close(slave)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
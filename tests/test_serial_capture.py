@@ -0,0 +1,35 @@
+from src.infrastructure.adapters.serial.serial_capture import CaptureReader, CaptureWriter
+
+
+def _records(path):
+    with CaptureReader(path) as reader:
+        return [(t_ns, bytes(data)) for t_ns, data in reader]
+
+
+def test_append_after_truncated_record_keeps_new_records(tmp_path):
+    path = tmp_path / "capture.bin"
+    writer = CaptureWriter(path)
+    writer.write(b"\x01\x02", t_ns=1)
+    writer.write(b"\x03\x04\x05", t_ns=2)
+    writer.close()
+
+    # Processo encerrado no meio do último registro
+    size = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.truncate(size - 2)
+
+    writer = CaptureWriter(path)
+    writer.write(b"\x06", t_ns=3)
+    writer.close()
+
+    assert _records(path) == [(1, b"\x01\x02"), (3, b"\x06")]
+
+
+def test_append_to_complete_capture_keeps_everything(tmp_path):
+    path = tmp_path / "capture.bin"
+    for t_ns in (1, 2):
+        writer = CaptureWriter(path)
+        writer.write(bytes([t_ns]), t_ns=t_ns)
+        writer.close()
+
+    assert _records(path) == [(1, b"\x01"), (2, b"\x02")]